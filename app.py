@@ -1,25 +1,154 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import (Flask, render_template, request, redirect, url_for, flash, jsonify, session,
+                   current_app)
+from flask.cli import AppGroup
 from functools import wraps
+import io
+import os
+import click
 from config import Config
-from database import db, Movie, Feedback, Analytics, User
+from database import (db, Movie, MovieGenre, Feedback, Analytics, User, rebuild_movie_stats,
+                      rebuild_movie_genres, rescore_sentiment)
+from pagination import keyset_paginate
+from queries import user_feedback_page, user_review_summary, movie_feedbacks
+from reports import (build_dashboard_report, feedback_totals, feedback_export_rows, FEEDBACK_EXPORT_COLUMNS,
+                     trending_movies)
+from export import ExportFilter, EXPORT_FORMATS, encode_export, export_response
+from rollups import RollupScheduler, run_rollup, rebuild_rollups
+from instrumentation import RequestInstrumentation
+from migrations import upgrade_schema
+from cache import ResponseCache, cached
+from identity import IdentityCache, current_user, current_user_is_admin
+from passwords import PasswordHasher, HasherBusy
+from engine_options import engine_options, configure_engine
+from replicas import replica_binds, init_read_routing
+from ingest import (FeedbackQueue, IngestWriter, submission_payload, drain, existing_movie_ids,
+                    insert_feedback_rows)
+from importer import IMPORT_FORMATS, import_feedback, read_records
+from reprocess import PROCESSORS, reprocess
 from datetime import datetime, date
-from sqlalchemy import func, desc
+from sqlalchemy import desc, select
+from sqlalchemy.orm import selectinload
 
 
+class DeferredRoutes:
+    """Views and template filters recorded at import and added to each app by create_app().
+
+    Unlike a Blueprint, views keep their plain endpoint names ('index',
+    'movie_detail', ...) that the templates pass to url_for().
+    """
+    
+    def __init__(self):
+        self.views = []
+        self.filters = []
+    
+    def route(self, rule, **options):
+        def decorator(view):
+            self.views.append((rule, view, options))
+            return view
+        return decorator
+    
+    def template_filter(self, name):
+        def decorator(f):
+            self.filters.append((name, f))
+            return f
+        return decorator
+    
+    def init_app(self, app):
+        for rule, view, options in self.views:
+            app.add_url_rule(rule, view.__name__, view, **options)
+        for name, f in self.filters:
+            app.add_template_filter(f, name)
+
+
+routes = DeferredRoutes()
+commands = AppGroup('cinemapulse')
+
+
+def create_app(config=Config):
+    """Build the web app from a config object.
+    
+    Nothing here connects to the database: the schema is created and
+    migrated by ``flask upgrade-db``. With PREFORK set, background threads
+    are left to start_background_workers() in each forked worker.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS',
+                          engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config))
+    app.config['SQLALCHEMY_BINDS'] = {
+        **(app.config.get('SQLALCHEMY_BINDS') or {}),
+        **replica_binds(app.config, lambda uri: engine_options(uri, app.config)),
+    }
+    
+    db.init_app(app)
+    init_read_routing(app, db)
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_engine(engine, app.config)
+    
+    # Per-app extensions, so apps built from different configs stay isolated
+    cache = ResponseCache(app)
+    IdentityCache(app, cache.backend)
+    app.extensions['password_hasher'] = PasswordHasher(app.config['PASSWORD_HASH_METHOD'],
+                                                       app.config['PASSWORD_HASH_WORKERS'] or None,
+                                                       app.config['PASSWORD_HASH_MAX_PENDING'] or None)
+    
+    if app.config['INSTRUMENTATION_ENABLED']:
+        instrumentation = app.extensions['instrumentation'] = RequestInstrumentation().init_app(app)
+        with app.app_context():
+            # Replica engines too, so reads routed to them show up in /metrics
+            for engine in db.engines.values():
+                instrumentation.instrument_engine(engine)
+    
+    if app.config['FEEDBACK_INGEST_MODE'] == 'queue':
+        queue = app.extensions['feedback_queue'] = FeedbackQueue(
+            app.config['FEEDBACK_QUEUE_PATH'] or os.path.join(app.instance_path, 'feedback_queue.db'))
+        if 'instrumentation' in app.extensions:
+            app.extensions['instrumentation'].register_gauge(
+                'feedback_queue_depth', 'Feedback submissions waiting to be written', queue.depth)
+    
+    routes.init_app(app)
+    for command in commands.commands.values():
+        app.cli.add_command(command)
+    
+    if not app.config['PREFORK']:
+        start_background_workers(app)
+    return app
+
+
+def start_background_workers(app):
+    """Start the ingest writer and rollup scheduler of this process; safe to call again after a fork"""
+    workers = app.extensions.get('background_workers')
+    if workers is not None and workers[0] == os.getpid():
+        return
+    threads = []
+    if 'feedback_queue' in app.extensions:
+        threads.append(IngestWriter(app, app.extensions['feedback_queue'], app.config['FEEDBACK_INGEST_INTERVAL']))
+    if app.config['ANALYTICS_ROLLUP_INTERVAL']:
+        threads.append(RollupScheduler(app, app.config['ANALYTICS_ROLLUP_INTERVAL']))
+    for thread in threads:
+        thread.start()
+    app.extensions['background_workers'] = (os.getpid(), threads)
 
-app = Flask(__name__)
-app.config.from_object(Config)
 
-db.init_app(app)
+def feedback_queue():
+    """The write-behind queue of the current app, or None in sync mode"""
+    return current_app.extensions.get('feedback_queue')
 
-with app.app_context():
-    db.create_all()
+
+def catalog_tags(**view_args):
+    """Pages that aggregate over every movie and feedback"""
+    return ('catalog', 'feedback')
+
+def movie_tags(movie_id):
+    """Pages that only change when this movie or its feedback does"""
+    return (f'movie:{movie_id}',)
 
 
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if not current_user:
             flash('Please log in to access this page.', 'error')
             return redirect(url_for('login'))
         return f(*args, **kwargs)
@@ -28,18 +157,17 @@ def login_required(f):
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if not current_user:
             flash('Please log in to access this page.', 'error')
             return redirect(url_for('login'))
-        user = User.query.get(session['user_id'])
-        if not user or not user.is_admin:
+        if not current_user_is_admin():
             flash('Admin access required.', 'error')
             return redirect(url_for('index'))
         return f(*args, **kwargs)
     return decorated_function
 
 
-@app.route('/signup', methods=['GET', 'POST'])
+@routes.route('/signup', methods=['GET', 'POST'])
 def signup():
     if 'user_id' in session:
         return redirect(url_for('index'))
@@ -75,7 +203,11 @@ def signup():
         
     
         new_user = User(username=username, email=email, full_name=full_name)
-        new_user.set_password(password)
+        try:
+            new_user.set_password(password)
+        except HasherBusy:
+            flash('We are handling a lot of sign-ups right now. Please try again in a moment.', 'error')
+            return render_template('signup.html'), 503
         
        
         if User.query.count() == 0:
@@ -89,7 +221,7 @@ def signup():
     
     return render_template('signup.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@routes.route('/login', methods=['GET', 'POST'])
 def login():
     if 'user_id' in session:
         return redirect(url_for('index'))
@@ -100,7 +232,15 @@ def login():
         
         user = User.query.filter_by(username=username).first()
         
-        if user and user.check_password(password):
+        try:
+            valid = user is not None and user.check_password(password)
+        except HasherBusy:
+            flash('We are handling a lot of sign-ins right now. Please try again in a moment.', 'error')
+            return render_template('login.html'), 503
+        
+        if valid:
+            # Persist a hash upgraded by check_password
+            db.session.commit()
             session['user_id'] = user.id
             session['username'] = user.username
             session['is_admin'] = user.is_admin
@@ -111,84 +251,98 @@ def login():
     
     return render_template('login.html')
 
-@app.route('/logout')
+@routes.route('/logout')
 def logout():
     session.clear()
     flash('You have been logged out successfully.', 'success')
     return redirect(url_for('index'))
 
-@app.route('/profile')
+@routes.route('/profile')
 @login_required
 def profile():
-    user = User.query.get(session['user_id'])
-    user_feedbacks = user.feedbacks.order_by(desc(Feedback.created_at)).all()
-    return render_template('profile.html', user=user, feedbacks=user_feedbacks)
+    user = current_user
+    cursor = request.args.get('after')
+    page = user_feedback_page(user.id, cursor, current_app.config['FEEDBACK_PER_PAGE'])
+    return render_template('profile.html',
+                         user=user,
+                         feedbacks=page.items,
+                         summary=user_review_summary(user.id),
+                         next_cursor=page.next_cursor,
+                         is_first_page=not cursor)
 
 
-@app.route('/')
+@routes.route('/')
+@cached(catalog_tags)
 def index():
     now_showing = Movie.query.filter_by(status='now_showing').limit(6).all()
     upcoming = Movie.query.filter_by(status='upcoming').limit(3).all()
+    trending = trending_movies(limit=3)
     
     total_movies = Movie.query.count()
-    total_feedbacks = Feedback.query.count()
-    avg_rating = db.session.query(func.avg(Feedback.rating)).scalar()
-    avg_rating = round(avg_rating, 1) if avg_rating else 0.0
+    totals = feedback_totals()
     
     return render_template('index.html', 
                          now_showing=now_showing,
                          upcoming=upcoming,
+                         trending=trending,
                          total_movies=total_movies,
-                         total_feedbacks=total_feedbacks,
-                         avg_rating=avg_rating)
+                         total_feedbacks=totals.total_feedbacks,
+                         avg_rating=totals.avg_rating)
 
-@app.route('/movies')
-def movies():
-    status_filter = request.args.get('status', 'all')
-    genre_filter = request.args.get('genre', 'all')
-    
-    query = Movie.query
+def catalog_page(status_filter='all', genre_filter='all', cursor=None, per_page=None):
+    """One keyset page of the catalog, newest release first"""
+    stmt = select(Movie).options(selectinload(Movie.stats))
     
     if status_filter != 'all':
-        query = query.filter_by(status=status_filter)
+        stmt = stmt.where(Movie.status == status_filter)
     
     if genre_filter != 'all':
-        query = query.filter(Movie.genre.contains(genre_filter))
+        stmt = stmt.where(Movie.id.in_(
+            select(MovieGenre.movie_id).where(MovieGenre.genre == genre_filter)
+        ))
     
-    movies_list = query.order_by(desc(Movie.release_date)).all()
+    return keyset_paginate(stmt, (Movie.release_date, Movie.id), cursor,
+                           per_page or current_app.config['MOVIES_PER_PAGE'])
+
+def genre_facets():
+    return db.session.execute(
+        select(MovieGenre.genre).distinct().order_by(MovieGenre.genre)
+    ).scalars().all()
+
+@routes.route('/movies')
+@cached(catalog_tags)
+def movies():
+    status_filter = request.args.get('status', 'all')
+    genre_filter = request.args.get('genre', 'all')
+    cursor = request.args.get('after')
     
-    all_genres = set()
-    for movie in Movie.query.all():
-        genres = movie.genre.split(', ')
-        all_genres.update(genres)
+    page = catalog_page(status_filter, genre_filter, cursor)
     
     return render_template('movies.html', 
-                         movies=movies_list,
+                         movies=page.items,
+                         next_cursor=page.next_cursor,
+                         is_first_page=not cursor,
                          status_filter=status_filter,
                          genre_filter=genre_filter,
-                         all_genres=sorted(all_genres))
+                         all_genres=genre_facets())
 
-@app.route('/movie/<int:movie_id>')
+@routes.route('/movie/<int:movie_id>')
+@cached(movie_tags)
 def movie_detail(movie_id):
     movie = Movie.query.get_or_404(movie_id)
-    recent_feedbacks = movie.feedbacks.order_by(desc(Feedback.created_at)).limit(10).all()
-    
-    sentiment_dist = {
-        'positive': movie.feedbacks.filter_by(sentiment='positive').count(),
-        'neutral': movie.feedbacks.filter_by(sentiment='neutral').count(),
-        'negative': movie.feedbacks.filter_by(sentiment='negative').count()
-    }
+    recent_feedbacks = movie_feedbacks(movie.id, limit=10)
+    sentiment_dist = movie.sentiment_distribution
     
     return render_template('movie.html',
                          movie=movie,
                          feedbacks=recent_feedbacks,
                          sentiment_dist=sentiment_dist)
 
-@app.route('/feedback/<int:movie_id>', methods=['GET', 'POST'])
+@routes.route('/feedback/<int:movie_id>', methods=['GET', 'POST'])
 @login_required
 def feedback(movie_id):
     movie = Movie.query.get_or_404(movie_id)
-    user = User.query.get(session['user_id'])
+    user = current_user
     
     if request.method == 'POST':
         try:
@@ -202,8 +356,20 @@ def feedback(movie_id):
                 flash('Please select a date you watched the movie.', 'error')
                 return redirect(url_for('feedback', movie_id=movie_id))
             
+            if rating not in range(1, 6) or not (review or '').strip():
+                flash('Please choose a rating between 1 and 5 and write a short review.', 'error')
+                return redirect(url_for('feedback', movie_id=movie_id))
+            
             watch_date = datetime.strptime(watch_date_str, '%Y-%m-%d').date()
             
+            queue = feedback_queue()
+            if queue is not None:
+                # Write-behind: the ingest writer inserts it with the next batch
+                queue.enqueue(submission_payload(movie_id, user, rating, review, watch_date,
+                                                          age_group, would_recommend))
+                flash('Thank you for your feedback! It will appear on the movie page shortly.', 'success')
+                return redirect(url_for('thankyou', movie_id=movie_id))
+            
             new_feedback = Feedback(
                 movie_id=movie_id,
                 user_id=user.id,
@@ -239,78 +405,64 @@ def feedback(movie_id):
     today = date.today().isoformat()
     return render_template('feedback.html', movie=movie, user=user, today=today)
 
-@app.route('/thankyou/<int:movie_id>')
+@routes.route('/thankyou/<int:movie_id>')
 def thankyou(movie_id):
     movie = Movie.query.get_or_404(movie_id)
     return render_template('thankyou.html', movie=movie)
 
-@app.route('/analytics')
+@routes.route('/analytics')
+@cached(catalog_tags)
 def analytics():
-    total_movies = Movie.query.count()
-    total_feedbacks = Feedback.query.count()
-    avg_rating = db.session.query(func.avg(Feedback.rating)).scalar()
-    avg_rating = round(avg_rating, 1) if avg_rating else 0.0
-    
-    top_movies = []
-    for movie in Movie.query.all():
-        if movie.total_feedbacks > 0:
-            top_movies.append({
-                'movie': movie,
-                'avg_rating': movie.average_rating,
-                'total_feedbacks': movie.total_feedbacks
-            })
-    top_movies.sort(key=lambda x: x['avg_rating'], reverse=True)
-    top_movies = top_movies[:5]
-    
-    sentiment_stats = {
-        'positive': Feedback.query.filter_by(sentiment='positive').count(),
-        'neutral': Feedback.query.filter_by(sentiment='neutral').count(),
-        'negative': Feedback.query.filter_by(sentiment='negative').count()
-    }
-    
-    age_groups = db.session.query(
-        Feedback.age_group, 
-        func.count(Feedback.id)
-    ).group_by(Feedback.age_group).all()
-    
-    age_distribution = {age: count for age, count in age_groups}
-    
-    recent_feedbacks = Feedback.query.order_by(desc(Feedback.created_at)).limit(10).all()
-    
-    rating_dist = {}
-    for i in range(1, 6):
-        rating_dist[i] = Feedback.query.filter_by(rating=i).count()
-    
-    return render_template('analytics.html',
-                         total_movies=total_movies,
-                         total_feedbacks=total_feedbacks,
-                         avg_rating=avg_rating,
-                         top_movies=top_movies,
-                         sentiment_stats=sentiment_stats,
-                         age_distribution=age_distribution,
-                         recent_feedbacks=recent_feedbacks,
-                         rating_dist=rating_dist)
-
-@app.route('/admin')
+    report = build_dashboard_report()
+    return render_template('analytics.html', **report.as_context())
+
+@routes.route('/admin')
 @admin_required
 def admin():
     movies_list = Movie.query.order_by(desc(Movie.created_at)).all()
     total_users = User.query.count()
     return render_template('admin.html', movies=movies_list, total_users=total_users)
 
-@app.route('/api/movies')
+@routes.route('/api/movies')
+@cached(catalog_tags)
 def api_movies():
-    movies_list = Movie.query.all()
-    return jsonify([{
+    per_page = min(request.args.get('limit', current_app.config['MOVIES_PER_PAGE'], type=int), 100)
+    page = catalog_page(request.args.get('status', 'all'),
+                        request.args.get('genre', 'all'),
+                        request.args.get('after'),
+                        max(per_page, 1))
+    response = jsonify([{
         'id': m.id,
         'title': m.title,
         'genre': m.genre,
         'status': m.status,
         'average_rating': m.average_rating,
         'total_feedbacks': m.total_feedbacks
-    } for m in movies_list])
+    } for m in page.items])
+    if page.has_next:
+        args = request.args.to_dict()
+        args['after'] = page.next_cursor
+        response.headers['X-Next-Cursor'] = page.next_cursor
+        response.headers['Link'] = f'<{url_for("api_movies", **args)}>; rel="next"'
+    return response
+
+@routes.route('/api/trending')
+@cached(catalog_tags)
+def api_trending():
+    """Top movies by time-decayed, rating-weighted feedback"""
+    limit = max(min(request.args.get('limit', 10, type=int), 50), 1)
+    return jsonify([{
+        'id': m.id,
+        'title': m.title,
+        'genre': m.genre,
+        'trend_score': round(m.stats.current_trend, 4),
+        'bayes_score': round(m.stats.bayes_score, 4),
+        'average_rating': m.average_rating,
+        'total_feedbacks': m.total_feedbacks
+    } for m in trending_movies(limit)])
 
-@app.route('/api/movie/<int:movie_id>/stats')
+@routes.route('/api/movie/<int:movie_id>/stats')
+@cached(movie_tags)
 def api_movie_stats(movie_id):
     movie = Movie.query.get_or_404(movie_id)
     
@@ -318,24 +470,157 @@ def api_movie_stats(movie_id):
         'average_rating': movie.average_rating,
         'total_feedbacks': movie.total_feedbacks,
         'rating_distribution': movie.rating_distribution,
-        'sentiment_distribution': {
-            'positive': movie.feedbacks.filter_by(sentiment='positive').count(),
-            'neutral': movie.feedbacks.filter_by(sentiment='neutral').count(),
-            'negative': movie.feedbacks.filter_by(sentiment='negative').count()
-        }
+        'sentiment_distribution': movie.sentiment_distribution
     })
 
-@app.template_filter('format_date')
+@routes.route('/api/feedback/export')
+@admin_required
+def export_feedback():
+    """Stream feedbacks as CSV or JSONL, filtered by movie_id, start, end and sentiment"""
+    try:
+        rows = feedback_export_rows(ExportFilter.from_args(request.args))
+        return export_response(rows, FEEDBACK_EXPORT_COLUMNS,
+                               request.args.get('format', 'csv'),
+                               request.args.get('gzip') in ('1', 'true'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+def write_feedback_batch(rows):
+    insert_feedback_rows(rows)
+    db.session.commit()
+
+@routes.route('/api/feedback/import', methods=['POST'])
+@admin_required
+def import_feedback_api():
+    """Bulk-load feedback from a JSONL or CSV request body; reports per-line errors"""
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'jsonl')
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'error': f'format must be one of {", ".join(IMPORT_FORMATS)}'}), 400
+    batch_size = min(request.args.get('batch_size', 500, type=int), 5000)
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    try:
+        report = import_feedback(read_records(stream, fmt), existing_movie_ids, write_feedback_batch,
+                                 max(batch_size, 1))
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'body must be UTF-8 text'}), 400
+    return jsonify(report.as_dict())
+
+@commands.command('upgrade-db')
+def upgrade_db_command():
+    """Create missing tables, columns and indexes on an existing database."""
+    changes = upgrade_schema()
+    for change in changes:
+        click.echo(f'Added {change}')
+    click.echo('Schema is up to date' if not changes else f'Applied {len(changes)} changes')
+
+@commands.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the materialized movie statistics from feedbacks."""
+    rebuilt = rebuild_movie_stats()
+    db.session.commit()
+    click.echo(f'Rebuilt statistics for {rebuilt} movies')
+
+@commands.command('rebuild-genres')
+def rebuild_genres_command():
+    """Repopulate the movie_genres index table from Movie.genre."""
+    rebuilt = rebuild_movie_genres()
+    db.session.commit()
+    click.echo(f'Indexed {rebuilt} movie genres')
+
+@commands.command('rescore-sentiment')
+@click.option('--chunk-size', default=5000, show_default=True, help='Feedbacks scored per transaction.')
+def rescore_sentiment_command(chunk_size):
+    """Re-score every review with the sentiment engine and refresh the aggregates."""
+    updated = rescore_sentiment(chunk_size)
+    if updated:
+        rebuild_movie_stats()
+        db.session.commit()
+        rebuild_rollups()
+    click.echo(f'Updated sentiment of {updated} feedbacks')
+
+@commands.command('reprocess')
+@click.argument('processor', type=click.Choice(sorted(PROCESSORS)))
+@click.option('--workers', type=int, default=None, help='Worker processes (default: one per core).')
+@click.option('--chunk-size', default=20000, show_default=True, help='Feedback ids per work unit.')
+@click.option('--restart', is_flag=True, help='Ignore the progress of an interrupted run.')
+def reprocess_command(processor, workers, chunk_size, restart):
+    """Recompute a derived feedback field in parallel, resuming where a previous run stopped."""
+    def progress(scanned, updated, watermark, max_id):
+        click.echo(f'  {scanned} scanned, {updated} updated, done through id {watermark}/{max_id}')
+    
+    scanned, updated = reprocess(db.engine, processor, workers, chunk_size,
+                                 restart=restart, progress=progress)
+    if updated and PROCESSORS[processor].affects_stats:
+        rebuild_movie_stats()
+        db.session.commit()
+        rebuild_rollups()
+    click.echo(f'Reprocessed {scanned} feedbacks, updated {updated}')
+
+@commands.command('export-feedback')
+@click.option('--format', 'fmt', type=click.Choice(sorted(EXPORT_FORMATS)), default='csv', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--movie-id', type=int, help='Only this movie.')
+@click.option('--start', help='First day to include (YYYY-MM-DD).')
+@click.option('--end', help='Last day to include (YYYY-MM-DD).')
+@click.option('--sentiment', type=click.Choice(['positive', 'neutral', 'negative']))
+@click.option('--output', type=click.File('wb'), default='-', help='Output file (default: stdout).')
+def export_feedback_command(fmt, compress, movie_id, start, end, sentiment, output):
+    """Stream feedbacks to a CSV or JSONL file."""
+    try:
+        filters = ExportFilter.from_args({'movie_id': movie_id, 'start': start, 'end': end,
+                                          'sentiment': sentiment})
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    for chunk in encode_export(feedback_export_rows(filters), FEEDBACK_EXPORT_COLUMNS, fmt, compress):
+        output.write(chunk)
+
+@commands.command('import-feedback')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), help='Default: from the file extension.')
+@click.option('--batch-size', default=500, show_default=True, help='Rows validated and inserted together.')
+def import_feedback_command(source, fmt, batch_size):
+    """Bulk-load feedback from a JSONL or CSV file ('-' for stdin)."""
+    fmt = fmt or ('csv' if source.name.endswith('.csv') else 'jsonl')
+    report = import_feedback(read_records(source, fmt), existing_movie_ids, write_feedback_batch, batch_size)
+    for line, message in report.errors:
+        click.echo(f'line {line}: {message}', err=True)
+    click.echo(f'Imported {report.imported} feedbacks, {report.error_count} rows rejected')
+
+@commands.command('drain-feedback')
+def drain_feedback_command():
+    """Write every queued feedback submission to the database."""
+    queue = feedback_queue()
+    if queue is None:
+        raise click.ClickException('FEEDBACK_INGEST_MODE is not set to queue')
+    click.echo(f'Drained {drain(queue)} queued feedbacks')
+
+@commands.command('rollup-analytics')
+@click.option('--rebuild', is_flag=True,
+              help='Discard the daily rollups and fold every feedback again (after edits or deletions).')
+def rollup_analytics_command(rebuild):
+    """Fold new feedbacks into the daily analytics rollups."""
+    folded = rebuild_rollups() if rebuild else run_rollup()
+    click.echo(f'Folded {folded} feedbacks into daily rollups')
+
+@routes.template_filter('format_date')
 def format_date(value):
     if isinstance(value, str):
         value = datetime.strptime(value, '%Y-%m-%d').date()
     return value.strftime('%B %d, %Y')
 
-@app.template_filter('format_duration')
+@routes.template_filter('format_duration')
 def format_duration(minutes):
     hours = minutes // 60
     mins = minutes % 60
     return f"{hours}h {mins}m"
 
+app = create_app()
+cache = app.extensions['response_cache']
+instrumentation = app.extensions.get('instrumentation')
+
 if __name__ == '__main__':
+    # The development server brings the schema up to date; deployments run `flask upgrade-db`
+    with app.app_context():
+        upgrade_schema()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
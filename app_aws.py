@@ -1,10 +1,19 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session
+from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session, abort
 from functools import wraps
-import boto3
-from boto3.dynamodb.conditions import Key
+import click
+# boto3 and botocore.config are imported on first AWS use: they dominate
+# import time and routes that never reach AWS should not pay for them
 from botocore.exceptions import ClientError
 from datetime import datetime
 from decimal import Decimal
+from notifications import NotificationDispatcher
+from sentiment import classify
+from export import ExportFilter, export_response
+from importer import IMPORT_FORMATS, import_feedback, read_records
+from instrumentation import RequestInstrumentation
+from passwords import hasher, HasherBusy
+import io
+import threading
 import uuid
 import os
 
@@ -18,12 +27,56 @@ AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 DDB_USERS_TABLE = "Cinemapulse_Users"
 DDB_MOVIES_TABLE = "Cinemapulse_Movies"
 DDB_FEEDBACK_TABLE = "Cinemapulse_Feedback"
+# GSI on the feedback table: movie_id (HASH) + created_at (RANGE)
+DDB_FEEDBACK_MOVIE_INDEX = os.getenv("DDB_FEEDBACK_MOVIE_INDEX", "movie_id-created_at-index")
+MOVIE_REVIEWS_LIMIT = 10
+# Aggregate counter items: "GLOBAL" and "MOVIE#<movie_id>", keyed by stat_id
+DDB_STATS_TABLE = os.getenv("DDB_STATS_TABLE", "Cinemapulse_Stats")
+GLOBAL_STATS_ID = "GLOBAL"
+# The global item also ranks the best rated movies; /analytics shows the first
+# TOP_MOVIES_SHOWN, the rest stand in when a listed movie's average drops
+TOP_MOVIES_SHOWN = 5
+TOP_MOVIES_KEPT = int(os.getenv("TOP_MOVIES_KEPT", "25"))
+# put_feedback retries when a concurrent write moved the counters it ranked from
+PUT_FEEDBACK_ATTEMPTS = 5
+
+SENTIMENTS = ("positive", "neutral", "negative")
+AGE_GROUPS = ("18-25", "26-35", "36-45", "46+")
 
 SNS_TOPIC_ARN = os.getenv(
     "SNS_TOPIC_ARN",
     "arn:aws:sns:us-east-1:253490788465:Cinemapulse_topic"
 )
 
+# Connection pool, keep-alive and retry policy shared by every AWS client
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_TCP_KEEPALIVE = os.getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "3"))
+AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "standard")
+AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", "5"))
+AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", "10"))
+
+# Request instrumentation (/metrics endpoint and slow-request log)
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "false").lower() == "true"
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "500"))
+
+# Background SNS dispatcher
+SNS_QUEUE_SIZE = int(os.getenv("SNS_QUEUE_SIZE", "1000"))
+SNS_WORKERS = int(os.getenv("SNS_WORKERS", "1"))
+SNS_BATCH_LINGER_MS = int(os.getenv("SNS_BATCH_LINGER_MS", "50"))
+SNS_OVERFLOW_POLICY = os.getenv("SNS_OVERFLOW_POLICY", "drop_newest")
+
+# Password hashing, shared with app.py; users stored with plaintext or older
+# parameters are upgraded on their next login
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:600000")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or None
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "0")) or None
+hasher.configure(PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+instrumentation = None
+if INSTRUMENTATION_ENABLED:
+    instrumentation = RequestInstrumentation(slow_request_ms=SLOW_REQUEST_MS).init_app(app)
+
 # ===================== JINJA FILTERS  =====================
 
 @app.template_filter("format_date")
@@ -47,30 +100,512 @@ def format_duration(minutes):
 
 # ===================== AWS HELPERS =====================
 
+# Low-level clients are thread-safe and shared by the whole worker process.
+# boto3 resources are not, so DynamoDB resources and Table handles are
+# cached per thread instead.
+_aws_lock = threading.Lock()
+_aws_session = None
+_aws_clients = {}
+_aws_local = threading.local()
+
+def aws_config():
+    from botocore.config import Config as BotoConfig
+    return BotoConfig(
+        region_name=AWS_REGION,
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=AWS_TCP_KEEPALIVE,
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=AWS_READ_TIMEOUT,
+        retries={"max_attempts": AWS_MAX_ATTEMPTS, "mode": AWS_RETRY_MODE},
+    )
+
+def get_aws_session():
+    global _aws_session
+    if _aws_session is None:
+        with _aws_lock:
+            if _aws_session is None:
+                import boto3
+                _aws_session = boto3.session.Session(region_name=AWS_REGION)
+    return _aws_session
+
+def get_client(service):
+    client = _aws_clients.get(service)
+    if client is None:
+        session = get_aws_session()
+        with _aws_lock:
+            client = _aws_clients.get(service)
+            if client is None:
+                client = session.client(service, config=aws_config())
+                if instrumentation:
+                    instrumentation.instrument_boto_client(client)
+                _aws_clients[service] = client
+    return client
+
+def reset_aws_clients():
+    """Drop every cached session, client and table handle (after fork, or between tests)"""
+    global _aws_session, _aws_local
+    with _aws_lock:
+        _aws_session = None
+        _aws_clients.clear()
+        _aws_local = threading.local()
+
+if hasattr(os, "register_at_fork"):
+    # Connection pools must not be shared with a forked child
+    os.register_at_fork(after_in_child=reset_aws_clients)
+
 def get_dynamodb():
-    return boto3.resource("dynamodb", region_name=AWS_REGION)
+    resource = getattr(_aws_local, "dynamodb", None)
+    if resource is None:
+        session = get_aws_session()
+        with _aws_lock:
+            resource = session.resource("dynamodb", config=aws_config())
+        if instrumentation:
+            instrumentation.instrument_boto_client(resource.meta.client)
+        _aws_local.dynamodb = resource
+        _aws_local.tables = {}
+    return resource
+
+def get_table(name):
+    dynamodb = get_dynamodb()
+    table = _aws_local.tables.get(name)
+    if table is None:
+        table = _aws_local.tables[name] = dynamodb.Table(name)
+    return table
 
 def get_users_table():
-    return get_dynamodb().Table(DDB_USERS_TABLE)
+    return get_table(DDB_USERS_TABLE)
 
 def get_movies_table():
-    return get_dynamodb().Table(DDB_MOVIES_TABLE)
+    return get_table(DDB_MOVIES_TABLE)
 
 def get_feedback_table():
-    return get_dynamodb().Table(DDB_FEEDBACK_TABLE)
+    return get_table(DDB_FEEDBACK_TABLE)
+
+def get_stats_table():
+    return get_table(DDB_STATS_TABLE)
 
 def get_sns():
-    return boto3.client("sns", region_name=AWS_REGION)
+    return get_client("sns")
+
+def query_movie_feedback(movie_id, limit=None, start_key=None, newest_first=True):
+    """One page of a movie's feedback from the movie_id/created_at index.
+    
+    Returns the items and the LastEvaluatedKey to resume from, or None
+    once the movie's partition is exhausted.
+    """
+    from boto3.dynamodb.conditions import Key
+    kwargs = {
+        "IndexName": DDB_FEEDBACK_MOVIE_INDEX,
+        "KeyConditionExpression": Key("movie_id").eq(movie_id),
+        "ScanIndexForward": not newest_first,
+    }
+    if limit:
+        kwargs["Limit"] = limit
+    if start_key:
+        kwargs["ExclusiveStartKey"] = start_key
+    response = get_feedback_table().query(**kwargs)
+    return response.get("Items", []), response.get("LastEvaluatedKey")
+
+def iter_movie_feedback(movie_id, page_size=100, newest_first=True):
+    """Yield every feedback of a movie, following LastEvaluatedKey page by page"""
+    start_key = None
+    while True:
+        items, start_key = query_movie_feedback(movie_id, page_size, start_key, newest_first)
+        yield from items
+        if not start_key:
+            return
+
+def newest_movie_feedback(movie_id, count=MOVIE_REVIEWS_LIMIT):
+    """The ``count`` newest reviews of a movie, reading no more than the page shows"""
+    items, start_key = [], None
+    while len(items) < count:
+        page, start_key = query_movie_feedback(movie_id, count - len(items), start_key)
+        items.extend(page)
+        if not start_key:
+            break
+    return items
+
+FEEDBACK_EXPORT_COLUMNS = ("feedback_id", "movie_id", "username", "rating", "review", "sentiment",
+                           "sentiment_score", "age_group", "would_recommend", "created_at")
+
+def iter_feedback_export(filters, page_size=500):
+    """Feedback items matching an ExportFilter, streamed one index page at a time.
+    
+    Each movie's partition of the movie_id/created_at index is queried with
+    the date range as a key condition; without a movie filter the (small)
+    movies table supplies the partitions, so the feedback table is never scanned.
+    """
+    from boto3.dynamodb.conditions import Key, Attr
+    if filters.movie_id:
+        movie_ids = [filters.movie_id]
+    else:
+        movie_ids = [m["movie_id"] for m in scan_all(get_movies_table(), ProjectionExpression="movie_id")]
+    kwargs = {"IndexName": DDB_FEEDBACK_MOVIE_INDEX, "Limit": page_size}
+    if filters.sentiment:
+        kwargs["FilterExpression"] = Attr("sentiment").eq(filters.sentiment)
+    for movie_id in movie_ids:
+        # created_at is an ISO timestamp, so plain dates bound it lexicographically
+        key = Key("movie_id").eq(movie_id)
+        if filters.start and filters.end:
+            key &= Key("created_at").between(filters.start.isoformat(), filters.end_before.date().isoformat())
+        elif filters.start:
+            key &= Key("created_at").gte(filters.start.isoformat())
+        elif filters.end:
+            key &= Key("created_at").lt(filters.end_before.date().isoformat())
+        start_key = None
+        while True:
+            if start_key:
+                kwargs["ExclusiveStartKey"] = start_key
+            response = get_feedback_table().query(KeyConditionExpression=key, **kwargs)
+            yield from response.get("Items", [])
+            start_key = response.get("LastEvaluatedKey")
+            if not start_key:
+                kwargs.pop("ExclusiveStartKey", None)
+                break
+
+def create_tables(dynamodb=None):
+    """Provision the tables app_aws expects (for local setups, tests and benchmarks)"""
+    dynamodb = dynamodb or get_dynamodb()
+    definitions = {
+        DDB_USERS_TABLE: ("username", []),
+        DDB_MOVIES_TABLE: ("movie_id", []),
+        DDB_STATS_TABLE: ("stat_id", []),
+        DDB_FEEDBACK_TABLE: ("feedback_id", [(DDB_FEEDBACK_MOVIE_INDEX, "movie_id", "created_at")]),
+    }
+    tables = []
+    for name, (hash_key, indexes) in definitions.items():
+        attributes = {hash_key}
+        kwargs = {}
+        if indexes:
+            kwargs["GlobalSecondaryIndexes"] = []
+            for index_name, index_hash, index_range in indexes:
+                attributes.update((index_hash, index_range))
+                kwargs["GlobalSecondaryIndexes"].append({
+                    "IndexName": index_name,
+                    "KeySchema": [
+                        {"AttributeName": index_hash, "KeyType": "HASH"},
+                        {"AttributeName": index_range, "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                })
+        tables.append(dynamodb.create_table(
+            TableName=name,
+            KeySchema=[{"AttributeName": hash_key, "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in sorted(attributes)],
+            BillingMode="PAY_PER_REQUEST",
+            **kwargs
+        ))
+    for table in tables:
+        table.wait_until_exists()
+    return tables
+
+# ===================== AGGREGATE COUNTERS =====================
+
+def movie_stats_id(movie_id):
+    return f"MOVIE#{movie_id}"
+
+def feedback_stats_delta(rating, sentiment, age_group=None, would_recommend=False):
+    """Counter increments contributed by one feedback item"""
+    delta = {"feedback_count": 1, "rating_sum": int(rating)}
+    if 1 <= int(rating) <= 5:
+        delta[f"rating_{int(rating)}"] = 1
+    if sentiment in SENTIMENTS:
+        delta[f"{sentiment}_count"] = 1
+    if age_group in AGE_GROUPS:
+        delta[f"age_{age_group}"] = 1
+    if would_recommend:
+        delta["recommend_count"] = 1
+    return delta
+
+def stats_update(stat_id, delta, **assignments):
+    """UpdateItem arguments adding ``delta`` to a counter item with a single ADD.
+
+    Keyword ``assignments`` that are not None (``movie_id``, ``top_movies``)
+    are SET by the same expression.
+    """
+    names, values, terms = {}, {}, []
+    for i, (attribute, amount) in enumerate(sorted(delta.items())):
+        names[f"#a{i}"] = attribute
+        values[f":v{i}"] = Decimal(amount)
+        terms.append(f"#a{i} :v{i}")
+    expression = "ADD " + ", ".join(terms)
+    sets = []
+    for i, (attribute, value) in enumerate(sorted(assignments.items())):
+        if value is not None:
+            names[f"#s{i}"] = attribute
+            values[f":s{i}"] = value
+            sets.append(f"#s{i} = :s{i}")
+    if sets:
+        expression += " SET " + ", ".join(sets)
+    return {
+        "Key": {"stat_id": stat_id},
+        "UpdateExpression": expression,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+
+def add_stats(stat_id, delta, movie_id=None):
+    """Atomically add ``delta`` to a counter item"""
+    get_stats_table().update_item(**stats_update(stat_id, delta, movie_id=movie_id))
+
+def top_movie_entry(movie_id, counters):
+    return {"movie_id": movie_id, "rating_sum": Decimal(int(counters.get("rating_sum", 0))),
+            "feedback_count": Decimal(int(counters.get("feedback_count", 0)))}
+
+def rank_top_movies(entries):
+    """Entries best average first (more feedback breaks ties), at most TOP_MOVIES_KEPT"""
+    rated = [entry for entry in entries if entry["feedback_count"] > 0]
+    rated.sort(key=lambda e: (e["rating_sum"] / e["feedback_count"], e["feedback_count"]), reverse=True)
+    return rated[:TOP_MOVIES_KEPT]
+
+def merge_top_movie(top, entry):
+    """``top`` with ``entry`` ranked in, or None when the list would not change"""
+    others = [e for e in top if e["movie_id"] != entry["movie_id"]]
+    merged = rank_top_movies(others + [entry])
+    if len(others) == len(top) and entry not in merged:
+        return None
+    return merged
+
+def put_feedback(item, delta):
+    """Store one feedback item with its movie and global counter updates in one transaction.
+
+    When the movie's new average changes the global ``top_movies`` list, the
+    new list is written by the same transaction, conditioned on the movie's
+    feedback_count and the list's version being what it was ranked from; a
+    concurrent write makes it retry. Returns False, writing nothing, when
+    the movie does not exist.
+    """
+    from boto3.dynamodb.types import TypeSerializer
+    serialize = TypeSerializer().serialize
+
+    def typed(values):
+        return {name: serialize(value) for name, value in values.items()}
+
+    movie_id = item["movie_id"]
+    movie_stat_id = movie_stats_id(movie_id)
+    for attempt in range(PUT_FEEDBACK_ATTEMPTS):
+        current = batch_get_items(DDB_STATS_TABLE, "stat_id", [movie_stat_id, GLOBAL_STATS_ID],
+                                  ConsistentRead=True)
+        movie_counters = current.get(movie_stat_id, {})
+        totals = current.get(GLOBAL_STATS_ID, {})
+        seen_count = movie_counters.get("feedback_count", Decimal(0))
+        updated = {name: movie_counters.get(name, 0) + delta.get(name, 0) for name in ("rating_sum", "feedback_count")}
+        top = merge_top_movie(totals.get("top_movies", []), top_movie_entry(movie_id, updated))
+
+        movie_update = stats_update(movie_stat_id, delta, movie_id=movie_id)
+        global_update = stats_update(GLOBAL_STATS_ID, dict(delta, top_version=1) if top is not None else delta,
+                                     top_movies=top)
+        if top is not None:
+            if seen_count:
+                movie_update["ConditionExpression"] = "feedback_count = :seen"
+                movie_update["ExpressionAttributeValues"][":seen"] = seen_count
+            else:
+                movie_update["ConditionExpression"] = "attribute_not_exists(feedback_count)"
+            global_update["ExpressionAttributeNames"]["#version"] = "top_version"
+            if "top_version" in totals:
+                global_update["ConditionExpression"] = "#version = :version"
+                global_update["ExpressionAttributeValues"][":version"] = totals["top_version"]
+            else:
+                global_update["ConditionExpression"] = "attribute_not_exists(#version)"
+
+        actions = [
+            {"ConditionCheck": {"TableName": DDB_MOVIES_TABLE, "Key": typed({"movie_id": movie_id}),
+                                "ConditionExpression": "attribute_exists(movie_id)"}},
+            {"Put": {"TableName": DDB_FEEDBACK_TABLE, "Item": typed(item),
+                     "ConditionExpression": "attribute_not_exists(feedback_id)"}},
+        ]
+        for update in (movie_update, global_update):
+            update["Key"] = typed(update["Key"])
+            update["ExpressionAttributeValues"] = typed(update["ExpressionAttributeValues"])
+            actions.append({"Update": {"TableName": DDB_STATS_TABLE, **update}})
+        try:
+            get_client("dynamodb").transact_write_items(TransactItems=actions)
+            return True
+        except ClientError as e:
+            reasons = [reason.get("Code") for reason in e.response.get("CancellationReasons") or [{}]]
+            if reasons[0] == "ConditionalCheckFailed":
+                return False
+            # Another write moved the counters this ranking was computed from
+            if attempt + 1 == PUT_FEEDBACK_ATTEMPTS or not (
+                    {"ConditionalCheckFailed", "TransactionConflict"} & set(reasons)):
+                raise
+
+def rebuild_stats():
+    """Recompute every counter item from the feedback table; returns the feedback count.
+
+    Counters are only ever incremented, so this backfills feedback written
+    before they existed and repairs drift: bulk imports add counters after
+    their batch_writer puts, not in one transaction, and leave the
+    ``top_movies`` ranking alone. It also counts the catalog into the global
+    item's ``total_movies``, so run it after loading movies. Feedback written
+    while the scan runs may be missed, so run it when traffic is quiet.
+    """
+    totals = {GLOBAL_STATS_ID: {}}
+    kwargs = {
+        "ProjectionExpression": "#m, #r, #s, #a, #w",
+        "ExpressionAttributeNames": {"#m": "movie_id", "#r": "rating", "#s": "sentiment",
+                                     "#a": "age_group", "#w": "would_recommend"},
+    }
+    count = 0
+    while True:
+        response = get_feedback_table().scan(**kwargs)
+        for item in response.get("Items", []):
+            delta = feedback_stats_delta(item.get("rating", 0), item.get("sentiment"),
+                                         item.get("age_group"), item.get("would_recommend"))
+            for stat_id in (movie_stats_id(item["movie_id"]), GLOBAL_STATS_ID):
+                counters = totals.setdefault(stat_id, {})
+                for counter, amount in delta.items():
+                    counters[counter] = counters.get(counter, 0) + amount
+            count += 1
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    movie_ids = [m["movie_id"] for m in scan_all(get_movies_table(), ProjectionExpression="movie_id")]
+    totals[GLOBAL_STATS_ID].update(catalog_stats(movie_ids, totals))
+
+    stale = {item["stat_id"] for item in scan_all(get_stats_table(), ProjectionExpression="stat_id")}
+    with get_stats_table().batch_writer() as batch:
+        for stat_id, counters in totals.items():
+            item = {"stat_id": stat_id, **{name: amount if isinstance(amount, list) else Decimal(amount)
+                                           for name, amount in counters.items()}}
+            if stat_id != GLOBAL_STATS_ID:
+                item["movie_id"] = stat_id[len(movie_stats_id("")):]
+            batch.put_item(Item=item)
+            stale.discard(stat_id)
+        for stat_id in stale:
+            batch.delete_item(Key={"stat_id": stat_id})
+    return count
+
+def catalog_stats(movie_ids, counters):
+    """Global item fields about the catalog, from every movie id and the counters by stat_id"""
+    return {
+        "total_movies": len(movie_ids),
+        "top_movies": rank_top_movies(
+            [top_movie_entry(movie_id, counters.get(movie_stats_id(movie_id), {})) for movie_id in movie_ids]),
+        "top_version": 0,
+    }
+
+def summarize_stats(item):
+    """Plain numbers out of a counter item (missing counters are zero)"""
+    item = item or {}
+    count = int(item.get("feedback_count", 0))
+    rating_sum = int(item.get("rating_sum", 0))
+    return {
+        "total_feedbacks": count,
+        "average_rating": round(rating_sum / count, 1) if count else 0.0,
+        "rating_distribution": {i: int(item.get(f"rating_{i}", 0)) for i in range(1, 6)},
+        "sentiment_distribution": {s: int(item.get(f"{s}_count", 0)) for s in SENTIMENTS},
+        "age_distribution": {a: int(item.get(f"age_{a}", 0)) for a in AGE_GROUPS},
+        "recommend_count": int(item.get("recommend_count", 0)),
+    }
+
+def get_stats(stat_id):
+    return summarize_stats(get_stats_table().get_item(Key={"stat_id": stat_id}).get("Item"))
+
+def batch_get_items(table_name, key, ids, **kwargs):
+    """Items by key via BatchGetItem (100 keys per call, retrying unprocessed keys)"""
+    found = {}
+    ids = list(dict.fromkeys(ids))
+    for start in range(0, len(ids), 100):
+        request = {table_name: {"Keys": [{key: value} for value in ids[start:start + 100]], **kwargs}}
+        while request:
+            response = get_dynamodb().batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(table_name, []):
+                found[item[key]] = item
+            request = response.get("UnprocessedKeys") or None
+    return found
+
+def batch_get_stats(stat_ids):
+    """Counter items by stat_id"""
+    return batch_get_items(DDB_STATS_TABLE, "stat_id", stat_ids)
+
+def existing_movie_ids(movie_ids):
+    """The subset of ``movie_ids`` present in the movies table"""
+    return set(batch_get_items(DDB_MOVIES_TABLE, "movie_id", movie_ids, ProjectionExpression="movie_id"))
+
+def write_feedback_batch(rows):
+    """Store scored feedback rows with batch_writer, then add each movie's counters once"""
+    deltas = {}
+    with get_feedback_table().batch_writer() as batch:
+        for row in rows:
+            item = {
+                "feedback_id": str(uuid.uuid4()),
+                "movie_id": row["movie_id"],
+                "username": row["customer_name"],
+                "rating": Decimal(row["rating"]),
+                "review": row["review"],
+                "sentiment": row["sentiment"],
+                "would_recommend": row["would_recommend"],
+                "watch_date": row["watch_date"].isoformat(),
+                "created_at": row["created_at"].isoformat(),
+            }
+            if row["sentiment_score"] is not None:
+                item["sentiment_score"] = Decimal(str(row["sentiment_score"]))
+            if row["age_group"]:
+                item["age_group"] = row["age_group"]
+            batch.put_item(Item=item)
+            delta = feedback_stats_delta(row["rating"], row["sentiment"], row["age_group"], row["would_recommend"])
+            for target in (row["movie_id"], None):
+                totals = deltas.setdefault(target, {})
+                for counter, amount in delta.items():
+                    totals[counter] = totals.get(counter, 0) + amount
+    for movie_id, delta in deltas.items():
+        if movie_id is None:
+            add_stats(GLOBAL_STATS_ID, delta)
+        else:
+            add_stats(movie_stats_id(movie_id), delta, movie_id=movie_id)
+
+def feedback_for_template(item):
+    """Shape a feedback item like the SQL model the shared templates expect"""
+    item = dict(item)
+    item["rating"] = int(item.get("rating", 0))
+    item.setdefault("customer_name", item.get("username", ""))
+    if isinstance(item.get("created_at"), str):
+        item["created_at"] = datetime.fromisoformat(item["created_at"])
+    return item
+
+def scan_all(table, **kwargs):
+    """Every item of a (small) table, following LastEvaluatedKey"""
+    items = []
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def publish_sns_batch(notifications):
+    """Publish up to 10 (subject, message) pairs with one PublishBatch call; returns the failure count"""
+    response = get_sns().publish_batch(
+        TopicArn=SNS_TOPIC_ARN,
+        PublishBatchRequestEntries=[
+            {"Id": str(i), "Subject": subject, "Message": message}
+            for i, (subject, message) in enumerate(notifications)
+        ]
+    )
+    for failure in response.get("Failed", []):
+        print(f"SNS ERROR (ignored): {failure.get('Code')} {failure.get('Message')}")
+    return len(response.get("Failed", []))
+
+sns_dispatcher = NotificationDispatcher(
+    publish_sns_batch,
+    max_queue_size=SNS_QUEUE_SIZE,
+    workers=SNS_WORKERS,
+    linger=SNS_BATCH_LINGER_MS / 1000,
+    overflow=SNS_OVERFLOW_POLICY,
+).register_shutdown()
+
+if instrumentation:
+    instrumentation.register_gauge("sns_queue_depth", "Notifications waiting to be published.",
+                                   lambda: sns_dispatcher.metrics()["queue_depth"])
+    instrumentation.register_gauge("sns_dropped_total", "Notifications dropped because the queue was full.",
+                                   lambda: sns_dispatcher.metrics()["dropped"])
 
 def send_sns_notification(subject, message):
-    try:
-        get_sns().publish(
-            TopicArn=SNS_TOPIC_ARN,
-            Subject=subject,
-            Message=message
-        )
-    except Exception as e:
-        print(f"SNS ERROR (ignored): {e}")
+    """Queue a notification; the request never waits on SNS"""
+    if not sns_dispatcher.submit(subject, message):
+        print(f"SNS QUEUE FULL (dropped): {subject}")
 
 # ===================== AUTH DECORATORS =====================
 
@@ -111,7 +646,7 @@ def signup():
             get_users_table().put_item(Item={
                 "username": username,
                 "email": email,
-                "password": password,
+                "password_hash": hasher.hash(password),
                 "is_admin": False,
                 "created_at": datetime.utcnow().isoformat()
             })
@@ -120,6 +655,9 @@ def signup():
             flash("Signup successful", "success")
             return redirect(url_for("login"))
 
+        except HasherBusy:
+            flash("Too many sign-ups right now, please try again", "error")
+            return render_template("signup.html"), 503
         except ClientError as e:
             print(e)
             flash("Signup failed", "error")
@@ -133,12 +671,26 @@ def login():
         password = request.form["password"].strip()
 
         try:
-            user = get_users_table().get_item(Key={"username": username}).get("Item")
-            if user and user["password"] == password:
+            user = get_users_table().get_item(Key={"username": username}).get("Item") or {}
+            # Accounts created before hashing still hold the plaintext "password" attribute
+            plaintext = "password_hash" not in user
+            stored = user.get("password") if plaintext else user["password_hash"]
+            valid, new_hash = hasher.verify_and_update(stored, password, plaintext=plaintext)
+            if valid:
+                if new_hash:
+                    get_users_table().update_item(
+                        Key={"username": username},
+                        UpdateExpression="SET password_hash = :h REMOVE #pw",
+                        ExpressionAttributeNames={"#pw": "password"},
+                        ExpressionAttributeValues={":h": new_hash},
+                    )
                 session["username"] = username
                 session["is_admin"] = user.get("is_admin", False)
                 flash("Login successful", "success")
                 return redirect(url_for("index"))
+        except HasherBusy:
+            flash("Too many sign-ins right now, please try again", "error")
+            return render_template("login.html"), 503
         except ClientError as e:
             print(e)
 
@@ -157,59 +709,79 @@ def logout():
 def index():
     try:
         movies = get_movies_table().scan().get("Items", [])
+        totals = get_stats(GLOBAL_STATS_ID)
     except ClientError:
-        movies = []
+        movies, totals = [], summarize_stats(None)
 
     return render_template(
         "index.html",
         movies=movies,
         total_movies=len(movies),
-        total_feedbacks=0,
-        avg_rating=0.0
+        total_feedbacks=totals["total_feedbacks"],
+        avg_rating=totals["average_rating"]
     )
 
 @app.route("/movies")
 def movies():
     try:
         movies = get_movies_table().scan().get("Items", [])
+        movie_stats = batch_get_stats(movie_stats_id(m["movie_id"]) for m in movies)
     except ClientError:
-        movies = []
-    return render_template("movies.html", movies=movies)
+        movies, movie_stats = [], {}
+    movies = [
+        dict(m, id=m["movie_id"], **summarize_stats(movie_stats.get(movie_stats_id(m["movie_id"]))))
+        for m in movies
+    ]
+    # The whole catalog is one scan, so there is never a next page
+    return render_template("movies.html", movies=movies, is_first_page=True, next_cursor=None)
 
 @app.route("/movie/<movie_id>")
 def movie_detail(movie_id):
     movie = get_movies_table().get_item(Key={"movie_id": movie_id}).get("Item")
 
     try:
-        feedbacks = get_feedback_table().scan().get("Items", [])
+        movie_feedbacks = newest_movie_feedback(movie_id)
+        stats = get_stats(movie_stats_id(movie_id))
     except ClientError:
-        feedbacks = []
+        movie_feedbacks, stats = [], summarize_stats(None)
 
-    movie_feedbacks = [f for f in feedbacks if f.get("movie_id") == movie_id]
+    if movie:
+        movie = dict(movie, id=movie_id, **stats)
+    movie_feedbacks = [feedback_for_template(item) for item in movie_feedbacks]
 
-    return render_template("movie.html", movie=movie, feedbacks=movie_feedbacks)
+    return render_template("movie.html", movie=movie, feedbacks=movie_feedbacks,
+                           sentiment_dist=stats["sentiment_distribution"])
 
 # ===================== ANALYTICS =====================
 
 @app.route("/analytics")
 def analytics():
-    age_distribution = {"18-25": 0, "26-35": 0, "36-45": 0, "46+": 0}
-
     try:
-        feedbacks = get_feedback_table().scan().get("Items", [])
-        movies = get_movies_table().scan().get("Items", [])
+        item = get_stats_table().get_item(Key={"stat_id": GLOBAL_STATS_ID}).get("Item") or {}
+        ranked = item.get("top_movies", [])[:TOP_MOVIES_SHOWN]
+        movies = batch_get_items(DDB_MOVIES_TABLE, "movie_id", [entry["movie_id"] for entry in ranked])
     except ClientError:
-        feedbacks, movies = [], []
+        item, ranked, movies = {}, [], {}
+    totals = summarize_stats(item)
+
+    top_movies = [
+        {
+            "movie": dict(movies[entry["movie_id"]], id=entry["movie_id"]),
+            "avg_rating": round(entry["rating_sum"] / entry["feedback_count"], 1),
+            "total_feedbacks": int(entry["feedback_count"]),
+        }
+        for entry in ranked if entry["movie_id"] in movies
+    ]
 
     return render_template(
         "analytics.html",
-        total_feedbacks=len(feedbacks),
-        total_movies=len(movies),
-        avg_rating=0.0,
-        sentiment_stats={"positive": 0, "neutral": 0, "negative": 0},
-        rating_dist={},
-        age_distribution=age_distribution,
-        top_movies=[],
+        total_feedbacks=totals["total_feedbacks"],
+        total_movies=int(item.get("total_movies", 0)),
+        avg_rating=totals["average_rating"],
+        sentiment_stats=totals["sentiment_distribution"],
+        rating_dist=totals["rating_distribution"],
+        age_distribution=totals["age_distribution"],
+        top_movies=top_movies,
         recent_feedbacks=[]
     )
 
@@ -218,21 +790,47 @@ def analytics():
 @app.route("/feedback/<movie_id>", methods=["GET", "POST"])
 @login_required
 def feedback(movie_id):
+    movie = get_movies_table().get_item(Key={"movie_id": movie_id}).get("Item")
+    if movie is None:
+        abort(404)
+
     if request.method == "POST":
-        get_feedback_table().put_item(Item={
+        rating = request.form.get("rating", "3").strip()
+        age_group = request.form.get("age_group") or None
+        if not rating.isdigit() or not 1 <= int(rating) <= 5:
+            flash("Please choose a rating between 1 and 5.", "error")
+            return redirect(url_for("feedback", movie_id=movie_id))
+        if age_group is not None and age_group not in AGE_GROUPS:
+            flash("Please choose one of the listed age groups.", "error")
+            return redirect(url_for("feedback", movie_id=movie_id))
+        rating = int(rating)
+        review = request.form.get("review", "")
+        sentiment, sentiment_score = classify(review, rating)
+        would_recommend = request.form.get("would_recommend") == "yes"
+
+        item = {
             "feedback_id": str(uuid.uuid4()),
             "movie_id": movie_id,
             "username": session["username"],
-            "rating": Decimal(request.form.get("rating", "3")),
-            "review": request.form.get("review", ""),
-            "sentiment": request.form.get("sentiment", "neutral"),
+            "rating": Decimal(rating),
+            "review": review,
+            "sentiment": sentiment,
+            "would_recommend": would_recommend,
             "created_at": datetime.utcnow().isoformat()
-        })
+        }
+        if sentiment_score is not None:
+            item["sentiment_score"] = Decimal(str(sentiment_score))
+        if age_group:
+            item["age_group"] = age_group
+        if not put_feedback(item, feedback_stats_delta(rating, sentiment, age_group, would_recommend)):
+            # Deleted since the lookup above
+            abort(404)
 
         send_sns_notification("New Feedback", f"Feedback for {movie_id}")
         return redirect(url_for("index"))
 
-    return render_template("feedback.html")
+    return render_template("feedback.html", movie=dict(movie, id=movie_id), user={"username": session["username"]},
+                           today=datetime.utcnow().date().isoformat())
 
 # ===================== API =====================
 
@@ -243,6 +841,43 @@ def api_movies():
     except ClientError:
         return jsonify([])
 
+@app.route("/api/feedback/export")
+@admin_required
+def export_feedback():
+    """Stream feedback as CSV or JSONL, filtered by movie_id, start, end and sentiment"""
+    try:
+        filters = ExportFilter.from_args(request.args)
+        return export_response(iter_feedback_export(filters), FEEDBACK_EXPORT_COLUMNS,
+                               request.args.get("format", "csv"),
+                               request.args.get("gzip") in ("1", "true"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/api/feedback/import", methods=["POST"])
+@admin_required
+def import_feedback_api():
+    """Bulk-load feedback from a JSONL or CSV request body; reports per-line errors"""
+    fmt = request.args.get("format") or ("csv" if request.mimetype == "text/csv" else "jsonl")
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(IMPORT_FORMATS)}"}), 400
+    stream = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+    try:
+        report = import_feedback(read_records(stream, fmt), existing_movie_ids, write_feedback_batch,
+                                 batch_size=500, movie_id_type=str)
+    except UnicodeDecodeError:
+        return jsonify({"error": "body must be UTF-8 text"}), 400
+    return jsonify(report.as_dict())
+
+@app.cli.command("rebuild-stats")
+def rebuild_stats_command():
+    """Recompute the per-movie and global counters from the feedback table."""
+    click.echo(f"Rebuilt counters from {rebuild_stats()} feedbacks")
+
+@app.route("/api/notifications/metrics")
+@admin_required
+def api_notification_metrics():
+    return jsonify(sns_dispatcher.metrics())
+
 # ===================== RUN =====================
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+"""Cold import time of app.py and app_aws.py.
+
+Every sample imports the module in a fresh interpreter, the cost a worker,
+CLI command or serverless cold start pays before serving anything. The
+report gives the median and p95 wall time of the import per module, plus
+the slowest packages of one ``python -X importtime`` run to show where the
+time goes.
+
+    python -m benchmarks.bench_import --runs 10 --output imports.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from statistics import median
+
+from benchmarks.bench_routes import percentile
+
+DEFAULT_MODULES = ("app", "app_aws")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMED_IMPORT = ("import time; started = time.perf_counter(); import {module}; "
+                "print(time.perf_counter() - started)")
+
+
+def bench_env(data_dir):
+    # Keep imports away from real databases and credentials
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(data_dir, 'bench_import.db')}",
+        AWS_ACCESS_KEY_ID="testing",
+        AWS_SECRET_ACCESS_KEY="testing",
+        AWS_DEFAULT_REGION="us-east-1",
+    )
+    return env
+
+
+def import_once(module, env):
+    output = subprocess.run([sys.executable, "-c", TIMED_IMPORT.format(module=module)],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def _is_local(package):
+    return os.path.exists(os.path.join(ROOT, f"{package}.py")) or os.path.isdir(os.path.join(ROOT, package))
+
+
+def slowest_packages(module, env, top):
+    """Third-party packages by cumulative import time, from ``-X importtime``"""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    packages = {}
+    parents = []
+    # importtime prints children before their parent; reversed, every line follows its parent
+    for line in reversed(output.stderr.splitlines()):
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2][1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        package = name.strip().split(".")[0]
+        del parents[depth:]
+        # Count third-party packages where the app's own modules import them; what they
+        # import in turn is part of that total, and interpreter startup is left out
+        if parents and parents[0] == module and all(map(_is_local, parents)) and not _is_local(package):
+            packages[package] = packages.get(package, 0) + int(fields[1])
+        parents.append(package)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {name: round(us / 1000, 1) for name, us in ranked}
+
+
+def measure_module(module, env, args):
+    # The first import compiles bytecode; time warm caches like a restarted worker
+    for _ in range(args.warmup):
+        import_once(module, env)
+    samples = sorted(import_once(module, env) for _ in range(args.runs))
+    return {
+        "runs": len(samples),
+        "median_ms": round(median(samples) * 1000, 1),
+        "p95_ms": round(percentile(samples, 95) * 1000, 1),
+        "min_ms": round(samples[0] * 1000, 1),
+        "slowest_packages_ms": slowest_packages(module, env, args.top),
+    }
+
+
+def run(args):
+    env = bench_env(tempfile.mkdtemp())
+    report = {"python": sys.version.split()[0], "results": {}}
+    for module in args.modules:
+        report["results"][module] = measure_module(module, env, args)
+    return report
+
+
+def print_table(report):
+    print(f"\n  {'module':<12}{'median ms':>12}{'p95 ms':>10}{'min ms':>10}  slowest packages", file=sys.stderr)
+    for module, stats in report["results"].items():
+        slowest = ", ".join(f"{name} {ms}" for name, ms in list(stats["slowest_packages_ms"].items())[:3])
+        print(f"  {module:<12}{stats['median_ms']:>12}{stats['p95_ms']:>10}{stats['min_ms']:>10}  {slowest}",
+              file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CinemaPulse import time benchmark")
+    parser.add_argument("--modules", nargs="+", default=list(DEFAULT_MODULES))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--top", type=int, default=10, help="packages listed per module")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    print_table(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
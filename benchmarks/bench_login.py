@@ -0,0 +1,117 @@
+"""Login throughput of app.py for a set of password hashing methods.
+
+For every method the fixture user's hash is regenerated with it, then
+``--logins`` POST /login requests are driven through the Flask test client
+from ``--concurrency`` threads while the hasher pool runs ``--workers``
+verifications at a time. The report gives logins per second overall and per
+core in use, so hashing parameters can be picked against a latency budget.
+
+    python -m benchmarks.bench_login --methods pbkdf2:sha256:600000 scrypt:32768:8:1
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_routes import percentile
+
+DEFAULT_METHODS = ("pbkdf2:sha256:600000", "pbkdf2:sha256:260000", "scrypt:32768:8:1")
+PASSWORD = "password123"
+
+
+def login_once(app):
+    client = app.test_client()
+    started = time.perf_counter()
+    response = client.post("/login", data={"username": "bench", "password": PASSWORD})
+    return time.perf_counter() - started, response.status_code == 302
+
+
+def measure_method(app, db, User, hasher, method, args):
+    hasher.configure(method, args.workers, args.max_pending)
+    with app.app_context():
+        user = User.query.filter_by(username="bench").one()
+        user.set_password(PASSWORD)
+        db.session.commit()
+
+    for _ in range(args.warmup):
+        login_once(app)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(lambda _: login_once(app), range(args.logins)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    rate = len(results) / elapsed if elapsed else 0.0
+    cores = min(hasher.workers, os.cpu_count() or 1)
+    return {
+        "logins": len(results),
+        "failures": sum(1 for _, ok in results if not ok),
+        "workers": hasher.workers,
+        "logins_per_second": round(rate, 1),
+        "logins_per_second_per_core": round(rate / cores, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+    }
+
+
+def run(args):
+    # app.py reads its configuration at import time
+    path = os.path.join(tempfile.mkdtemp(), "bench_login.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from app import app
+    from database import db, User
+    hasher = app.extensions["password_hasher"]
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username="bench", email="bench@example.com", password_hash=""))
+        db.session.commit()
+
+    report = {"cpu_count": os.cpu_count(), "concurrency": args.concurrency, "results": {}}
+    for method in args.methods:
+        report["results"][method] = measure_method(app, db, User, hasher, method, args)
+    return report
+
+
+def print_table(report):
+    print(f"\n  {'method':<24}{'workers':>8}{'login/s':>10}{'per core':>10}{'p50 ms':>10}{'p95 ms':>10}",
+          file=sys.stderr)
+    for method, stats in report["results"].items():
+        print(f"  {method:<24}{stats['workers']:>8}{stats['logins_per_second']:>10}"
+              f"{stats['logins_per_second_per_core']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}",
+              file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CinemaPulse login benchmark")
+    parser.add_argument("--methods", nargs="+", default=list(DEFAULT_METHODS),
+                        help="werkzeug hashing methods to compare")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="request threads posting /login at once")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="hasher pool size (default: one per core)")
+    parser.add_argument("--max-pending", type=int, default=None)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    print_table(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
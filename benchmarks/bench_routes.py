@@ -0,0 +1,381 @@
+"""Route-level HTTP benchmarks for app.py (SQLite) and app_aws.py (moto DynamoDB).
+
+Every (backend, scale) pair runs in its own subprocess, because both apps
+read their configuration at import time. Each worker seeds a dataset, drives
+the hot routes through the Flask test client (sequentially for latency
+percentiles, then from a thread pool for concurrent throughput) and prints a
+JSON result that the parent merges into one report.
+
+    python -m benchmarks.bench_routes --scales 100 10000 --output bench.json
+    python -m benchmarks.bench_routes --scales 100 10000 --compare bench.json
+
+SQL routes are measured both signed in (rendered every time) and, with an
+``_anon`` suffix, as anonymous visitors served from the response cache.
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+BACKENDS = ("sql", "aws")
+DEFAULT_SCALES = (100, 10000)
+
+
+# ===================== MEASUREMENT =====================
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else 0.0,
+    }
+
+
+def call(client, route):
+    method, path, data = route["method"], route["path"], route.get("data")
+    if method == "POST":
+        return client.post(path, data=data)
+    return client.get(path)
+
+
+def measure_route(make_client, route, iterations, warmup, instrumentation):
+    client = make_client()
+    for _ in range(warmup):
+        call(client, route)
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        response = call(client, route)
+        latencies.append(time.perf_counter() - t0)
+        if response.status_code >= 400:
+            errors += 1
+        if instrumentation is not None and instrumentation.recent:
+            record = instrumentation.recent[-1]
+            queries.append(record.db_count + record.aws_count)
+    return summarize(latencies, queries, errors, time.perf_counter() - started)
+
+
+def measure_concurrent(make_client, routes, concurrency, requests_per_worker):
+    """Mixed GET load from ``concurrency`` threads, each with its own client"""
+    get_routes = [route for route in routes if route["method"] == "GET"]
+
+    def worker(offset):
+        client = make_client()
+        latencies, errors = [], 0
+        for i in range(requests_per_worker):
+            route = get_routes[(offset + i) % len(get_routes)]
+            t0 = time.perf_counter()
+            try:
+                if call(client, route).status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for batch, _ in results for latency in batch]
+    summary = summarize(latencies, [], sum(errors for _, errors in results), elapsed)
+    summary["concurrency"] = concurrency
+    summary.pop("queries_per_request")
+    return summary
+
+
+def run_suite(app, routes, login, instrumentation, args):
+    """Measure every route; routes marked ``anonymous`` run without the login session"""
+    # Not TESTING: a failing route should count as a 500, not abort the run
+    app.config["TESTING"] = False
+
+    def make_client(anonymous=False):
+        client = app.test_client()
+        if not anonymous:
+            with client.session_transaction() as sess:
+                sess.update(login)
+        return client
+
+    results = {"routes": {}}
+    for route in routes:
+        results["routes"][route["name"]] = measure_route(
+            lambda anonymous=route.get("anonymous", False): make_client(anonymous), route, args.iterations, args.warmup,
+            instrumentation)
+    if args.concurrency > 1:
+        # Signed-in traffic: every request renders, none is served from the response cache
+        results["concurrent"] = measure_concurrent(
+            make_client, [route for route in routes if not route.get("anonymous")],
+            args.concurrency, args.iterations)
+    return results
+
+
+# ===================== SQL BACKEND =====================
+
+def run_sql(scale, args):
+    os.makedirs(args.data_dir, exist_ok=True)
+    db_path = os.path.join(args.data_dir, f"bench_sql_{scale}_{args.seed}.db")
+    reuse = args.reuse and os.path.exists(db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["INSTRUMENTATION_ENABLED"] = "true"
+    os.environ["SLOW_REQUEST_MS"] = str(10 ** 9)
+
+    from app import app, db, instrumentation
+    from database import Movie, MovieStats, User
+    import init_db
+
+    if not reuse:
+        with contextlib.redirect_stdout(sys.stderr):
+            init_db.seed_bulk(num_movies=max(20, scale // 1000), num_users=max(10, scale // 100),
+                              num_feedbacks=scale, batch_size=20000, seed=args.seed)
+
+    with app.app_context():
+        busiest = db.session.execute(
+            db.select(MovieStats.movie_id).order_by(MovieStats.feedback_count.desc()).limit(1)
+        ).scalar() or db.session.execute(db.select(Movie.id).limit(1)).scalar()
+        reviewer = User.query.filter_by(username="john_doe").one()
+        login = {"user_id": reviewer.id, "username": reviewer.username, "is_admin": False}
+
+    routes = [
+        {"name": "index", "method": "GET", "path": "/"},
+        {"name": "movies", "method": "GET", "path": "/movies"},
+        {"name": "movie_detail", "method": "GET", "path": f"/movie/{busiest}"},
+        {"name": "analytics", "method": "GET", "path": "/analytics"},
+        {"name": "api_movie_stats", "method": "GET", "path": f"/api/movie/{busiest}/stats"},
+        {"name": "feedback_post", "method": "POST", "path": f"/feedback/{busiest}", "data": {
+            "rating": "4", "review": "Benchmark review", "watch_date": "2024-01-01",
+            "age_group": "26-35", "would_recommend": "yes",
+        }},
+        # Anonymous visitors are served from the response cache after the first request
+        {"name": "index_anon", "method": "GET", "path": "/", "anonymous": True},
+        {"name": "movie_detail_anon", "method": "GET", "path": f"/movie/{busiest}", "anonymous": True},
+        {"name": "analytics_anon", "method": "GET", "path": "/analytics", "anonymous": True},
+        {"name": "api_movie_stats_anon", "method": "GET", "path": f"/api/movie/{busiest}/stats",
+         "anonymous": True},
+    ]
+    return run_suite(app, routes, login, instrumentation, args)
+
+
+# ===================== AWS BACKEND =====================
+
+def seed_dynamodb(app_aws, scale, seed):
+    """Movies, feedback and matching aggregate counters, written with batch_writer"""
+    import random
+    rng = random.Random(seed)
+    from init_db import MOVIES_DATA, RATINGS, RATING_WEIGHTS, AGE_GROUPS, FEEDBACK_TEMPLATES
+    from sentiment import classify
+
+    num_movies = max(20, scale // 1000)
+    movie_ids = [f"movie-{n}" for n in range(num_movies)]
+    with app_aws.get_movies_table().batch_writer() as batch:
+        for n, movie_id in enumerate(movie_ids):
+            base = MOVIES_DATA[n % len(MOVIES_DATA)]
+            batch.put_item(Item={
+                "movie_id": movie_id, "title": base["title"], "genre": base["genre"],
+                "status": base["status"], "poster_url": base["poster_url"],
+                "release_date": base["release_date"].isoformat(), "duration": base["duration"],
+            })
+
+    counters = {}
+    now = datetime.utcnow()
+    with app_aws.get_feedback_table().batch_writer() as batch:
+        for n in range(scale):
+            rating = rng.choices(RATINGS, weights=RATING_WEIGHTS)[0]
+            movie_id = rng.choice(movie_ids)
+            review = rng.choice(FEEDBACK_TEMPLATES[rating])
+            sentiment, _ = classify(review, rating)
+            age_group = rng.choice(AGE_GROUPS)
+            batch.put_item(Item={
+                "feedback_id": f"fb-{n}", "movie_id": movie_id, "username": f"user{n % 100}",
+                "rating": Decimal(rating), "review": review,
+                "sentiment": sentiment, "age_group": age_group, "would_recommend": rating >= 3,
+                "created_at": (now - timedelta(seconds=rng.randrange(90 * 86400))).isoformat(),
+            })
+            delta = app_aws.feedback_stats_delta(rating, sentiment, age_group, rating >= 3)
+            for stat_id in (app_aws.movie_stats_id(movie_id), app_aws.GLOBAL_STATS_ID):
+                target = counters.setdefault(stat_id, {})
+                for key, amount in delta.items():
+                    target[key] = target.get(key, 0) + amount
+
+    counters[app_aws.GLOBAL_STATS_ID].update(app_aws.catalog_stats(movie_ids, counters))
+    with app_aws.get_stats_table().batch_writer() as batch:
+        for stat_id, values in counters.items():
+            item = {"stat_id": stat_id, **{k: v if isinstance(v, list) else Decimal(v) for k, v in values.items()}}
+            if stat_id.startswith("MOVIE#"):
+                item["movie_id"] = stat_id.split("#", 1)[1]
+            batch.put_item(Item=item)
+    busiest = max((k for k in counters if k.startswith("MOVIE#")),
+                  key=lambda k: counters[k]["feedback_count"])
+    return busiest.split("#", 1)[1]
+
+
+def run_aws(scale, args):
+    for key, value in {
+        "AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SECURITY_TOKEN": "testing", "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1", "INSTRUMENTATION_ENABLED": "true",
+        "SLOW_REQUEST_MS": str(10 ** 9),
+        "SNS_TOPIC_ARN": "arn:aws:sns:us-east-1:123456789012:cinemapulse-bench",
+        # init_db (imported for the fixtures) must not touch a real database
+        "DATABASE_URL": "sqlite://",
+    }.items():
+        os.environ[key] = value
+
+    from moto import mock_aws
+    with mock_aws():
+        import app_aws
+        app_aws.reset_aws_clients()
+        app_aws.create_tables()
+        app_aws.get_sns().create_topic(Name="cinemapulse-bench")
+        busiest = seed_dynamodb(app_aws, scale, args.seed)
+        routes = [
+            {"name": "index", "method": "GET", "path": "/"},
+            {"name": "movies", "method": "GET", "path": "/movies"},
+            {"name": "movie_detail", "method": "GET", "path": f"/movie/{busiest}"},
+            {"name": "analytics", "method": "GET", "path": "/analytics"},
+            {"name": "feedback_post", "method": "POST", "path": f"/feedback/{busiest}", "data": {
+                "rating": "4", "review": "Benchmark review", "age_group": "26-35", "would_recommend": "yes",
+            }},
+        ]
+        results = run_suite(app_aws.app, routes, {"username": "bench"}, app_aws.instrumentation, args)
+        app_aws.sns_dispatcher.shutdown(timeout=1.0)
+        return results
+
+
+# ===================== DRIVER =====================
+
+def run_worker(args):
+    runner = run_sql if args.worker == "sql" else run_aws
+    result = runner(args.worker_scale, args)
+    json.dump(result, sys.stdout)
+
+
+def run_all(args):
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "results": {},
+    }
+    for backend in args.backends:
+        for scale in args.scales:
+            print(f"Benchmarking {backend} @ {scale} feedbacks...", file=sys.stderr)
+            command = [
+                sys.executable, "-m", "benchmarks.bench_routes",
+                "--worker", backend, "--worker-scale", str(scale),
+                "--iterations", str(args.iterations), "--warmup", str(args.warmup),
+                "--concurrency", str(args.concurrency), "--seed", str(args.seed),
+                "--data-dir", args.data_dir,
+            ] + (["--reuse"] if args.reuse else [])
+            completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+            if completed.returncode != 0:
+                raise SystemExit(f"{backend} @ {scale} failed with exit code {completed.returncode}")
+            report["results"].setdefault(backend, {})[str(scale)] = json.loads(completed.stdout)
+    return report
+
+
+def compare(report, baseline, threshold):
+    """Regressions of ``report`` against ``baseline``: p95 slower than threshold, or more queries"""
+    regressions = []
+    for backend, scales in baseline.get("results", {}).items():
+        for scale, result in scales.items():
+            current = report["results"].get(backend, {}).get(scale)
+            if current is None:
+                continue
+            for route, before in result["routes"].items():
+                after = current["routes"].get(route)
+                if after is None:
+                    continue
+                label = f"{backend} @ {scale} {route}"
+                if before["p95_ms"] and after["p95_ms"] > before["p95_ms"] * (1 + threshold):
+                    regressions.append(f"{label}: p95 {before['p95_ms']} ms -> {after['p95_ms']} ms")
+                if after["queries_per_request"] > before["queries_per_request"]:
+                    regressions.append(f"{label}: queries/request "
+                                       f"{before['queries_per_request']} -> {after['queries_per_request']}")
+    return regressions
+
+
+def print_table(report):
+    for backend, scales in report["results"].items():
+        for scale, result in scales.items():
+            print(f"\n{backend} @ {scale} feedbacks", file=sys.stderr)
+            print(f"  {'route':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>9}",
+                  file=sys.stderr)
+            for route, stats in result["routes"].items():
+                print(f"  {route:<22}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+                      f"{stats['throughput_rps']:>10}{stats['queries_per_request']:>9}", file=sys.stderr)
+            if "concurrent" in result:
+                stats = result["concurrent"]
+                print(f"  concurrent x{stats['concurrency']}: {stats['throughput_rps']} req/s, "
+                      f"p95 {stats['p95_ms']} ms, {stats['errors']} errors", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CinemaPulse route benchmarks")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--scales", nargs="+", type=int, default=list(DEFAULT_SCALES),
+                        help="feedback rows to seed, e.g. 100 10000 1000000")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=tempfile.gettempdir(),
+                        help="where the seeded SQLite files are kept")
+    parser.add_argument("--reuse", action="store_true",
+                        help="reuse previously seeded SQLite files of the same scale and seed")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="fail when this run regresses against a previous JSON report")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative p95 slowdown in compare mode")
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-scale", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args)
+        return 0
+
+    report = run_all(args)
+    print_table(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+import itertools
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, has_app_context, request, session, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from database import db, Movie, Feedback, User
+from replicas import read_from_primary
+
+
+# Per-response headers that must not be replayed from a cached entry
+UNCACHED_HEADERS = {'content-length', 'set-cookie', 'vary'}
+
+
+class MemoryCache:
+    """In-process LRU cache with per-entry TTL.
+
+    Counters (tag versions) are kept in their own, larger LRU. Every value
+    a counter takes comes from one process-wide sequence, so a counter that
+    was evicted and comes back never repeats a version an old entry was
+    keyed with.
+    """
+
+    def __init__(self, max_entries=1024, max_counters=None):
+        self.max_entries = max_entries
+        self.max_counters = max_counters or max_entries * 4
+        self._entries = OrderedDict()
+        self._counters = OrderedDict()
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_counter(self, key):
+        with self._lock:
+            if key not in self._counters:
+                return self._set_counter(key)
+            self._counters.move_to_end(key)
+            return self._counters[key]
+
+    def incr(self, key):
+        with self._lock:
+            return self._set_counter(key)
+
+    def _set_counter(self, key):
+        value = self._counters[key] = next(self._sequence)
+        self._counters.move_to_end(key)
+        while len(self._counters) > self.max_counters:
+            self._counters.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class RedisCache:
+    """Shared cache for multi-worker deployments (needs the optional ``redis`` package)"""
+
+    def __init__(self, url, prefix='cinemapulse:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('CACHE_BACKEND=redis requires the redis package') from e
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self._redis.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self._redis.set(self.prefix + key, pickle.dumps(value), ex=max(int(ttl), 1))
+
+    def get_counter(self, key):
+        return int(self._redis.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return self._redis.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self._redis.scan_iter(self.prefix + '*'):
+            self._redis.delete(key)
+
+
+class ResponseCache:
+    """Caches rendered public pages and JSON APIs for anonymous visitors.
+
+    Entries are keyed by the request path plus the current version of every
+    tag they depend on (``movie:<id>``, ``catalog``, ``feedback``), so
+    invalidating a tag is a single counter increment and stale entries just
+    age out. Committed Movie, Feedback and User writes invalidate their tags
+    automatically; bulk writes that bypass the ORM call ``invalidate()``.
+    Each app gets its own instance in ``app.extensions['response_cache']``,
+    which the ``cached`` view decorator and the session listeners look up.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.default_ttl = 60
+        self.enabled = True
+        self.fresh_window = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        self.enabled = backend != 'null'
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 60)
+        if app.config.get('SQLALCHEMY_REPLICA_URIS'):
+            # How long after a write replicas may still lag behind it
+            self.fresh_window = app.config.get('READ_YOUR_WRITES_SECONDS', 10)
+        if backend == 'redis':
+            self.backend = RedisCache(app.config['CACHE_REDIS_URL'])
+        else:
+            self.backend = MemoryCache(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        app.extensions['response_cache'] = self
+        return self
+
+    # ---------- invalidation ----------
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.incr(f'tag:{tag}')
+            if self.fresh_window:
+                self.backend.set(f'fresh:{tag}', True, self.fresh_window)
+
+    def _recently_invalidated(self, tags):
+        return self.fresh_window and any(self.backend.get(f'fresh:{tag}') for tag in tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    # ---------- views ----------
+
+    def _key(self, tags):
+        versions = ','.join(f'{tag}={self.backend.get_counter(f"tag:{tag}")}' for tag in sorted(tags))
+        return f'view:{request.full_path}|{versions}'
+
+    @staticmethod
+    def _cacheable_request():
+        # Signed-in pages and pages carrying a flash message are personal
+        return request.method == 'GET' and 'user_id' not in session and '_flashes' not in session
+
+    def serve(self, view, tags, ttl, args, kwargs):
+        """The response of ``view``, from the cache when this request may share one"""
+        if not self.enabled or not self._cacheable_request():
+            return conditional(make_response(view(*args, **kwargs)))
+        view_tags = tags(**kwargs)
+        key = self._key(view_tags)
+        entry = self.backend.get(key)
+        if entry is None:
+            if self._recently_invalidated(view_tags):
+                # A lagging replica would store pre-write data under the new tag version
+                read_from_primary(db.session)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            response.add_etag()
+            headers = [(name, value) for name, value in response.headers
+                       if name.lower() not in UNCACHED_HEADERS]
+            entry = (response.get_data(), headers)
+            self.backend.set(key, entry, ttl or self.default_ttl)
+        body, headers = entry
+        return conditional(make_response(body, 200, headers))
+
+
+def cached(tags, ttl=None):
+    """Cache a GET view for anonymous visitors; ``tags(**view_args)`` names its dependencies"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return current_app.extensions['response_cache'].serve(view, tags, ttl, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def _app_cache():
+    return current_app.extensions.get('response_cache') if has_app_context() else None
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_tags(session, flush_context):
+    tags = session.info.setdefault('cache_tags', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Feedback):
+            tags.update(('feedback', f'movie:{obj.movie_id}'))
+        elif isinstance(obj, Movie):
+            tags.update(('catalog', f'movie:{obj.id}'))
+        elif isinstance(obj, User):
+            tags.add(f'user:{obj.id}')
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_tags(session):
+    # The cache of the app whose context made the write
+    tags = session.info.pop('cache_tags', None)
+    cache = _app_cache()
+    if tags and cache is not None:
+        cache.invalidate(*tags)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_tags(session):
+    session.info.pop('cache_tags', None)
+
+
+def invalidate_on_commit(session, *tags):
+    """Invalidate ``tags`` once ``session`` commits, for writes that bypass the ORM unit of work"""
+    session.info.setdefault('cache_tags', set()).update(tags)
+
+
+def conditional(response):
+    """ETag revalidation: answer 304 when the client already has this body"""
+    if response.status_code == 200 and not response.direct_passthrough:
+        if not response.get_etag()[0]:
+            response.add_etag()
+        # Pages rendered for a signed-in user carry their navigation; keep them out of shared caches
+        scope = 'private' if 'user_id' in session else 'public'
+        response.headers['Cache-Control'] = f'{scope}, max-age=0, must-revalidate'
+        response.vary.add('Cookie')
+        response.make_conditional(request)
+    return response
@@ -11,10 +11,32 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///cinemapulse.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Read replicas (comma-separated URLs): GET requests read from one of them
+    SQLALCHEMY_REPLICA_URIS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+    # Clients that wrote keep reading from the primary this long, to see their own writes
+    READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 10))
+    
+    # Engine tuning, applied per dialect by engine_options.py
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = 30
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))  # PostgreSQL, 0 = none
+    DB_QUERY_CACHE_SIZE = 1000
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = 'NORMAL'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
     
     # Session Configuration
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
+    # Password hashing (werkzeug method string); stored hashes with other
+    # parameters are upgraded on the next successful login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))  # 0 = one per core
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 0))  # 0 = 8 per worker
+    
     # Application Configuration
     APP_NAME = 'CinemaPulse'
     APP_VERSION = '1.0.0'
@@ -23,6 +45,32 @@ class Config:
     MOVIES_PER_PAGE = 12
     FEEDBACK_PER_PAGE = 20
     
+    # Analytics rollups (interval in seconds, 0 disables the background scheduler)
+    ANALYTICS_ROLLUP_INTERVAL = int(os.environ.get('ANALYTICS_ROLLUP_INTERVAL', 0))
+    ANALYTICS_ROLLUP_BATCH_SIZE = 5000
+    ANALYTICS_ROLLUP_LAG_SECONDS = 5
+    
+    # Request instrumentation (/metrics endpoint and slow-request log)
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'false').lower() == 'true'
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    
+    # Response cache for anonymous traffic ('memory', 'redis' or 'null' to disable)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 60))
+    CACHE_MAX_ENTRIES = 1024
+    # Seconds a signed-in user's identity is reused before re-reading users (0 disables)
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 300))
+    
+    # Feedback ingestion ('sync' commits in the request, 'queue' writes behind)
+    FEEDBACK_INGEST_MODE = os.environ.get('FEEDBACK_INGEST_MODE', 'sync')
+    FEEDBACK_QUEUE_PATH = os.environ.get('FEEDBACK_QUEUE_PATH')  # defaults to instance/feedback_queue.db
+    FEEDBACK_INGEST_INTERVAL = float(os.environ.get('FEEDBACK_INGEST_INTERVAL', 0.5))
+    FEEDBACK_INGEST_BATCH_SIZE = 500
+    
+    # Pre-fork servers (gunicorn --preload) start background threads in each worker after the fork
+    PREFORK = os.environ.get('PREFORK', 'false').lower() == 'true'
+    
     # File Upload (for future use)
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = 'static/uploads'
\ No newline at end of file
@@ -1,9 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from sqlalchemy import func
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, func, case, insert, update, delete, select, inspect, bindparam
+from sqlalchemy.orm import Session
+from passwords import current_hasher
+from replicas import RoutingSession
+from sentiment import classify, classify_batch
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     """User model for authentication"""
@@ -22,11 +25,14 @@ class User(db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = current_hasher().hash(password)
     
     def check_password(self, password):
-        """Verify password"""
-        return check_password_hash(self.password_hash, password)
+        """Verify password, upgrading the stored hash when the hashing parameters changed"""
+        valid, new_hash = current_hasher().verify_and_update(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return valid
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -35,6 +41,11 @@ class User(db.Model):
 class Movie(db.Model):
     """Movie model for storing movie information"""
     __tablename__ = 'movies'
+    __table_args__ = (
+        # Keyset pagination order for the catalog, with and without a status filter
+        db.Index('ix_movies_release_date_id', 'release_date', 'id'),
+        db.Index('ix_movies_status_release_date_id', 'status', 'release_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -50,57 +61,174 @@ class Movie(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     feedbacks = db.relationship('Feedback', backref='movie', lazy='dynamic', cascade='all, delete-orphan')
+    stats = db.relationship('MovieStats', uselist=False, cascade='all, delete-orphan')
+    genre_links = db.relationship('MovieGenre', cascade='all, delete-orphan')
+    
+    @property
+    def genres(self):
+        return split_genres(self.genre)
+    
+    def sync_genres(self):
+        """Bring the movie_genres rows in line with the genre string"""
+        wanted = self.genres
+        self.genre_links = [link for link in self.genre_links if link.genre in wanted]
+        existing = {link.genre for link in self.genre_links}
+        for genre in wanted:
+            if genre not in existing:
+                self.genre_links.append(MovieGenre(genre=genre))
     
     @property
     def average_rating(self):
-        avg = db.session.query(func.avg(Feedback.rating)).filter(
-            Feedback.movie_id == self.id
-        ).scalar()
-        return round(avg, 1) if avg else 0.0
+        return self.stats.average_rating if self.stats else 0.0
     
     @property
     def total_feedbacks(self):
-        return self.feedbacks.count()
+        return self.stats.feedback_count if self.stats else 0
     
     @property
     def rating_distribution(self):
-        distribution = {}
-        for i in range(1, 6):
-            count = self.feedbacks.filter_by(rating=i).count()
-            distribution[i] = count
-        return distribution
+        if not self.stats:
+            return {i: 0 for i in range(1, 6)}
+        return self.stats.rating_distribution
+    
+    @property
+    def sentiment_distribution(self):
+        if not self.stats:
+            return {sentiment: 0 for sentiment in SENTIMENTS}
+        return self.stats.sentiment_distribution
     
     def __repr__(self):
         return f'<Movie {self.title}>'
 
 
+def split_genres(value):
+    """Parse a comma separated genre string, keeping the original order"""
+    genres = []
+    for genre in (value or '').split(','):
+        genre = genre.strip()
+        if genre and genre not in genres:
+            genres.append(genre)
+    return genres
+
+
+class MovieGenre(db.Model):
+    """Normalized movie-genre association, kept in sync with Movie.genre"""
+    __tablename__ = 'movie_genres'
+    __table_args__ = (
+        db.Index('ix_movie_genres_genre_movie_id', 'genre', 'movie_id'),
+    )
+    
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), primary_key=True)
+    genre = db.Column(db.String(50), primary_key=True)
+    
+    def __repr__(self):
+        return f'<MovieGenre {self.movie_id} {self.genre}>'
+
+
+def rebuild_movie_genres():
+    """Repopulate movie_genres from every Movie.genre string. The caller commits."""
+    db.session.execute(delete(MovieGenre.__table__))
+    rows = [
+        {'movie_id': movie_id, 'genre': genre}
+        for movie_id, value in db.session.execute(select(Movie.id, Movie.genre))
+        for genre in split_genres(value)
+    ]
+    if rows:
+        db.session.execute(insert(MovieGenre.__table__), rows)
+    db.session.expire_all()
+    return len(rows)
+
+
+SENTIMENTS = ('positive', 'neutral', 'negative')
+
+
+class MovieStats(db.Model):
+    """Materialized per-movie feedback aggregates, maintained on every feedback write"""
+    __tablename__ = 'movie_stats'
+    
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), primary_key=True)
+    feedback_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
+    positive_count = db.Column(db.Integer, nullable=False, default=0)
+    neutral_count = db.Column(db.Integer, nullable=False, default=0)
+    negative_count = db.Column(db.Integer, nullable=False, default=0)
+    recommend_count = db.Column(db.Integer, nullable=False, default=0)
+    bayes_score = db.Column(db.Float, nullable=False, default=0.0)
+    trend_score = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Top-N rankings walk these indexes instead of sorting every movie
+        db.Index('ix_movie_stats_bayes_score', 'bayes_score'),
+        db.Index('ix_movie_stats_trend_score', 'trend_score'),
+    )
+    
+    @property
+    def current_trend(self):
+        return trend_at(self.trend_score or 0.0)
+    
+    @property
+    def average_rating(self):
+        if not self.feedback_count:
+            return 0.0
+        return round(self.rating_sum / self.feedback_count, 1)
+    
+    @property
+    def rating_distribution(self):
+        return {i: getattr(self, f'rating_{i}') for i in range(1, 6)}
+    
+    @property
+    def sentiment_distribution(self):
+        return {sentiment: getattr(self, f'{sentiment}_count') for sentiment in SENTIMENTS}
+    
+    def __repr__(self):
+        return f'<MovieStats {self.movie_id}: {self.feedback_count} feedbacks>'
+
+
 class Feedback(db.Model):
     """Feedback model for storing customer reviews"""
     __tablename__ = 'feedbacks'
+    __table_args__ = (
+        # Newest reviews of a movie (movie_detail) and per-movie rating / sentiment breakdowns
+        db.Index('ix_feedbacks_movie_id_created_at', 'movie_id', 'created_at'),
+        db.Index('ix_feedbacks_movie_id_rating', 'movie_id', 'rating'),
+        db.Index('ix_feedbacks_movie_id_sentiment', 'movie_id', 'sentiment'),
+        # A user's reviews, newest first (profile)
+        db.Index('ix_feedbacks_user_id_created_at', 'user_id', 'created_at'),
+        # Recent feedback across the catalog (analytics)
+        db.Index('ix_feedbacks_created_at', 'created_at'),
+        # Covering index for the audience demographics GROUP BY
+        db.Index('ix_feedbacks_age_group', 'age_group'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), nullable=False)
+    # active_history keeps the previous value of the columns aggregated into
+    # movie_stats, so edits can be subtracted even when the row was expired
+    movie_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('movies.id'), nullable=False), active_history=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     customer_name = db.Column(db.String(100), nullable=False)
     customer_email = db.Column(db.String(120), nullable=False)
-    rating = db.Column(db.Integer, nullable=False)
+    rating = db.column_property(db.Column(db.Integer, nullable=False), active_history=True)
     review = db.Column(db.Text, nullable=False)
-    sentiment = db.Column(db.String(20))
+    sentiment = db.column_property(db.Column(db.String(20)), active_history=True)
+    sentiment_score = db.Column(db.Float)  # -1..1 from the review text, NULL when it has no opinion words
     watch_date = db.Column(db.Date, nullable=False)
     age_group = db.Column(db.String(20))
-    would_recommend = db.Column(db.Boolean, default=True)
+    would_recommend = db.column_property(db.Column(db.Boolean, default=True), active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
         return f'<Feedback {self.id} for Movie {self.movie_id}>'
     
     def analyze_sentiment(self):
-        if self.rating >= 4:
-            self.sentiment = 'positive'
-        elif self.rating == 3:
-            self.sentiment = 'neutral'
-        else:
-            self.sentiment = 'negative'
+        """Score the review text, falling back to the rating when it has no opinion words"""
+        self.sentiment, self.sentiment_score = classify(self.review, self.rating)
 
 
 class Analytics(db.Model):
@@ -117,4 +245,280 @@ class Analytics(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<Analytics {self.date}>'
\ No newline at end of file
+        return f'<Analytics {self.date}>'
+
+
+class RollupCheckpoint(db.Model):
+    """High-water mark of the feedbacks already folded into a rollup"""
+    __tablename__ = 'rollup_checkpoints'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_feedback_id = db.Column(db.Integer, nullable=False, default=0)
+    last_created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RollupCheckpoint {self.name} at {self.last_feedback_id}>'
+
+
+# ===================== MOVIE STATS MAINTENANCE =====================
+
+STATS_COLUMNS = (
+    'feedback_count', 'rating_sum',
+    'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+    'positive_count', 'neutral_count', 'negative_count', 'recommend_count',
+)
+DELTA_COLUMNS = STATS_COLUMNS + ('trend_score',)
+_STATS_TRACKED_ATTRS = ('movie_id', 'rating', 'sentiment', 'would_recommend')
+
+# Rankings. The Bayesian average pulls movies with few ratings toward the
+# prior, so one 5-star review does not outrank thousands at 4.8.
+BAYES_PRIOR_MEAN = 3.0
+BAYES_PRIOR_WEIGHT = 10
+# The trend score sums rating-weighted feedback decaying with a half-life.
+# Each contribution is scaled relative to a fixed epoch instead of decaying
+# stored rows, so the stored sums order movies exactly like their decayed
+# values at any instant and new feedback is a plain increment. A float
+# holds 2**1023, about 19 years of 7-day half-lives past the epoch; move
+# TREND_EPOCH forward and run rebuild_rankings() well before then.
+TREND_HALF_LIFE_DAYS = 7
+TREND_EPOCH = datetime(2024, 1, 1)
+
+
+def bayes_average(rating_sum, feedback_count):
+    """Works on numbers and on SQL column expressions alike"""
+    return (BAYES_PRIOR_WEIGHT * BAYES_PRIOR_MEAN + rating_sum) * 1.0 / (BAYES_PRIOR_WEIGHT + feedback_count)
+
+
+def trend_weight(rating, created_at):
+    """Trend contribution of one feedback, in epoch-relative units.
+
+    The weights grow without bound, so subtracting one on an edit or delete
+    leaves float rounding error in trend_score that later increments do not
+    remove. rebuild_rankings() (``flask rebuild-stats``) resums the scores
+    exactly and is also how stored scores are re-based after TREND_EPOCH moves.
+    """
+    days = (created_at - TREND_EPOCH).total_seconds() / 86400
+    return (rating or 0) * 2.0 ** (days / TREND_HALF_LIFE_DAYS)
+
+
+def trend_at(trend_score, when=None):
+    """The decayed trend value of a stored score as of ``when`` (default now)"""
+    days = ((when or datetime.utcnow()) - TREND_EPOCH).total_seconds() / 86400
+    return trend_score * 2.0 ** (-days / TREND_HALF_LIFE_DAYS)
+
+
+def feedback_stats_delta(rating, sentiment, would_recommend, sign=1, created_at=None):
+    """Return the MovieStats column increments contributed by one feedback row"""
+    delta = dict.fromkeys(DELTA_COLUMNS, 0)
+    delta['trend_score'] = sign * trend_weight(rating, created_at or datetime.utcnow())
+    delta['feedback_count'] = sign
+    delta['rating_sum'] = sign * (rating or 0)
+    if rating in (1, 2, 3, 4, 5):
+        delta[f'rating_{rating}'] = sign
+    if sentiment in SENTIMENTS:
+        delta[f'{sentiment}_count'] = sign
+    if would_recommend:
+        delta['recommend_count'] = sign
+    return delta
+
+
+def merge_stats_delta(deltas, movie_id, delta):
+    """Accumulate ``delta`` into the per-movie ``deltas`` mapping"""
+    target = deltas.setdefault(movie_id, dict.fromkeys(DELTA_COLUMNS, 0))
+    for column, amount in delta.items():
+        target[column] += amount
+
+
+def apply_movie_stats_deltas(connection, deltas):
+    """Apply per-movie increments to movie_stats, creating missing rows.
+    
+    Runs on the caller's connection so the aggregates commit or roll back
+    together with the feedback rows that produced them.
+    """
+    table = MovieStats.__table__
+    now = datetime.utcnow()
+    for movie_id, delta in deltas.items():
+        if movie_id is None or not any(delta.values()):
+            continue
+        values = {column: table.c[column] + amount for column, amount in delta.items() if amount}
+        if delta['feedback_count'] or delta['rating_sum']:
+            # SET expressions see the old row, so apply the increments here too
+            values['bayes_score'] = bayes_average(table.c.rating_sum + delta['rating_sum'],
+                                                  table.c.feedback_count + delta['feedback_count'])
+        values['updated_at'] = now
+        result = connection.execute(
+            update(table).where(table.c.movie_id == movie_id).values(**values)
+        )
+        if result.rowcount == 0 and delta['feedback_count'] > 0:
+            connection.execute(insert(table).values(
+                movie_id=movie_id, updated_at=now,
+                bayes_score=bayes_average(delta['rating_sum'], delta['feedback_count']), **delta))
+
+
+def rebuild_movie_stats(movie_ids=None):
+    """Recompute movie_stats from the feedbacks table.
+    
+    Rebuilds every movie when ``movie_ids`` is None. The caller commits.
+    Returns the number of movies with at least one feedback.
+    """
+    table = MovieStats.__table__
+    rating_counts = [
+        func.sum(case((Feedback.rating == i, 1), else_=0)) for i in range(1, 6)
+    ]
+    sentiment_counts = [
+        func.sum(case((Feedback.sentiment == sentiment, 1), else_=0)) for sentiment in SENTIMENTS
+    ]
+    source = select(
+        Feedback.movie_id,
+        func.count(Feedback.id),
+        func.coalesce(func.sum(Feedback.rating), 0),
+        *rating_counts,
+        *sentiment_counts,
+        func.sum(case((Feedback.would_recommend.is_(True), 1), else_=0)),
+        func.now(),
+    ).group_by(Feedback.movie_id)
+    
+    clear = delete(table)
+    if movie_ids is not None:
+        movie_ids = list(movie_ids)
+        clear = clear.where(table.c.movie_id.in_(movie_ids))
+        source = source.where(Feedback.movie_id.in_(movie_ids))
+    
+    db.session.execute(clear)
+    result = db.session.execute(
+        insert(table).from_select(['movie_id', *STATS_COLUMNS, 'updated_at'], source)
+    )
+    rebuild_rankings(movie_ids)
+    db.session.expire_all()
+    return result.rowcount
+
+
+def rebuild_rankings(movie_ids=None):
+    """Recompute bayes_score and trend_score of existing movie_stats rows. The caller commits.
+
+    Repairs the rounding drift edits and deletes leave in trend_score, and
+    re-bases every score on the current TREND_EPOCH.
+    """
+    table = MovieStats.__table__
+    reset = update(table).values(bayes_score=bayes_average(table.c.rating_sum, table.c.feedback_count),
+                                 trend_score=0.0)
+    source = select(Feedback.movie_id, Feedback.rating, Feedback.created_at)
+    if movie_ids is not None:
+        reset = reset.where(table.c.movie_id.in_(movie_ids))
+        source = source.where(Feedback.movie_id.in_(movie_ids))
+    db.session.execute(reset)
+    
+    trends = {}
+    for movie_id, rating, created_at in db.session.execute(source.execution_options(yield_per=10000)):
+        trends[movie_id] = trends.get(movie_id, 0.0) + trend_weight(rating, created_at)
+    if trends:
+        db.session.execute(
+            update(table).where(table.c.movie_id == bindparam('b_movie_id'))
+            .values(trend_score=bindparam('b_trend_score')),
+            [{'b_movie_id': movie_id, 'b_trend_score': trend} for movie_id, trend in trends.items()]
+        )
+    db.session.expire_all()
+    return len(trends)
+
+
+def rescore_sentiment(chunk_size=5000):
+    """Re-run the sentiment scorer over every feedback.
+    
+    Streams feedbacks in id order one chunk at a time, scores each chunk as
+    a batch and commits the rows whose label or score changed. The bulk
+    updates bypass the movie_stats listeners, so the caller rebuilds the
+    aggregates afterwards. Returns the number of feedbacks updated.
+    """
+    last_id, updated = 0, 0
+    while True:
+        rows = db.session.execute(
+            select(Feedback.id, Feedback.review, Feedback.rating, Feedback.sentiment, Feedback.sentiment_score)
+            .where(Feedback.id > last_id)
+            .order_by(Feedback.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return updated
+        results = classify_batch([row.review for row in rows], [row.rating for row in rows])
+        changes = [
+            {'id': row.id, 'sentiment': label, 'sentiment_score': score}
+            for row, (label, score) in zip(rows, results)
+            if (label, score) != (row.sentiment, row.sentiment_score)
+        ]
+        if changes:
+            db.session.execute(update(Feedback), changes)
+        db.session.commit()
+        updated += len(changes)
+        last_id = rows[-1].id
+
+
+def _tracked_values(state, use_committed):
+    values = {}
+    for attr in _STATS_TRACKED_ATTRS:
+        history = state.attrs[attr].history
+        if use_committed and history.deleted:
+            values[attr] = history.deleted[0]
+        elif use_committed and history.unchanged:
+            values[attr] = history.unchanged[0]
+        else:
+            values[attr] = getattr(state.obj(), attr)
+    return values
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_movie_genres(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Movie) and (obj in session.new or inspect(obj).attrs.genre.history.has_changes()):
+            obj.sync_genres()
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_deleted_feedback(session, flush_context, instances):
+    # Deleted rows are read before the flush, while their attributes can still load
+    deltas = session.info.setdefault('movie_stats_deltas', {})
+    for obj in session.deleted:
+        if isinstance(obj, Feedback):
+            values = _tracked_values(inspect(obj), use_committed=True)
+            merge_stats_delta(deltas, values['movie_id'], feedback_stats_delta(
+                values['rating'], values['sentiment'], values['would_recommend'], sign=-1,
+                created_at=obj.created_at))
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_movie_stats(session, flush_context):
+    deltas = session.info.pop('movie_stats_deltas', {})
+    for obj in session.new:
+        if isinstance(obj, Feedback):
+            merge_stats_delta(deltas, obj.movie_id, feedback_stats_delta(
+                obj.rating, obj.sentiment, obj.would_recommend, created_at=obj.created_at))
+    for obj in session.dirty:
+        if not isinstance(obj, Feedback):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[attr].history.has_changes() for attr in _STATS_TRACKED_ATTRS):
+            continue
+        old = _tracked_values(state, use_committed=True)
+        merge_stats_delta(deltas, old['movie_id'], feedback_stats_delta(
+            old['rating'], old['sentiment'], old['would_recommend'], sign=-1, created_at=obj.created_at))
+        merge_stats_delta(deltas, obj.movie_id, feedback_stats_delta(
+            obj.rating, obj.sentiment, obj.would_recommend, created_at=obj.created_at))
+    
+    if deltas:
+        apply_movie_stats_deltas(session.connection(), deltas)
+        session.info.setdefault('movie_stats_touched', set()).update(deltas)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _expire_movie_stats(session, flush_context):
+    # Loaded MovieStats objects are stale after the SQL-side increments
+    for movie_id in session.info.pop('movie_stats_touched', ()):
+        instance = session.identity_map.get(session.identity_key(MovieStats, movie_id))
+        if instance is not None:
+            session.expire(instance)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_movie_stats_deltas(session):
+    session.info.pop('movie_stats_deltas', None)
+    session.info.pop('movie_stats_touched', None)
@@ -0,0 +1,91 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Defaults for settings missing from the config mapping (reprocess workers pass none)
+DEFAULTS = {
+    'DB_POOL_SIZE': 10,
+    'DB_MAX_OVERFLOW': 20,
+    'DB_POOL_TIMEOUT': 30,
+    'DB_POOL_RECYCLE': 1800,
+    'DB_STATEMENT_TIMEOUT_MS': 30000,
+    'DB_QUERY_CACHE_SIZE': 1000,
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+}
+
+
+def _setting(config, name):
+    value = config.get(name)
+    return DEFAULTS[name] if value is None else value
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(uri, config=None):
+    """create_engine() keyword arguments for ``uri``, tuned per dialect"""
+    config = config or {}
+    url = make_url(uri)
+    options = {'query_cache_size': _setting(config, 'DB_QUERY_CACHE_SIZE')}
+    backend = url.get_backend_name()
+    if backend == 'sqlite':
+        if not _is_memory_sqlite(url):
+            # Python-level wait for the lock, on top of the busy_timeout pragma
+            options['connect_args'] = {'timeout': _setting(config, 'SQLITE_BUSY_TIMEOUT_MS') / 1000}
+        return options
+
+    options.update(
+        pool_size=_setting(config, 'DB_POOL_SIZE'),
+        max_overflow=_setting(config, 'DB_MAX_OVERFLOW'),
+        pool_timeout=_setting(config, 'DB_POOL_TIMEOUT'),
+        # Recycle before server or proxy idle timeouts, and test connections on checkout
+        pool_recycle=_setting(config, 'DB_POOL_RECYCLE'),
+        pool_pre_ping=True,
+    )
+    if backend == 'postgresql':
+        connect_args = {'application_name': 'cinemapulse'}
+        timeout = _setting(config, 'DB_STATEMENT_TIMEOUT_MS')
+        if timeout:
+            connect_args['options'] = f'-c statement_timeout={int(timeout)}'
+        options['connect_args'] = connect_args
+        if url.get_driver_name() == 'psycopg2':
+            # psycopg2 has no server-side prepared statements; page executemany
+            # batches instead, while query_cache_size keeps compiled SQL reused
+            options['executemany_mode'] = 'values_plus_batch'
+    return options
+
+
+def sqlite_pragmas(config=None):
+    """PRAGMA statements run on every new SQLite connection"""
+    config = config or {}
+    return (
+        f"PRAGMA journal_mode={_setting(config, 'SQLITE_JOURNAL_MODE')}",
+        f"PRAGMA synchronous={_setting(config, 'SQLITE_SYNCHRONOUS')}",
+        f"PRAGMA busy_timeout={int(_setting(config, 'SQLITE_BUSY_TIMEOUT_MS'))}",
+        f"PRAGMA mmap_size={int(_setting(config, 'SQLITE_MMAP_SIZE'))}",
+    )
+
+
+def configure_engine(engine, config=None):
+    """Attach per-connection setup to ``engine``; call before its first connection.
+
+    In WAL mode readers keep reading the last committed state while a
+    writer works, instead of every reader waiting for each feedback commit.
+    """
+    if engine.dialect.name != 'sqlite' or _is_memory_sqlite(engine.url):
+        return engine
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return engine
@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from flask import Response, stream_with_context
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+SENTIMENT_FILTERS = ('positive', 'neutral', 'negative')
+
+# Rows are encoded in groups so the response is not flushed one tiny chunk per row
+ROWS_PER_CHUNK = 500
+
+
+@dataclass
+class ExportFilter:
+    """Which feedbacks an export covers; every field is optional"""
+    movie_id: object = None
+    start: date = None
+    end: date = None
+    sentiment: str = None
+
+    @classmethod
+    def from_args(cls, args):
+        """Parse request args or CLI options; raises ValueError on bad input"""
+        sentiment = args.get('sentiment') or None
+        if sentiment is not None and sentiment not in SENTIMENT_FILTERS:
+            raise ValueError(f'sentiment must be one of {", ".join(SENTIMENT_FILTERS)}')
+        start, end = (date.fromisoformat(args[key]) if args.get(key) else None for key in ('start', 'end'))
+        if start and end and start > end:
+            raise ValueError('start must not be after end')
+        return cls(args.get('movie_id') or None, start, end, sentiment)
+
+    @property
+    def start_at(self):
+        return datetime.combine(self.start, datetime.min.time()) if self.start else None
+
+    @property
+    def end_before(self):
+        """Exclusive upper bound covering the whole ``end`` day"""
+        return datetime.combine(self.end + timedelta(days=1), datetime.min.time()) if self.end else None
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def _grouped(rows):
+    group = []
+    for row in rows:
+        group.append(row)
+        if len(group) >= ROWS_PER_CHUNK:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def csv_chunks(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for group in _grouped(rows):
+        writer.writerows([[_plain(row.get(column)) for column in columns] for row in group])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def jsonl_chunks(rows, columns):
+    for group in _grouped(rows):
+        yield ''.join(
+            json.dumps({column: _plain(row.get(column)) for column in columns}) + '\n' for row in group
+        )
+
+
+def gzip_chunks(chunks):
+    """Compress a stream of byte chunks into a single gzip member as it goes"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def encode_export(rows, columns, fmt='csv', compress=False):
+    """Byte chunks of ``rows`` (dicts) encoded as CSV or JSONL, optionally gzipped"""
+    encoder = csv_chunks if fmt == 'csv' else jsonl_chunks
+    chunks = (text.encode('utf-8') for text in encoder(rows, columns))
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_response(rows, columns, fmt='csv', compress=False, filename='feedback'):
+    """Streaming download; ``rows`` is consumed lazily while the response is sent"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'format must be one of {", ".join(EXPORT_FORMATS)}')
+    filename = f'{filename}.{fmt}' + ('.gz' if compress else '')
+    body = encode_export(rows, columns, fmt, compress)
+    return Response(
+        stream_with_context(body),
+        mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
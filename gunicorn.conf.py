@@ -0,0 +1,30 @@
+"""Gunicorn settings for the SQL backend: ``gunicorn -c gunicorn.conf.py``.
+
+The app is imported once in the master (preload_app) and the workers are
+forked from it, sharing the imported modules instead of each paying the
+import cost. Nothing that must not cross a fork is created before then:
+pooled connections are dropped in post_fork and the ingest writer and
+rollup scheduler threads are started in each worker. Run
+``flask --app app upgrade-db`` once per deploy before starting the server.
+"""
+import os
+
+# Read by Config when app.py is imported in the master
+os.environ.setdefault('PREFORK', 'true')
+
+wsgi_app = 'app:app'
+preload_app = True
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+
+def post_fork(server, worker):
+    from app import app, db, start_background_workers
+
+    with app.app_context():
+        # Connections opened in the master belong to it; leave them for it to close
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    start_background_workers(app)
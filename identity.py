@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from datetime import datetime
+from flask import current_app, g, session
+from sqlalchemy import select
+from werkzeug.local import LocalProxy
+from database import db, User
+
+
+@dataclass(frozen=True)
+class Identity:
+    """The public fields of a signed-in user, safe to cache and share between requests"""
+    id: int
+    username: str
+    email: str
+    full_name: str
+    is_admin: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email, user.full_name, bool(user.is_admin), user.created_at)
+
+
+class IdentityCache:
+    """Caches Identity by user id so signed-in requests skip the users table.
+
+    Entries live in the response cache backend and are keyed by the user's
+    ``user:<id>`` tag version, which committed User writes bump, so a profile
+    or admin change is seen on the next request (by every worker when the
+    backend is shared). The TTL bounds how long a removed user keeps a
+    cached identity.
+    """
+
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app, backend)
+
+    def init_app(self, app, backend):
+        self.backend = backend
+        self.ttl = app.config.get('IDENTITY_CACHE_TTL', 300)
+        app.extensions['identity_cache'] = self
+        app.before_request(_forget_current_user)
+        return self
+
+    def _key(self, user_id):
+        return f'identity:{user_id}|v={self.backend.get_counter(f"tag:user:{user_id}")}'
+
+    def get(self, user_id):
+        """Identity of ``user_id``, or None when the user no longer exists"""
+        key = self._key(user_id)
+        identity = self.backend.get(key) if self.ttl else None
+        if identity is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            identity = Identity.from_user(user)
+            if self.ttl:
+                self.backend.set(key, identity, self.ttl)
+        return identity
+
+
+def _forget_current_user():
+    # g outlives the request when an app context was already pushed (CLI, tests)
+    g.pop('_current_user', None)
+
+
+def _load_current_user():
+    if '_current_user' not in g:
+        user_id = session.get('user_id')
+        identity = current_app.extensions['identity_cache'].get(user_id) if user_id else None
+        if user_id and identity is None:
+            # The account was removed; sign the stale session out
+            for key in ('user_id', 'username', 'is_admin'):
+                session.pop(key, None)
+        elif identity is not None and session.get('is_admin') != identity.is_admin:
+            # The navigation reads is_admin from the session, so keep it in step
+            session['is_admin'] = identity.is_admin
+        g._current_user = identity
+    return g._current_user
+
+
+# The signed-in user's Identity for this request, or None (falsy) for visitors
+current_user = LocalProxy(_load_current_user)
+
+
+def current_user_is_admin():
+    """Whether the signed-in user is an admin now, read from the users table.
+
+    With a per-process cache backend a demotion made in another worker
+    only reaches this one when the TTL runs out, so admin pages pay one
+    primary-key lookup instead of trusting the cached identity.
+    """
+    if not current_user:
+        return False
+    is_admin = bool(db.session.scalar(select(User.is_admin).where(User.id == current_user.id)))
+    if session.get('is_admin') != is_admin:
+        session['is_admin'] = is_admin
+    return is_admin
@@ -0,0 +1,175 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from sentiment import classify_batch
+
+IMPORT_FORMATS = ('jsonl', 'csv')
+AGE_GROUPS = ('18-25', '26-35', '36-45', '46+')
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+
+# Errors beyond this are counted but not listed, to keep the report bounded
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class ImportReport:
+    """Outcome of a bulk import; ``errors`` holds (line, message) pairs"""
+    imported: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'error_count': self.error_count,
+            'errors': [{'line': line, 'error': message} for line, message in self.errors],
+        }
+
+
+def read_records(stream, fmt):
+    """Yield ``(line, record, error)`` for each JSONL line or CSV row of a text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            yield line, None, f'invalid JSON: {e}'
+            continue
+        if isinstance(record, dict):
+            yield line, record, None
+        else:
+            yield line, None, 'expected a JSON object'
+
+
+def _text(record, key):
+    """Stripped string value of ``key``, None when missing or blank; raises ValueError for other types"""
+    value = record.get(key)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'{key} must be a string')
+    return value.strip() or None
+
+
+def _whole_number(record, key):
+    """Integer value of ``key`` given as a JSON integer or a string of digits; raises ValueError"""
+    value = record.get(key)
+    if isinstance(value, str):
+        value = value.strip()
+        if value.lstrip('+-').isdigit():
+            return int(value)
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError(f'{key} must be a whole number')
+
+
+def _naive_utc(value):
+    # Stored timestamps are naive UTC; convert offsets such as a trailing Z
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def normalize_record(record, movie_id_type=int):
+    """Validated feedback fields of one record, before sentiment; raises ValueError"""
+    try:
+        # String ids (DynamoDB) are taken as given; any id may come as a JSON integer
+        if movie_id_type is int or not isinstance(record.get('movie_id'), str):
+            movie_id = _whole_number(record, 'movie_id')
+        else:
+            movie_id = _text(record, 'movie_id')
+    except ValueError:
+        movie_id = None
+    if movie_id is None:
+        raise ValueError('movie_id is missing or invalid')
+    movie_id = movie_id_type(movie_id)
+    rating = _whole_number(record, 'rating')
+    if not 1 <= rating <= 5:
+        raise ValueError('rating must be between 1 and 5')
+    review = _text(record, 'review')
+    if not review:
+        raise ValueError('review is required')
+    age_group = _text(record, 'age_group')
+    if age_group is not None and age_group not in AGE_GROUPS:
+        raise ValueError(f'age_group must be one of {", ".join(AGE_GROUPS)}')
+
+    created_at = _text(record, 'created_at')
+    watch_date = _text(record, 'watch_date')
+    try:
+        created_at = _naive_utc(datetime.fromisoformat(created_at)) if created_at else datetime.utcnow()
+        watch_date = date.fromisoformat(watch_date) if watch_date else created_at.date()
+    except ValueError:
+        raise ValueError('created_at and watch_date must be ISO dates')
+
+    would_recommend = record.get('would_recommend')
+    if isinstance(would_recommend, str):
+        would_recommend = would_recommend.strip().lower() in TRUE_VALUES
+    elif would_recommend is None:
+        would_recommend = rating >= 3
+    elif not isinstance(would_recommend, bool):
+        raise ValueError('would_recommend must be true or false')
+    return {
+        'movie_id': movie_id,
+        'customer_name': _text(record, 'customer_name') or 'Anonymous',
+        'customer_email': _text(record, 'customer_email') or '',
+        'rating': rating,
+        'review': review,
+        'watch_date': watch_date,
+        'age_group': age_group,
+        'would_recommend': would_recommend,
+        'created_at': created_at,
+    }
+
+
+def import_feedback(records, existing_movie_ids, write_batch, batch_size=500, movie_id_type=int):
+    """Validate and store feedback records in batches.
+
+    ``existing_movie_ids(ids)`` returns the subset of ids that exist (one
+    lookup per batch) and ``write_batch(rows)`` stores a batch of valid,
+    sentiment-scored rows and updates the aggregates once for the batch.
+    Invalid rows are reported and skipped; valid rows are still imported.
+    """
+    report = ImportReport()
+    batch = []
+
+    def flush():
+        known = existing_movie_ids({row['movie_id'] for _, row in batch})
+        valid = []
+        for line, row in batch:
+            if row['movie_id'] in known:
+                valid.append(row)
+            else:
+                report.add_error(line, f'movie {row["movie_id"]} does not exist')
+        scores = classify_batch([row['review'] for row in valid], [row['rating'] for row in valid])
+        for row, (sentiment, score) in zip(valid, scores):
+            row['sentiment'], row['sentiment_score'] = sentiment, score
+        if valid:
+            write_batch(valid)
+            report.imported += len(valid)
+        batch.clear()
+
+    for line, record, error in records:
+        if error is None:
+            try:
+                batch.append((line, normalize_record(record, movie_id_type)))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            report.add_error(line, error)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
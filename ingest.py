@@ -0,0 +1,241 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import insert, update, select
+from database import (db, User, Movie, Feedback, RollupCheckpoint, feedback_stats_delta,
+                      merge_stats_delta, apply_movie_stats_deltas)
+from rollups import load_checkpoint
+from cache import invalidate_on_commit
+from sentiment import classify_batch
+
+# Prefix of the checkpoint rows holding, per queue file, the highest queue id already written
+FEEDBACK_INGEST = 'feedback_ingest'
+
+
+class FeedbackQueue:
+    """Durable local queue of accepted feedback submissions.
+
+    Backed by its own SQLite file in WAL mode, so request threads and worker
+    processes on the host append without waiting on the main database lock.
+    Ids only grow (AUTOINCREMENT), which lets the writer record its progress
+    as a single high-water mark. Ids are only unique within one file, so
+    every file carries a random ``queue_id`` that names its checkpoint.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS pending ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, enqueued_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE TABLE IF NOT EXISTS queue_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        # The first process to open the file picks its id; the others read it back
+        conn.execute("INSERT OR IGNORE INTO queue_meta VALUES ('queue_id', ?)", (uuid.uuid4().hex,))
+        self.queue_id = conn.execute("SELECT value FROM queue_meta WHERE key = 'queue_id'").fetchone()[0]
+
+    @property
+    def checkpoint_name(self):
+        return f'{FEEDBACK_INGEST}:{self.queue_id}'
+
+    def _connection(self):
+        # One connection per thread and per process; sqlite3 handles must not cross a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def enqueue(self, payload):
+        """Append one submission; returns its queue id once it is on disk"""
+        cursor = self._connection().execute(
+            'INSERT INTO pending (payload, enqueued_at) VALUES (?, ?)',
+            (json.dumps(payload), time.time())
+        )
+        return cursor.lastrowid
+
+    def pending(self, after_id, limit):
+        """Up to ``limit`` queued submissions with an id above ``after_id``, oldest first"""
+        rows = self._connection().execute(
+            'SELECT id, payload FROM pending WHERE id > ? ORDER BY id LIMIT ?', (after_id, limit)
+        )
+        return [(queue_id, json.loads(payload)) for queue_id, payload in rows]
+
+    def ack(self, upto_id):
+        """Drop every submission up to and including ``upto_id``"""
+        self._connection().execute('DELETE FROM pending WHERE id <= ?', (upto_id,))
+
+    def depth(self):
+        return self._connection().execute('SELECT COUNT(*) FROM pending').fetchone()[0]
+
+
+def submission_payload(movie_id, user, rating, review, watch_date, age_group, would_recommend):
+    """JSON-safe payload of a validated feedback submission"""
+    return {
+        'movie_id': movie_id,
+        'user_id': user.id,
+        'customer_name': user.full_name or user.username,
+        'customer_email': user.email,
+        'rating': rating,
+        'review': review,
+        'watch_date': watch_date.isoformat(),
+        'age_group': age_group,
+        'would_recommend': would_recommend,
+        'created_at': datetime.utcnow().isoformat(),
+    }
+
+
+def feedback_row(payload):
+    """Column values of the Feedback row for a queued payload, before sentiment scoring"""
+    return {
+        'movie_id': payload['movie_id'],
+        'user_id': payload['user_id'],
+        'customer_name': payload['customer_name'],
+        'customer_email': payload['customer_email'],
+        'rating': payload['rating'],
+        'review': payload['review'],
+        'watch_date': date.fromisoformat(payload['watch_date']),
+        'age_group': payload['age_group'],
+        'would_recommend': payload['would_recommend'],
+        'created_at': datetime.fromisoformat(payload['created_at']),
+    }
+
+
+def existing_movie_ids(movie_ids):
+    """The subset of ``movie_ids`` that exist, in one IN query"""
+    if not movie_ids:
+        return set()
+    return set(db.session.execute(select(Movie.id).where(Movie.id.in_(movie_ids))).scalars())
+
+
+def existing_user_ids(user_ids):
+    """The subset of ``user_ids`` that exist, in one IN query"""
+    if not user_ids:
+        return set()
+    return set(db.session.execute(select(User.id).where(User.id.in_(user_ids))).scalars())
+
+
+def writable_rows(batch):
+    """Feedback rows for the queued ``batch`` whose references still exist.
+
+    A movie or user can be deleted while its submission waits in the queue.
+    Submissions for a deleted movie are logged and dropped; those of a
+    deleted user keep the review under the customer's name, without the
+    account link, like feedback left before signing in.
+    """
+    rows = [(queue_id, feedback_row(payload)) for queue_id, payload in batch]
+    movie_ids = existing_movie_ids({row['movie_id'] for _, row in rows})
+    user_ids = existing_user_ids({row['user_id'] for _, row in rows if row['user_id'] is not None})
+    writable = []
+    for queue_id, row in rows:
+        if row['movie_id'] not in movie_ids:
+            current_app.logger.warning(
+                f"Dropped queued feedback {queue_id}: movie {row['movie_id']} no longer exists")
+            continue
+        if row['user_id'] not in user_ids:
+            row['user_id'] = None
+        writable.append(row)
+    return writable
+
+
+def insert_feedback_rows(rows):
+    """Insert scored feedback rows with one multi-row statement and update movie_stats once per movie.
+    
+    Runs in the current transaction; the caller commits.
+    """
+    deltas = {}
+    for row in rows:
+        merge_stats_delta(deltas, row['movie_id'],
+                          feedback_stats_delta(row['rating'], row['sentiment'], row['would_recommend'],
+                                               created_at=row.get('created_at')))
+    db.session.execute(insert(Feedback.__table__), rows)
+    apply_movie_stats_deltas(db.session.connection(), deltas)
+    invalidate_on_commit(db.session, 'feedback', *(f'movie:{movie_id}' for movie_id in deltas))
+
+
+def drain_batch(queue, batch_size=None):
+    """Write the next batch of queued submissions in one transaction.
+
+    The feedback rows, their movie_stats increments and the checkpoint move
+    commit together, so a crash before the queue is acked never writes a
+    submission twice. The checkpoint belongs to this queue file, so only ids
+    that drains of this same queue wrote are ever acked. Submissions whose
+    movie was deleted meanwhile are dropped (see ``writable_rows``) and the
+    checkpoint still moves past them, so one bad item never blocks the
+    queue. Returns the number of queued submissions consumed, 0 when the
+    queue is empty or another writer took the batch.
+    """
+    batch_size = batch_size or current_app.config['FEEDBACK_INGEST_BATCH_SIZE']
+    checkpoint_name = queue.checkpoint_name
+    last_id = load_checkpoint(checkpoint_name).last_feedback_id
+    batch = queue.pending(last_id, batch_size)
+    if not batch:
+        # Rows left behind by a writer that committed but died before acking
+        if last_id:
+            queue.ack(last_id)
+        return 0
+
+    rows = writable_rows(batch)
+    if rows:
+        scores = classify_batch([row['review'] for row in rows], [row['rating'] for row in rows])
+        for row, (sentiment, score) in zip(rows, scores):
+            row['sentiment'], row['sentiment_score'] = sentiment, score
+        insert_feedback_rows(rows)
+    upper_id = batch[-1][0]
+    # Optimistic lock: only advance the mark we started from
+    advanced = db.session.execute(
+        update(RollupCheckpoint)
+        .where(RollupCheckpoint.name == checkpoint_name, RollupCheckpoint.last_feedback_id == last_id)
+        .values(last_feedback_id=upper_id, updated_at=datetime.utcnow())
+    ).rowcount
+    if advanced != 1:
+        db.session.rollback()
+        return 0
+    db.session.commit()
+    queue.ack(upper_id)
+    return len(batch)
+
+
+def drain(queue, batch_size=None):
+    """Write batches until the queue is empty. Returns the number of queued submissions consumed."""
+    total = 0
+    while True:
+        written = drain_batch(queue, batch_size)
+        if not written:
+            return total
+        total += written
+
+
+class IngestWriter(threading.Thread):
+    """Daemon thread that drains the feedback queue every ``interval`` seconds"""
+
+    def __init__(self, app, queue, interval):
+        super().__init__(name='feedback-ingest', daemon=True)
+        self.app = app
+        self.queue = queue
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    drain(self.queue)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.warning(f'Feedback ingestion failed: {e}')
+                finally:
+                    db.session.remove()
+
+    def stop(self):
+        self._stopped.set()
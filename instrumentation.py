@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from flask import Response, g, request
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_current = ContextVar("cinemapulse_request_record", default=None)
+
+
+@dataclass
+class RequestRecord:
+    """What a single request spent in the database and in AWS"""
+    endpoint: str
+    method: str
+    started: float = field(default_factory=time.perf_counter)
+    status: int = 500
+    wall_seconds: float = 0.0
+    statements: list = field(default_factory=list)  # (sql, seconds)
+    aws_calls: list = field(default_factory=list)   # (operation, seconds)
+
+    @property
+    def db_count(self):
+        return len(self.statements)
+
+    @property
+    def db_seconds(self):
+        return sum(seconds for _, seconds in self.statements)
+
+    @property
+    def aws_count(self):
+        return len(self.aws_calls)
+
+    @property
+    def aws_seconds(self):
+        return sum(seconds for _, seconds in self.aws_calls)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class RequestInstrumentation:
+    """Per-request SQL statement / AWS call counters exposed in Prometheus text format.
+
+    Hooks SQLAlchemy engine events and botocore client events; every request
+    gets a RequestRecord, and requests slower than ``slow_request_ms`` are
+    logged together with their most expensive statements.
+    """
+
+    def __init__(self, prefix="cinemapulse", slow_request_ms=500, history=100):
+        self.prefix = prefix
+        self.slow_request_ms = slow_request_ms
+        self.recent = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)                      # (endpoint, method, status)
+        self._buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self._duration = defaultdict(lambda: [0.0, 0])         # endpoint -> [sum, count]
+        self._db = defaultdict(lambda: [0, 0.0])               # endpoint -> [statements, seconds]
+        self._aws = defaultdict(lambda: [0, 0.0])              # (endpoint, operation) -> [calls, seconds]
+        self._gauges = {}
+
+    # ---------- wiring ----------
+
+    def init_app(self, app, metrics_path="/metrics"):
+        self.slow_request_ms = app.config.get("SLOW_REQUEST_MS", self.slow_request_ms)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule(metrics_path, "metrics", self.metrics_view)
+        return self
+
+    def instrument_engine(self, engine):
+        from sqlalchemy import event
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def instrument_boto_client(self, client):
+        client.meta.events.register("before-call.*.*", self._before_aws_call)
+        client.meta.events.register("after-call.*.*", self._after_aws_call)
+
+    def register_gauge(self, name, help_text, read):
+        """Expose ``read()`` as a gauge on the metrics endpoint"""
+        self._gauges[name] = (help_text, read)
+
+    # ---------- request lifecycle ----------
+
+    def _before_request(self):
+        record = RequestRecord(endpoint=request.endpoint or "unknown", method=request.method)
+        g._instrumentation_token = _current.set(record)
+
+    def _after_request(self, response):
+        record = _current.get()
+        if record is not None:
+            record.status = response.status_code
+        return response
+
+    def _teardown_request(self, exc):
+        record = _current.get()
+        token = g.pop("_instrumentation_token", None)
+        if token is not None:
+            _current.reset(token)
+        if record is None:
+            return
+        record.wall_seconds = time.perf_counter() - record.started
+        self._observe(record)
+        if record.wall_seconds * 1000 >= self.slow_request_ms:
+            self._log_slow(record)
+
+    def _observe(self, record):
+        endpoint = record.endpoint
+        with self._lock:
+            self.recent.append(record)
+            self._requests[(endpoint, record.method, record.status)] += 1
+            buckets = self._buckets[endpoint]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if record.wall_seconds <= bound:
+                    buckets[i] += 1
+            duration = self._duration[endpoint]
+            duration[0] += record.wall_seconds
+            duration[1] += 1
+            db = self._db[endpoint]
+            db[0] += record.db_count
+            db[1] += record.db_seconds
+            for operation, seconds in record.aws_calls:
+                aws = self._aws[(endpoint, operation)]
+                aws[0] += 1
+                aws[1] += seconds
+
+    def _log_slow(self, record):
+        worst = sorted(record.statements, key=lambda item: item[1], reverse=True)[:5]
+        lines = [f"  {seconds * 1000:.1f} ms  {' '.join(sql.split())[:300]}" for sql, seconds in worst]
+        logger.warning(
+            "Slow request %s %s: %.1f ms total, %d SQL statements (%.1f ms), %d AWS calls (%.1f ms)%s",
+            record.method, record.endpoint, record.wall_seconds * 1000,
+            record.db_count, record.db_seconds * 1000,
+            record.aws_count, record.aws_seconds * 1000,
+            ("\n" + "\n".join(lines)) if lines else "",
+        )
+
+    # ---------- SQLAlchemy / botocore hooks ----------
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._instrumentation_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        record = _current.get()
+        start = getattr(context, "_instrumentation_start", None)
+        if record is not None and start is not None:
+            record.statements.append((statement, time.perf_counter() - start))
+
+    def _before_aws_call(self, context=None, **kwargs):
+        if context is not None:
+            context["_instrumentation_start"] = time.perf_counter()
+
+    def _after_aws_call(self, model=None, context=None, **kwargs):
+        record = _current.get()
+        start = (context or {}).get("_instrumentation_start")
+        if record is not None and start is not None:
+            operation = f"{model.service_model.service_name}.{model.name}" if model is not None else "unknown"
+            record.aws_calls.append((operation, time.perf_counter() - start))
+
+    # ---------- exposition ----------
+
+    def render(self):
+        p = self.prefix
+        out = []
+
+        def header(name, kind, help_text):
+            out.append(f"# HELP {p}_{name} {help_text}")
+            out.append(f"# TYPE {p}_{name} {kind}")
+
+        with self._lock:
+            header("requests_total", "counter", "HTTP requests by endpoint, method and status.")
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                out.append(f"{p}_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}")
+
+            header("request_duration_seconds", "histogram", "Wall time per request.")
+            for endpoint, buckets in sorted(self._buckets.items()):
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    out.append(f"{p}_request_duration_seconds_bucket{_labels(endpoint=endpoint, le=bound)} {count}")
+                total, count = self._duration[endpoint]
+                out.append(f"{p}_request_duration_seconds_bucket{_labels(endpoint=endpoint, le='+Inf')} {count}")
+                out.append(f"{p}_request_duration_seconds_sum{_labels(endpoint=endpoint)} {total:.6f}")
+                out.append(f"{p}_request_duration_seconds_count{_labels(endpoint=endpoint)} {count}")
+
+            header("db_statements_total", "counter", "SQL statements executed while serving requests.")
+            for endpoint, (count, _) in sorted(self._db.items()):
+                out.append(f"{p}_db_statements_total{_labels(endpoint=endpoint)} {count}")
+            header("db_seconds_total", "counter", "Time spent executing SQL statements.")
+            for endpoint, (_, seconds) in sorted(self._db.items()):
+                out.append(f"{p}_db_seconds_total{_labels(endpoint=endpoint)} {seconds:.6f}")
+
+            header("aws_calls_total", "counter", "AWS API calls made while serving requests.")
+            for (endpoint, operation), (count, _) in sorted(self._aws.items()):
+                out.append(f"{p}_aws_calls_total{_labels(endpoint=endpoint, operation=operation)} {count}")
+            header("aws_seconds_total", "counter", "Time spent in AWS API calls.")
+            for (endpoint, operation), (_, seconds) in sorted(self._aws.items()):
+                out.append(f"{p}_aws_seconds_total{_labels(endpoint=endpoint, operation=operation)} {seconds:.6f}")
+
+        for name, (help_text, read) in sorted(self._gauges.items()):
+            header(name, "gauge", help_text)
+            out.append(f"{p}_{name} {read()}")
+        return "\n".join(out) + "\n"
+
+    def metrics_view(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,58 @@
+from sqlalchemy import inspect, text
+from database import (db, Movie, MovieGenre, Feedback, MovieStats, rebuild_movie_stats, rebuild_movie_genres,
+                      rebuild_rankings)
+
+
+def _add_missing_columns(connection, table, existing_columns):
+    added = []
+    for column in table.columns:
+        if column.name in existing_columns:
+            continue
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def upgrade_schema():
+    """Bring an existing database up to the current models.
+    
+    Idempotent: creates missing tables, adds missing (nullable) columns and
+    missing indexes, backfills the derived tables introduced since the
+    database was created, and refreshes planner statistics.
+    Returns a list of the changes made.
+    """
+    changes = []
+    engine = db.engine
+    existing_tables = set(inspect(engine).get_table_names())
+    db.create_all()
+    changes += [f'table {name}' for name in db.metadata.tables if name not in existing_tables]
+    
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            changes += [f'column {name}' for name in _add_missing_columns(connection, table, existing_columns)]
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=connection)
+                    changes.append(f'index {index.name}')
+    
+    if db.session.query(MovieStats).first() is None and db.session.query(Feedback).first() is not None:
+        rebuild_movie_stats()
+        changes.append('backfill movie_stats')
+    elif db.session.query(MovieStats).filter(MovieStats.bayes_score.is_(None)).first() is not None:
+        rebuild_rankings()
+        changes.append('backfill movie rankings')
+    if db.session.query(MovieGenre).first() is None and db.session.query(Movie).first() is not None:
+        rebuild_movie_genres()
+        changes.append('backfill movie_genres')
+    db.session.commit()
+    
+    if changes:
+        with engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+    return changes
@@ -0,0 +1,173 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest")
+SNS_MAX_BATCH = 10  # PublishBatch accepts at most 10 entries
+
+
+class NotificationDispatcher:
+    """Publishes notifications from background threads through a bounded queue.
+
+    Messages submitted within ``linger`` seconds of each other are coalesced
+    into a single ``publish_batch`` call of up to ``batch_size`` entries, so
+    request handlers never wait on the network.
+
+    ``publish_batch`` receives a list of ``(subject, message)`` tuples and
+    returns the number of entries that failed.
+    """
+
+    def __init__(self, publish_batch, max_queue_size=1000, workers=1, batch_size=SNS_MAX_BATCH,
+                 linger=0.05, overflow="drop_newest", block_timeout=0.1):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.publish_batch = publish_batch
+        self.workers = workers
+        self.batch_size = min(batch_size, SNS_MAX_BATCH)
+        self.linger = linger
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self._stopping = threading.Event()
+        self._counters = dict.fromkeys(
+            ("submitted", "published", "failed", "dropped", "batches"), 0)
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    # ---------- producer side ----------
+
+    def submit(self, subject, message):
+        """Queue a notification. Returns False when it was dropped."""
+        self._ensure_started()
+        entry = (time.monotonic(), subject, message)
+        try:
+            if self.overflow == "block":
+                self._queue.put(entry, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            if self.overflow != "drop_oldest" or not self._evict_oldest():
+                self._count("dropped")
+                return False
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                self._count("dropped")
+                return False
+        self._count("submitted")
+        return True
+
+    def _evict_oldest(self):
+        try:
+            self._queue.get_nowait()
+        except queue.Empty:
+            return False
+        self._queue.task_done()
+        self._count("dropped")
+        return True
+
+    # ---------- consumer side ----------
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so a forked worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"notification-dispatcher-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._send(batch)
+
+    def _send(self, batch):
+        try:
+            failed = self.publish_batch([(subject, message) for _, subject, message in batch])
+        except Exception as e:
+            logger.warning("Notification batch of %d failed: %s", len(batch), e)
+            failed = len(batch)
+        now = time.monotonic()
+        with self._lock:
+            self._counters["batches"] += 1
+            self._counters["failed"] += failed
+            self._counters["published"] += len(batch) - failed
+            for queued_at, _, _ in batch:
+                latency = now - queued_at
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+        for _ in batch:
+            self._queue.task_done()
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    # ---------- lifecycle ----------
+
+    def flush(self, timeout=5.0):
+        """Wait until every queued notification was handed to SNS. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=5.0):
+        """Flush pending notifications and stop the worker threads"""
+        if self._pid != os.getpid():
+            return True
+        flushed = self.flush(timeout)
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._pid = None
+        return flushed
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._counters)
+            finished = metrics["published"] + metrics["failed"]
+            metrics["latency_avg_ms"] = round(self._latency_total / finished * 1000, 2) if finished else 0.0
+            metrics["latency_max_ms"] = round(self._latency_max * 1000, 2)
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["queue_capacity"] = self._queue.maxsize
+        return metrics
+
+    def register_shutdown(self, timeout=5.0):
+        atexit.register(self.shutdown, timeout)
+        return self
@@ -0,0 +1,79 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+from database import db
+
+
+@dataclass
+class KeysetPage:
+    """One page of a keyset-paginated query"""
+    items: list
+    next_cursor: str = None
+    
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _dump(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _load(value, column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    payload = json.dumps([_dump(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor into typed values, or None when missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns) or None in values:
+            return None
+        return [_load(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError):
+        return None
+
+
+def _after(columns, values):
+    # Row-value comparison (a, b) < (x, y) spelled out for every backend
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, column < values[i]))
+    return or_(*clauses)
+
+
+def keyset_paginate(stmt, columns, cursor=None, per_page=20):
+    """Return the page of ``stmt`` that follows ``cursor``, ordered by ``columns`` descending.
+    
+    ``columns`` must end with a unique column (usually the primary key) so
+    the ordering is total. Fetches one extra row to detect the next page.
+    """
+    values = decode_cursor(cursor, columns)
+    if values is not None:
+        stmt = stmt.where(_after(columns, values))
+    stmt = stmt.order_by(*[column.desc() for column in columns]).limit(per_page + 1)
+    rows = db.session.execute(stmt).scalars().all()
+    
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return KeysetPage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,107 @@
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+
+class HasherBusy(Exception):
+    """More password checks are waiting than the pool accepts, or one timed out"""
+
+
+class PasswordHasher:
+    """Password hashing with configurable parameters and a bounded verification pool.
+
+    hashlib's PBKDF2 and scrypt release the GIL, so a small thread pool runs
+    checks in parallel while capping how many cores a login burst can take
+    from the request workers. Beyond ``max_pending`` waiting checks callers
+    get HasherBusy instead of queueing without bound. Hashes made with other
+    parameters still verify and are reported for rehashing.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=None, max_pending=None, timeout=10):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.configure(method, workers, max_pending, timeout)
+
+    def configure(self, method=DEFAULT_METHOD, workers=None, max_pending=None, timeout=10):
+        self.method = method
+        self._prefix = None
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 8
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor, self._pid = None, None
+        return self
+
+    def _pool(self):
+        # Threads do not survive a fork, so each worker process builds its own pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hasher')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(timeout=self.timeout):
+            raise HasherBusy('too many password checks in progress')
+        try:
+            return self._pool().submit(fn, *args).result(self.timeout)
+        except TimeoutError:
+            raise HasherBusy('password check timed out')
+        finally:
+            slots.release()
+
+    @property
+    def prefix(self):
+        """Method of new hashes with every parameter spelled out, e.g. pbkdf2:sha256:600000"""
+        if self._prefix is None:
+            self._prefix = self.hash('').split('$', 1)[0]
+        return self._prefix
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.prefix
+
+    def verify(self, pwhash, password, plaintext=False):
+        """Check ``password``; ``plaintext`` says ``pwhash`` is a legacy unhashed password.
+
+        The caller knows which attribute it read, so the value itself is
+        never sniffed: a plaintext password may well contain '$'.
+        """
+        if not pwhash:
+            return False
+        if plaintext:
+            return hmac.compare_digest(pwhash.encode(), password.encode())
+        try:
+            return self._run(check_password_hash, pwhash, password)
+        except ValueError:
+            # Not a hash werkzeug knows; no password matches it
+            return False
+
+    def verify_and_update(self, pwhash, password, plaintext=False):
+        """``(valid, new_hash)``; ``new_hash`` is set when the stored value should be replaced"""
+        if not self.verify(pwhash, password, plaintext):
+            return False, None
+        if not plaintext and not self.needs_rehash(pwhash):
+            return True, None
+        return True, self.hash(password)
+
+
+hasher = PasswordHasher()
+
+
+def current_hasher():
+    """The hasher of the current app (``app.extensions['password_hasher']``), else the module one"""
+    if has_app_context():
+        return current_app.extensions.get('password_hasher', hasher)
+    return hasher
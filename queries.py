@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from sqlalchemy import func, desc, select
+from sqlalchemy.orm import joinedload, load_only
+from database import db, Movie, Feedback
+from pagination import keyset_paginate
+
+# Columns the review lists render; the rest of the row (email, scores) is never loaded
+REVIEW_COLUMNS = (
+    Feedback.customer_name, Feedback.rating, Feedback.review, Feedback.sentiment,
+    Feedback.watch_date, Feedback.would_recommend, Feedback.created_at, Feedback.movie_id,
+)
+
+
+def _with_movie_title():
+    # Many-to-one, so a join in the same query instead of one lazy load per review
+    return joinedload(Feedback.movie).load_only(Movie.id, Movie.title)
+
+
+@dataclass
+class ReviewSummary:
+    """A user's review totals, computed in SQL rather than from the loaded page"""
+    review_count: int = 0
+    avg_rating: float = 0.0
+    movies_reviewed: int = 0
+
+
+def user_review_summary(user_id):
+    count, average, movies = db.session.execute(
+        select(func.count(Feedback.id), func.avg(Feedback.rating), func.count(Feedback.movie_id.distinct()))
+        .where(Feedback.user_id == user_id)
+    ).one()
+    return ReviewSummary(count, round(float(average or 0), 1), movies)
+
+
+def user_feedback_page(user_id, cursor=None, per_page=20):
+    """One keyset page of a user's reviews, newest first, with the movie titles"""
+    stmt = (
+        select(Feedback)
+        .where(Feedback.user_id == user_id)
+        .options(load_only(*REVIEW_COLUMNS), _with_movie_title())
+    )
+    return keyset_paginate(stmt, (Feedback.created_at, Feedback.id), cursor, per_page)
+
+
+def movie_feedbacks(movie_id, limit=10):
+    """Newest reviews of one movie; the page already has the movie, so it is not joined"""
+    return db.session.execute(
+        select(Feedback)
+        .where(Feedback.movie_id == movie_id)
+        .options(load_only(*REVIEW_COLUMNS))
+        .order_by(desc(Feedback.created_at), desc(Feedback.id))
+        .limit(limit)
+    ).scalars().all()
+
+
+def recent_feedbacks(limit=10):
+    """Newest reviews across the catalog, with the movie titles"""
+    return db.session.execute(
+        select(Feedback)
+        .options(load_only(*REVIEW_COLUMNS), _with_movie_title())
+        .order_by(desc(Feedback.created_at), desc(Feedback.id))
+        .limit(limit)
+    ).scalars().all()
@@ -0,0 +1,85 @@
+import random
+import time
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_METHODS = ('GET', 'HEAD')
+
+
+def replica_binds(config, options=None):
+    """SQLALCHEMY_BINDS entries for the configured read replicas"""
+    binds = {}
+    for i, uri in enumerate(config.get('SQLALCHEMY_REPLICA_URIS') or ()):
+        binds[f'{REPLICA_BIND_PREFIX}{i}'] = {'url': uri, **(options(uri) if options else {})}
+    return binds
+
+
+def _is_read(clause):
+    # Locking reads must see and hold the primary's rows
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+
+class RoutingSession(Session):
+    """Sends the SELECTs of GET requests to a read replica.
+
+    Everything else goes to the primary: writes, reads outside a request,
+    reads after the session wrote, and every read of a client that wrote
+    within READ_YOUR_WRITES_SECONDS, so a redirect after a form post sees
+    its own data. One replica is picked per request and kept for its reads.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            if _is_read(clause):
+                replica = self._read_replica()
+                if replica is not None:
+                    return replica
+            else:
+                self._wrote()
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+    def _read_replica(self):
+        if 'read_bind' not in self.info:
+            self.info['read_bind'] = self._choose_replica()
+        return self.info['read_bind']
+
+    def _choose_replica(self):
+        if not has_request_context() or request.method not in READ_METHODS:
+            return None
+        if session.get('primary_until', 0) > time.time():
+            return None
+        replicas = [engine for key, engine in self._db.engines.items()
+                    if key and key.startswith(REPLICA_BIND_PREFIX)]
+        return random.choice(replicas) if replicas else None
+
+    def _wrote(self):
+        self.info['read_bind'] = None
+        if has_request_context():
+            g._wrote_primary = True
+
+
+def read_from_primary(session):
+    """Send the rest of this request's reads on ``session`` to the primary"""
+    session.info['read_bind'] = None
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _route_reads_to_primary(session, flush_context):
+    session._wrote()
+
+
+def init_read_routing(app, db):
+    """Per-request routing state for ``app``; call after ``db.init_app(app)``"""
+    @app.before_request
+    def reset_read_bind():
+        # The session outlives the request when an app context was already pushed
+        db.session.info.pop('read_bind', None)
+        g.pop('_wrote_primary', None)
+
+    @app.after_request
+    def pin_to_primary(response):
+        if g.pop('_wrote_primary', False):
+            session['primary_until'] = time.time() + app.config.get('READ_YOUR_WRITES_SECONDS', 10)
+        return response
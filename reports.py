@@ -0,0 +1,156 @@
+from dataclasses import dataclass, field, fields
+from sqlalchemy import func, desc, select
+from sqlalchemy.orm import contains_eager
+from database import db, Movie, Feedback, MovieStats, SENTIMENTS
+from rollups import daily_series
+from queries import recent_feedbacks
+
+
+@dataclass
+class TopMovie:
+    """A movie row of the top rated table"""
+    movie: Movie
+    avg_rating: float
+    total_feedbacks: int
+
+
+@dataclass
+class FeedbackTotals:
+    """Catalog-wide feedback totals summed from movie_stats"""
+    total_feedbacks: int = 0
+    rating_sum: int = 0
+    rating_dist: dict = field(default_factory=lambda: {i: 0 for i in range(1, 6)})
+    sentiment_stats: dict = field(default_factory=lambda: {s: 0 for s in SENTIMENTS})
+    
+    @property
+    def avg_rating(self):
+        if not self.total_feedbacks:
+            return 0.0
+        return round(self.rating_sum / self.total_feedbacks, 1)
+
+
+@dataclass
+class DashboardReport:
+    """Everything the analytics dashboard renders"""
+    total_movies: int
+    total_feedbacks: int
+    avg_rating: float
+    top_movies: list
+    sentiment_stats: dict
+    rating_dist: dict
+    age_distribution: dict
+    recent_feedbacks: list
+    daily_trend: list = field(default_factory=list)
+    
+    def as_context(self):
+        """Template context, without deep-copying the ORM objects like asdict() would"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def feedback_totals():
+    """Sum the materialized per-movie aggregates in a single query"""
+    columns = [
+        MovieStats.feedback_count, MovieStats.rating_sum,
+        MovieStats.rating_1, MovieStats.rating_2, MovieStats.rating_3,
+        MovieStats.rating_4, MovieStats.rating_5,
+        MovieStats.positive_count, MovieStats.neutral_count, MovieStats.negative_count,
+    ]
+    row = db.session.execute(
+        select(*[func.coalesce(func.sum(column), 0) for column in columns])
+    ).one()
+    row = [int(value) for value in row]
+    return FeedbackTotals(
+        total_feedbacks=row[0],
+        rating_sum=row[1],
+        rating_dist={i: row[1 + i] for i in range(1, 6)},
+        sentiment_stats=dict(zip(SENTIMENTS, row[7:10])),
+    )
+
+
+def _ranked_movies(score, limit):
+    # Walks the score index from the top, so only ``limit`` rows are read
+    return db.session.execute(
+        select(Movie)
+        .join(Movie.stats)
+        .options(contains_eager(Movie.stats))
+        .where(MovieStats.feedback_count > 0)
+        .order_by(desc(score), Movie.id)
+        .limit(limit)
+    ).scalars().all()
+
+
+def top_rated_movies(limit=5):
+    """Best rated movies by Bayesian average, so a handful of ratings cannot top the chart"""
+    rows = _ranked_movies(MovieStats.bayes_score, limit)
+    return [
+        TopMovie(movie=movie, avg_rating=movie.average_rating, total_feedbacks=movie.total_feedbacks)
+        for movie in rows
+    ]
+
+
+def trending_movies(limit=5):
+    """Movies with the most rating-weighted recent feedback"""
+    return _ranked_movies(MovieStats.trend_score, limit)
+
+
+def age_distribution():
+    rows = db.session.execute(
+        select(Feedback.age_group, func.count(Feedback.id)).group_by(Feedback.age_group)
+    ).all()
+    return {age: count for age, count in rows}
+
+
+FEEDBACK_EXPORT_COLUMNS = (
+    'id', 'movie_id', 'movie_title', 'user_id', 'rating', 'review', 'sentiment', 'sentiment_score',
+    'age_group', 'would_recommend', 'watch_date', 'created_at',
+)
+
+
+def feedback_export_rows(filters, batch_size=1000):
+    """Feedbacks matching an ``export.ExportFilter`` as dicts, oldest first.
+    
+    Validates the filters up front and returns a generator that streams the
+    rows through a server-side cursor, ``batch_size`` at a time.
+    """
+    stmt = (
+        select(Feedback.id, Feedback.movie_id, Movie.title.label('movie_title'), Feedback.user_id,
+               Feedback.rating, Feedback.review, Feedback.sentiment, Feedback.sentiment_score,
+               Feedback.age_group, Feedback.would_recommend, Feedback.watch_date, Feedback.created_at)
+        .join(Movie, Movie.id == Feedback.movie_id)
+        .order_by(Feedback.created_at, Feedback.id)
+    )
+    if filters.movie_id is not None:
+        stmt = stmt.where(Feedback.movie_id == int(filters.movie_id))
+    if filters.start is not None:
+        stmt = stmt.where(Feedback.created_at >= filters.start_at)
+    if filters.end is not None:
+        stmt = stmt.where(Feedback.created_at < filters.end_before)
+    if filters.sentiment is not None:
+        stmt = stmt.where(Feedback.sentiment == filters.sentiment)
+    
+    def rows():
+        result = db.session.connection().execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(stmt)
+        for row in result:
+            yield row._asdict()
+    return rows()
+
+
+def build_dashboard_report():
+    """Build the analytics dashboard in a fixed number of grouped queries.
+    
+    The query count does not depend on the size of the catalog.
+    """
+    totals = feedback_totals()
+    return DashboardReport(
+        total_movies=db.session.scalar(select(func.count(Movie.id))),
+        total_feedbacks=totals.total_feedbacks,
+        avg_rating=totals.avg_rating,
+        top_movies=top_rated_movies(),
+        sentiment_stats=totals.sentiment_stats,
+        rating_dist=totals.rating_dist,
+        age_distribution=age_distribution(),
+        recent_feedbacks=recent_feedbacks(),
+        daily_trend=daily_series(),
+    )
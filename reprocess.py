@@ -0,0 +1,162 @@
+import multiprocessing
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import create_engine, select, update, insert, func, bindparam
+from database import Feedback, RollupCheckpoint
+from engine_options import engine_options, configure_engine
+from sentiment import classify_batch
+
+feedbacks = Feedback.__table__
+checkpoints = RollupCheckpoint.__table__
+
+
+@dataclass(frozen=True)
+class Processor:
+    """A derived Feedback field that can be recomputed from other columns"""
+    inputs: tuple
+    outputs: tuple
+    compute: object  # list of rows -> list of output tuples, same order
+    affects_stats: bool = False
+
+
+def _sentiment(rows):
+    return classify_batch([row.review for row in rows], [row.rating for row in rows])
+
+
+PROCESSORS = {
+    'sentiment': Processor(('review', 'rating'), ('sentiment', 'sentiment_score'), _sentiment,
+                           affects_stats=True),
+}
+
+
+def checkpoint_name(processor_name):
+    return f'reprocess_{processor_name}'
+
+
+# ---------- worker side ----------
+
+_engine = None
+
+
+def _init_worker(url):
+    global _engine
+    # Concurrent writers on SQLite wait for the lock instead of failing
+    settings = {'SQLITE_BUSY_TIMEOUT_MS': 60000, 'DB_POOL_SIZE': 1, 'DB_MAX_OVERFLOW': 1}
+    _engine = configure_engine(create_engine(url, **engine_options(url, settings)), settings)
+
+
+def process_chunk(processor_name, lower_id, upper_id, batch_size=2000, engine=None):
+    """Recompute one processor over feedbacks with id in (lower_id, upper_id].
+
+    Rows are streamed with a server-side cursor and scored one partition at
+    a time; only rows whose outputs changed are written, with a single
+    executemany UPDATE once the read cursor is closed.
+    Returns ``(lower_id, upper_id, scanned, updated)``.
+    """
+    engine = engine or _engine
+    processor = PROCESSORS[processor_name]
+    columns = [feedbacks.c.id, *(feedbacks.c[name] for name in processor.inputs + processor.outputs)]
+    stmt = (
+        select(*columns)
+        .where(feedbacks.c.id > lower_id, feedbacks.c.id <= upper_id)
+        .order_by(feedbacks.c.id)
+    )
+    scanned, changes = 0, []
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+        for rows in result.partitions():
+            scanned += len(rows)
+            for row, values in zip(rows, processor.compute(rows)):
+                current = tuple(getattr(row, name) for name in processor.outputs)
+                if tuple(values) != current:
+                    changes.append({'b_id': row.id, **{f'b_{name}': value
+                                                       for name, value in zip(processor.outputs, values)}})
+    if changes:
+        with engine.begin() as connection:
+            connection.execute(
+                update(feedbacks)
+                .where(feedbacks.c.id == bindparam('b_id'))
+                .values({name: bindparam(f'b_{name}') for name in processor.outputs}),
+                changes,
+            )
+    return lower_id, upper_id, scanned, len(changes)
+
+
+def _process_chunk(args):
+    return process_chunk(*args)
+
+
+# ---------- coordinator side ----------
+
+def _watermark(engine, name):
+    with engine.connect() as connection:
+        value = connection.scalar(select(checkpoints.c.last_feedback_id).where(checkpoints.c.name == name))
+    return value or 0
+
+
+def _save_watermark(engine, name, value):
+    with engine.begin() as connection:
+        saved = connection.execute(
+            update(checkpoints).where(checkpoints.c.name == name)
+            .values(last_feedback_id=value, updated_at=datetime.utcnow())
+        ).rowcount
+        if not saved:
+            connection.execute(insert(checkpoints).values(name=name, last_feedback_id=value,
+                                                          updated_at=datetime.utcnow()))
+
+
+def reprocess(engine, processor_name, workers=None, chunk_size=20000, batch_size=2000,
+              restart=False, progress=None):
+    """Recompute a derived Feedback field over the whole table in parallel.
+
+    The id space past the checkpoint is cut into fixed ranges that a process
+    pool handles in any order. The checkpoint only advances over a
+    contiguous prefix of finished ranges, so an interrupted run resumes
+    there and at worst recomputes a few ranges, which is harmless because
+    unchanged rows are not written. ``restart`` discards the progress of an
+    interrupted run. Aggregates are left to the caller.
+    Returns ``(scanned, updated)``.
+    """
+    if processor_name not in PROCESSORS:
+        raise ValueError(f'Unknown processor {processor_name!r}; choose from {", ".join(PROCESSORS)}')
+    name = checkpoint_name(processor_name)
+    if restart:
+        _save_watermark(engine, name, 0)
+    start = _watermark(engine, name)
+    with engine.connect() as connection:
+        max_id = connection.scalar(select(func.max(feedbacks.c.id))) or 0
+    ranges = [(lower, min(lower + chunk_size, max_id)) for lower in range(start, max_id, chunk_size)]
+    tasks = [(processor_name, lower, upper, batch_size) for lower, upper in ranges]
+
+    finished, watermark = {}, start
+    scanned = updated = 0
+    workers = workers or multiprocessing.cpu_count()
+    if workers <= 1 or len(tasks) <= 1:
+        results = (process_chunk(*task, engine=engine) for task in tasks)
+        pool = None
+    else:
+        # spawn: the web app may have background threads that must not be forked
+        context = multiprocessing.get_context('spawn')
+        url = engine.url.render_as_string(hide_password=False)
+        pool = context.Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(url,))
+        results = pool.imap_unordered(_process_chunk, tasks)
+    try:
+        for lower, upper, chunk_scanned, chunk_updated in results:
+            scanned += chunk_scanned
+            updated += chunk_updated
+            finished[lower] = upper
+            while watermark in finished:
+                watermark = finished.pop(watermark)
+            _save_watermark(engine, name, watermark)
+            if progress:
+                progress(scanned, updated, watermark, max_id)
+    except BaseException:
+        if pool is not None:
+            pool.terminate()
+        raise
+    if pool is not None:
+        pool.close()
+        pool.join()
+    # A finished pass leaves nothing to resume; the next run starts from scratch
+    _save_watermark(engine, name, 0)
+    return scanned, updated
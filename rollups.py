@@ -0,0 +1,211 @@
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, case, select, update
+from sqlalchemy.exc import IntegrityError
+from database import db, Feedback, Analytics, RollupCheckpoint
+
+DAILY_ROLLUP = 'analytics_daily'
+
+
+@dataclass
+class DailyPoint:
+    """Feedback activity of a single day"""
+    date: date
+    total_feedbacks: int = 0
+    average_rating: float = 0.0
+    positive_count: int = 0
+    neutral_count: int = 0
+    negative_count: int = 0
+    
+    def merge(self, total, rating_sum, positive, neutral, negative):
+        combined = self.total_feedbacks + total
+        if combined:
+            self.average_rating = (self.average_rating * self.total_feedbacks + rating_sum) / combined
+        self.total_feedbacks = combined
+        self.positive_count += positive
+        self.neutral_count += neutral
+        self.negative_count += negative
+
+
+def _as_date(value):
+    # func.date() returns an ISO string on SQLite and a date on PostgreSQL
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _grouped_by_day(lower_id, upper_id=None, since=None):
+    """Per-day feedback sums for the id range (lower_id, upper_id]"""
+    day = func.date(Feedback.created_at)
+    stmt = select(
+        day,
+        func.count(Feedback.id),
+        func.coalesce(func.sum(Feedback.rating), 0),
+        func.sum(case((Feedback.sentiment == 'positive', 1), else_=0)),
+        func.sum(case((Feedback.sentiment == 'neutral', 1), else_=0)),
+        func.sum(case((Feedback.sentiment == 'negative', 1), else_=0)),
+    ).where(Feedback.id > lower_id).group_by(day)
+    if upper_id is not None:
+        stmt = stmt.where(Feedback.id <= upper_id)
+    if since is not None:
+        stmt = stmt.where(Feedback.created_at >= since)
+    return [(_as_date(row[0]), *(int(v or 0) for v in row[1:])) for row in db.session.execute(stmt)]
+
+
+def load_checkpoint(name=DAILY_ROLLUP):
+    """The named checkpoint row, created at zero on first use"""
+    checkpoint = db.session.get(RollupCheckpoint, name)
+    if checkpoint is None:
+        try:
+            db.session.add(RollupCheckpoint(name=name, last_feedback_id=0))
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created it first
+            db.session.rollback()
+        checkpoint = db.session.get(RollupCheckpoint, name)
+    return checkpoint
+
+
+def _next_upper_id(last_id, batch_size, cutoff):
+    """Highest feedback id of the next batch, stopping before rows newer than ``cutoff``.
+    
+    The lag gives in-flight transactions that hold lower ids time to commit
+    before the high-water mark moves past them.
+    """
+    batch = (
+        select(Feedback.id, Feedback.created_at)
+        .where(Feedback.id > last_id)
+        .order_by(Feedback.id)
+        .limit(batch_size)
+        .subquery()
+    )
+    too_new = db.session.scalar(select(func.min(batch.c.id)).where(batch.c.created_at > cutoff))
+    if too_new is not None:
+        return too_new - 1 if too_new - 1 > last_id else None
+    return db.session.scalar(select(func.max(batch.c.id)))
+
+
+def fold_batch(batch_size=None, lag_seconds=None):
+    """Fold the next batch of feedbacks past the high-water mark into daily Analytics rows.
+    
+    Returns the number of feedbacks folded, 0 when caught up or when another
+    worker advanced the checkpoint concurrently.
+    """
+    config = current_app.config
+    batch_size = batch_size or config['ANALYTICS_ROLLUP_BATCH_SIZE']
+    if lag_seconds is None:
+        lag_seconds = config['ANALYTICS_ROLLUP_LAG_SECONDS']
+    
+    checkpoint = load_checkpoint()
+    last_id = checkpoint.last_feedback_id
+    cutoff = datetime.utcnow() - timedelta(seconds=lag_seconds)
+    upper_id = _next_upper_id(last_id, batch_size, cutoff)
+    if upper_id is None:
+        return 0
+    
+    folded = 0
+    try:
+        for day, total, rating_sum, positive, neutral, negative in _grouped_by_day(last_id, upper_id):
+            row = Analytics.query.filter_by(date=day).first()
+            if row is None:
+                row = Analytics(date=day, total_feedbacks=0, average_rating=0.0,
+                                positive_count=0, neutral_count=0, negative_count=0)
+                db.session.add(row)
+            point = DailyPoint(day, row.total_feedbacks, row.average_rating,
+                               row.positive_count, row.neutral_count, row.negative_count)
+            point.merge(total, rating_sum, positive, neutral, negative)
+            row.total_feedbacks = point.total_feedbacks
+            row.average_rating = point.average_rating
+            row.positive_count = point.positive_count
+            row.neutral_count = point.neutral_count
+            row.negative_count = point.negative_count
+            folded += total
+        
+        last_created_at = db.session.scalar(select(Feedback.created_at).where(Feedback.id == upper_id))
+        # Optimistic lock: only advance the mark we started from
+        advanced = db.session.execute(
+            update(RollupCheckpoint)
+            .where(RollupCheckpoint.name == DAILY_ROLLUP, RollupCheckpoint.last_feedback_id == last_id)
+            .values(last_feedback_id=upper_id, last_created_at=last_created_at, updated_at=datetime.utcnow())
+        ).rowcount
+        if advanced != 1:
+            db.session.rollback()
+            return 0
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return 0
+    return folded
+
+
+def run_rollup(batch_size=None, lag_seconds=None):
+    """Fold batches until caught up. Returns the number of feedbacks folded."""
+    total = 0
+    while True:
+        folded = fold_batch(batch_size, lag_seconds)
+        if not folded:
+            return total
+        total += folded
+
+
+def rebuild_rollups():
+    """Discard every daily rollup and fold all feedbacks again.
+    
+    Rollups only ever fold in new feedbacks, so this is the repair path after
+    feedbacks below the high-water mark are edited or deleted; the rescore and
+    reprocess commands already call it.
+    """
+    db.session.query(Analytics).delete()
+    db.session.query(RollupCheckpoint).filter_by(name=DAILY_ROLLUP).delete()
+    db.session.commit()
+    return run_rollup(lag_seconds=0)
+
+
+def daily_series(days=30):
+    """Daily activity for the last ``days`` days.
+    
+    Reads the Analytics rollups and adds the few feedbacks past the
+    high-water mark, so the series is current without scanning history.
+    Edits and deletions of already folded feedbacks show up only after
+    ``flask rollup-analytics --rebuild``.
+    """
+    since = date.today() - timedelta(days=days - 1)
+    points = {
+        row.date: DailyPoint(row.date, row.total_feedbacks, row.average_rating,
+                             row.positive_count, row.neutral_count, row.negative_count)
+        for row in Analytics.query.filter(Analytics.date >= since)
+    }
+    checkpoint = db.session.get(RollupCheckpoint, DAILY_ROLLUP)
+    last_id = checkpoint.last_feedback_id if checkpoint else 0
+    since_start = datetime.combine(since, datetime.min.time())
+    for day, total, rating_sum, positive, neutral, negative in _grouped_by_day(last_id, since=since_start):
+        points.setdefault(day, DailyPoint(day)).merge(total, rating_sum, positive, neutral, negative)
+    for point in points.values():
+        point.average_rating = round(point.average_rating, 1)
+    return [points[day] for day in sorted(points)]
+
+
+class RollupScheduler(threading.Thread):
+    """Daemon thread that folds new feedbacks into the rollups every ``interval`` seconds"""
+    
+    def __init__(self, app, interval):
+        super().__init__(name='analytics-rollup', daemon=True)
+        self.app = app
+        self.interval = interval
+        self._stopped = threading.Event()
+    
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    run_rollup()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.warning(f'Analytics rollup failed: {e}')
+                finally:
+                    db.session.remove()
+    
+    def stop(self):
+        self._stopped.set()
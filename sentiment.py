@@ -0,0 +1,187 @@
+import math
+import re
+
+# Word valences on a -4..4 scale, tuned for movie reviews
+LEXICON = {
+    # positive
+    'amazing': 3.1, 'awesome': 3.1, 'beautiful': 2.9, 'beautifully': 2.9, 'best': 3.2,
+    'breathtaking': 3.2, 'brilliant': 3.2, 'brilliantly': 3.2, 'captivating': 2.8, 'charming': 2.4,
+    'clever': 2.1, 'compelling': 2.4, 'decent': 1.2, 'delight': 2.8, 'delightful': 2.9,
+    'engaging': 2.2, 'enjoy': 2.2, 'enjoyable': 2.4, 'enjoyed': 2.3, 'entertaining': 2.2,
+    'epic': 2.5, 'excellent': 3.2, 'exceptional': 3.1, 'exciting': 2.4, 'fantastic': 3.1,
+    'favorite': 2.6, 'favourite': 2.6, 'flawless': 3.1, 'flawlessly': 3.1, 'fun': 2.3,
+    'funny': 1.9, 'gem': 2.7, 'gorgeous': 2.9, 'great': 3.1, 'gripping': 2.5,
+    'good': 1.9, 'groundbreaking': 2.6, 'happy': 2.7, 'hilarious': 2.6, 'immersed': 1.8,
+    'immersive': 2.2, 'impressive': 2.5, 'incredible': 2.8, 'inspiring': 2.6, 'love': 3.2,
+    'loved': 2.9, 'lovely': 2.8, 'magnificent': 3.2, 'masterpiece': 3.4, 'memorable': 2.3,
+    'moving': 1.9, 'nice': 1.8, 'outstanding': 3.2, 'perfect': 3.2, 'perfectly': 3.0,
+    'phenomenal': 3.3, 'powerful': 2.2, 'recommend': 2.1, 'recommended': 2.1, 'remarkable': 2.7,
+    'satisfying': 2.1, 'solid': 1.7, 'spectacular': 3.1, 'strong': 1.6, 'stunning': 3.0,
+    'superb': 3.2, 'terrific': 3.0, 'thrilling': 2.6, 'touching': 2.1, 'watchable': 1.0,
+    'wonderful': 3.1, 'worth': 1.8, 'wow': 2.6,
+    # negative
+    'annoying': -2.1, 'awful': -3.1, 'bad': -2.5, 'bland': -1.8, 'boring': -2.4,
+    'bored': -2.1, 'cheap': -1.6, 'clumsy': -1.8, 'confusing': -1.8, 'disappointed': -2.4,
+    'disappointing': -2.5, 'disappointment': -2.6, 'disaster': -3.1, 'dragged': -1.7, 'dreadful': -3.0,
+    'dull': -2.2, 'fail': -2.3, 'failed': -2.3, 'fails': -2.3, 'flat': -1.4,
+    'forgettable': -2.0, 'garbage': -3.1, 'hate': -3.0, 'hated': -3.0, 'horrible': -3.1,
+    'lame': -2.1, 'mediocre': -1.9, 'mess': -2.3, 'messy': -1.9, 'overrated': -1.9,
+    'pointless': -2.3, 'poor': -2.3, 'poorly': -2.3, 'predictable': -1.5, 'ridiculous': -1.9,
+    'rushed': -1.6, 'sad': -1.8, 'shallow': -1.8, 'silly': -1.2, 'slow': -1.3,
+    'struggled': -1.7, 'stupid': -2.4, 'terrible': -3.1, 'tedious': -2.2, 'unconvincing': -1.9,
+    'unwatchable': -3.0, 'waste': -2.8, 'wasted': -2.6, 'weak': -1.9, 'worse': -2.6,
+    'worst': -3.3,
+}
+
+NEGATORS = frozenset({
+    'not', 'no', 'never', 'nothing', 'neither', 'nor', 'nobody', 'without', 'hardly',
+    "don't", "doesn't", "didn't", "isn't", "wasn't", "aren't", "weren't", "can't", "cannot",
+    "couldn't", "won't", "wouldn't", "shouldn't", "hasn't", "haven't", "ain't",
+})
+
+# Multipliers applied to the sentiment word right after them
+BOOSTERS = {
+    'absolutely': 1.5, 'completely': 1.4, 'extremely': 1.5, 'incredibly': 1.5, 'really': 1.3,
+    'so': 1.2, 'too': 1.2, 'totally': 1.4, 'truly': 1.3, 'very': 1.3,
+    'barely': 0.5, 'kinda': 0.8, 'mostly': 0.8, 'slightly': 0.6, 'somewhat': 0.7,
+}
+
+# Words that shift emphasis to the clause after them ("decent, but boring")
+CONTRASTS = frozenset({'but', 'however', 'though', 'yet'})
+
+# Punctuation that ends the reach of a negator or booster
+BREAKS = frozenset({'.', '!', '?', ';', ','})
+
+NEGATION_SCALAR = -0.74
+NEGATION_SCOPE = 3
+NORMALIZATION_ALPHA = 15.0
+LABEL_THRESHOLD = 0.05
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|[.!?;,]")
+
+
+def rating_sentiment(rating):
+    """Label implied by the star rating alone"""
+    if rating >= 4:
+        return 'positive'
+    if rating == 3:
+        return 'neutral'
+    return 'negative'
+
+
+def score_label(score):
+    if score >= LABEL_THRESHOLD:
+        return 'positive'
+    if score <= -LABEL_THRESHOLD:
+        return 'negative'
+    return 'neutral'
+
+
+class SentimentScorer:
+    """Lexicon scorer with negation, boosters and contrast handling.
+
+    The vocabulary is compiled once into NumPy lookup arrays; a batch of
+    reviews is tokenized into one flat id array and every rule is applied
+    with array operations, so the per-review cost is mostly tokenization.
+    Scores are normalized to [-1, 1]; NaN means no opinion words were found.
+    NumPy is imported on first use, so importing this module stays cheap.
+    """
+
+    def __init__(self, lexicon=LEXICON, negators=NEGATORS, boosters=BOOSTERS, contrasts=CONTRASTS,
+                 breaks=BREAKS, negation_scope=NEGATION_SCOPE):
+        import numpy as np
+        words = sorted(set(lexicon) | set(negators) | set(boosters) | set(contrasts) | set(breaks))
+        # Id 0 stands for every word outside the vocabulary
+        self.vocabulary = {word: i for i, word in enumerate(words, start=1)}
+        size = len(words) + 1
+        self.valence = np.zeros(size)
+        self.boost = np.ones(size)
+        self.negates = np.zeros(size, dtype=bool)
+        self.contrasts = np.zeros(size, dtype=bool)
+        self.breaks = np.zeros(size, dtype=bool)
+        for word, i in self.vocabulary.items():
+            self.valence[i] = lexicon.get(word, 0.0)
+            self.boost[i] = boosters.get(word, 1.0)
+            self.negates[i] = word in negators
+            self.contrasts[i] = word in contrasts
+            self.breaks[i] = word in breaks or word in contrasts
+        self.negation_scope = negation_scope
+
+    def _token_ids(self, texts):
+        import numpy as np
+        lookup = self.vocabulary.get
+        lengths, ids = [], []
+        for text in texts:
+            tokens = TOKEN_RE.findall((text or '').lower().replace('’', "'"))
+            lengths.append(len(tokens))
+            ids.extend([lookup(token, 0) for token in tokens])
+        return np.array(ids, dtype=np.intp), np.array(lengths, dtype=np.intp)
+
+    def score_batch(self, texts):
+        """Normalized scores for a sequence of review texts"""
+        import numpy as np
+        ids, lengths = self._token_ids(texts)
+        n_docs = len(lengths)
+        if not len(ids):
+            return np.full(n_docs, np.nan)
+        doc = np.repeat(np.arange(n_docs), lengths)
+        values = self.valence[ids]
+
+        # Boosters and negators act on the following tokens of the same clause
+        boundary = self.breaks[ids]
+        starts = np.cumsum(lengths)[:-1]
+        boundary[starts[starts < len(ids)]] = True
+        clause = np.cumsum(boundary)
+        negated = np.zeros(len(ids), dtype=bool)
+        is_negator = self.negates[ids]
+        for k in range(1, self.negation_scope + 1):
+            negated[k:] |= is_negator[:-k] & (clause[k:] == clause[:-k])
+        boost = np.ones(len(ids))
+        boost[1:] = np.where(clause[1:] == clause[:-1], self.boost[ids[:-1]], 1.0)
+        values = values * boost * np.where(negated, NEGATION_SCALAR, 1.0)
+
+        # In reviews with a contrast word, the clause after the last one dominates
+        is_contrast = self.contrasts[ids]
+        if is_contrast.any():
+            last_contrast = np.full(n_docs, -1)
+            positions = np.flatnonzero(is_contrast)
+            np.maximum.at(last_contrast, doc[positions], positions)
+            has_contrast = last_contrast[doc] >= 0
+            after = np.arange(len(ids)) > last_contrast[doc]
+            values = values * np.where(has_contrast, np.where(after, 1.5, 0.5), 1.0)
+
+        raw = np.bincount(doc, weights=values, minlength=n_docs)
+        hits = np.bincount(doc, weights=self.valence[ids] != 0, minlength=n_docs)
+        scores = raw / np.sqrt(raw * raw + NORMALIZATION_ALPHA)
+        scores[hits == 0] = np.nan
+        return scores
+
+    def classify_batch(self, texts, ratings):
+        """``(label, score)`` per review; falls back to the rating when the text carries no opinion"""
+        results = []
+        for score, rating in zip(self.score_batch(texts), ratings):
+            if math.isnan(score):
+                results.append((rating_sentiment(rating), None))
+            else:
+                results.append((score_label(score), round(float(score), 4)))
+        return results
+
+
+_scorer = None
+
+
+def get_scorer():
+    """The shared scorer, compiled on first use"""
+    global _scorer
+    if _scorer is None:
+        _scorer = SentimentScorer()
+    return _scorer
+
+
+def classify(text, rating):
+    """``(label, score)`` for a single review"""
+    return get_scorer().classify_batch([text], [rating])[0]
+
+
+def classify_batch(texts, ratings):
+    return get_scorer().classify_batch(texts, ratings)
@@ -0,0 +1,979 @@
+import os
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["INSTRUMENTATION_ENABLED"] = "true"
+
+from datetime import date, datetime
+import pytest
+
+from app import app, cache, instrumentation, create_app, start_background_workers
+from config import Config
+from database import (db, Movie, Feedback, MovieStats, User, RollupCheckpoint, rebuild_movie_stats,
+                      rebuild_rankings, rescore_sentiment)
+from ingest import FeedbackQueue, drain, drain_batch, submission_payload
+from reprocess import reprocess, checkpoint_name
+from sqlalchemy import create_engine, insert, inspect, select, update
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        cache.clear()
+        yield app.test_client()
+        db.session.remove()
+
+
+def create_movie(title="Test Movie", **overrides):
+    fields = dict(
+        title=title,
+        description="A test movie",
+        genre="Action, Drama",
+        director="Director",
+        cast="Cast",
+        release_date=date(2024, 1, 1),
+        duration=120,
+        status="released",
+    )
+    fields.update(overrides)
+    movie = Movie(**fields)
+    db.session.add(movie)
+    db.session.commit()
+    return movie
+
+
+def create_feedback(movie, rating, **overrides):
+    fields = dict(
+        movie_id=movie.id,
+        customer_name="Tester",
+        customer_email="tester@test.com",
+        rating=rating,
+        review="Review text",
+        watch_date=date(2024, 1, 2),
+        age_group="18-25",
+        would_recommend=rating >= 3,
+    )
+    fields.update(overrides)
+    feedback = Feedback(**fields)
+    feedback.analyze_sentiment()
+    db.session.add(feedback)
+    db.session.commit()
+    return feedback
+
+
+def test_movie_stats_follow_feedback_writes(client):
+    """Test: movie_stats is maintained on feedback insert, update and delete"""
+    movie = create_movie()
+    first = create_feedback(movie, 5)
+    create_feedback(movie, 2)
+
+    assert movie.total_feedbacks == 2
+    assert movie.average_rating == 3.5
+    assert movie.rating_distribution == {1: 0, 2: 1, 3: 0, 4: 0, 5: 1}
+    assert movie.sentiment_distribution == {"positive": 1, "neutral": 0, "negative": 1}
+
+    first.rating = 3
+    first.analyze_sentiment()
+    db.session.commit()
+    assert movie.rating_distribution[3] == 1
+    assert movie.sentiment_distribution == {"positive": 0, "neutral": 1, "negative": 1}
+
+    db.session.delete(first)
+    db.session.commit()
+    assert movie.total_feedbacks == 1
+    assert movie.average_rating == 2.0
+    print("TEST PASSED: Movie stats follow feedback writes")
+
+
+def test_rebuild_movie_stats(client):
+    """Test: rebuild recomputes movie_stats from feedbacks"""
+    movie = create_movie()
+    for rating in (1, 4, 4):
+        create_feedback(movie, rating)
+
+    db.session.execute(db.delete(MovieStats))
+    db.session.commit()
+    assert movie.total_feedbacks == 0
+
+    assert rebuild_movie_stats() == 1
+    db.session.commit()
+    assert movie.total_feedbacks == 3
+    assert movie.average_rating == 3.0
+    assert movie.stats.recommend_count == 2
+    print("TEST PASSED: Movie stats rebuild")
+
+
+def test_movie_rankings(client):
+    """Test: Bayesian and trending scores are maintained incrementally and rank top movies"""
+    one_hit = create_movie("One Hit")
+    favourite = create_movie("Favourite")
+    fresh = create_movie("Fresh")
+    create_feedback(one_hit, 5, created_at=datetime(2024, 1, 1))
+    for rating in (5, 5, 5, 5, 5, 5, 5, 5, 4, 5):
+        create_feedback(favourite, rating, created_at=datetime(2024, 1, 1))
+    create_feedback(fresh, 4, created_at=datetime(2024, 3, 1))
+    dropped = create_feedback(fresh, 1, created_at=datetime(2024, 3, 1))
+    db.session.delete(dropped)
+    db.session.commit()
+
+    incremental = {s.movie_id: (s.bayes_score, s.trend_score) for s in MovieStats.query}
+    rebuild_rankings()
+    db.session.commit()
+    for stats in MovieStats.query:
+        assert stats.bayes_score == pytest.approx(incremental[stats.movie_id][0])
+        assert stats.trend_score == pytest.approx(incremental[stats.movie_id][1])
+
+    response = client.get("/api/trending?limit=2")
+    assert [m["title"] for m in response.get_json()] == ["Fresh", "Favourite"]
+    assert client.get("/analytics").status_code == 200
+    top = client.get("/api/trending").get_json()
+    assert sorted(top, key=lambda m: -m["bayes_score"])[0]["title"] == "Favourite"
+    assert b"Trending This Week" in client.get("/").data
+    print("TEST PASSED: Movie rankings")
+
+
+def test_sqlite_wal_readers_not_blocked_by_writers(tmp_path):
+    """Test: with the engine options, readers and a writer on one SQLite file do not wait on each other"""
+    import threading
+    import time
+    from engine_options import engine_options, configure_engine
+
+    url = f"sqlite:///{tmp_path / 'wal.db'}"
+    settings = {"SQLITE_BUSY_TIMEOUT_MS": 200}
+    engine = configure_engine(create_engine(url, **engine_options(url, settings)), settings)
+    db.metadata.create_all(engine, tables=[RollupCheckpoint.__table__])
+    table = RollupCheckpoint.__table__
+    with engine.begin() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        conn.execute(insert(table), [{"name": f"row{i}", "last_feedback_id": i} for i in range(50)])
+
+    def count_rows(results):
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            results.append((conn.scalar(select(db.func.count()).select_from(table)),
+                            time.perf_counter() - started))
+
+    # A reader during an open write transaction sees the committed state at once
+    with engine.begin() as writer:
+        writer.execute(insert(table).values(name="pending", last_feedback_id=0))
+        results = []
+        reader = threading.Thread(target=count_rows, args=(results,))
+        reader.start()
+        reader.join(5)
+        assert results and results[0][0] == 50 and results[0][1] < 0.2
+
+    # A writer commits while a reader is still stepping through a result
+    with engine.connect() as slow_reader:
+        rows = slow_reader.execute(select(table.c.name))
+        rows.fetchone()
+        with engine.begin() as writer:
+            writer.execute(insert(table).values(name="committed", last_feedback_id=0))
+        assert len(rows.fetchall()) == 50
+    results = []
+    count_rows(results)
+    assert results[0][0] == 52
+    engine.dispose()
+    print("TEST PASSED: SQLite WAL readers not blocked by writers")
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    """An app of its own on a primary file and a replica file; ``replicate()`` copies one onto the other"""
+    import sqlite3
+
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary}"
+        SQLALCHEMY_REPLICA_URIS = [f"sqlite:///{replica}"]
+        READ_YOUR_WRITES_SECONDS = 60
+        INSTRUMENTATION_ENABLED = True
+        CACHE_BACKEND = "memory"
+
+    def replicate():
+        # Stand-in for replication: copy the primary file over the replica
+        source, target = sqlite3.connect(primary), sqlite3.connect(replica)
+        source.backup(target)
+        source.close()
+        target.close()
+
+    routed = create_app(ReplicaConfig)
+    with routed.app_context():
+        db.create_all()
+    replicate()
+    yield routed, replicate
+    with routed.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # db.init_app registered an (empty) metadata for the bind on the shared db
+    db.metadatas.pop("replica_0", None)
+
+
+def test_read_replica_routing(replicated):
+    """Test: GET reads go to the replica, writers read their own writes from the primary"""
+    from flask import redirect
+
+    routed, replicate = replicated
+
+    @routed.route("/count")
+    def count():
+        return str(db.session.scalar(select(db.func.count(Movie.id))))
+
+    @routed.route("/add", methods=["POST"])
+    def add():
+        create_movie("Replicated")
+        return redirect("/count")
+
+    @routed.route("/add-and-count")
+    def add_and_count():
+        create_movie("Written on GET")
+        return count()
+
+    writer, reader = routed.test_client(), routed.test_client()
+    assert writer.post("/add", follow_redirects=True).data == b"1"
+    assert reader.get("/count").data == b"0"
+    replicate()
+    assert reader.get("/count").data == b"1"
+    assert reader.get("/add-and-count").data == b"2"
+    assert writer.get("/count").data == b"2"
+
+    # Replica reads are instrumented like primary ones
+    assert routed.test_client().get("/count").data == b"1"
+    assert routed.extensions["instrumentation"].recent[-1].db_count == 1
+    print("TEST PASSED: Read replica routing")
+
+
+def test_replica_reads_do_not_recache_stale_pages(replicated):
+    """Test: a page refilled right after a write is read from the primary, not a lagging replica"""
+    routed, replicate = replicated
+    with routed.app_context():
+        movie_id = create_movie().id
+    replicate()
+
+    visitor = routed.test_client()
+    assert visitor.get(f"/api/movie/{movie_id}/stats").get_json()["total_feedbacks"] == 0
+    with routed.app_context():
+        create_feedback(db.session.get(Movie, movie_id), 5)
+    # The replica has not caught up; the refill must not cache its answer
+    assert visitor.get(f"/api/movie/{movie_id}/stats").get_json()["total_feedbacks"] == 1
+    assert visitor.get(f"/api/movie/{movie_id}/stats").get_json()["total_feedbacks"] == 1
+    print("TEST PASSED: Replica reads and the response cache")
+
+
+def test_text_sentiment(client):
+    """Test: sentiment comes from the review text, with negation, and rescoring refreshes stats"""
+    movie = create_movie()
+    praise = create_feedback(movie, 2, review="Absolutely brilliant, I loved every minute!")
+    negated = create_feedback(movie, 5, review="Not good. The plot was boring.")
+    contrast = create_feedback(movie, 4, review="Great cast but a dull, predictable story.")
+    no_opinion = create_feedback(movie, 3, review="Watched it on Sunday.")
+
+    assert praise.sentiment == "positive" and praise.sentiment_score > 0.5
+    assert negated.sentiment == "negative" and negated.sentiment_score < 0
+    assert contrast.sentiment == "negative"
+    assert no_opinion.sentiment == "neutral" and no_opinion.sentiment_score is None
+    assert movie.sentiment_distribution == {"positive": 1, "neutral": 1, "negative": 2}
+
+    # Rows written before the text engine carried the rating-based label
+    db.session.execute(db.update(Feedback).values(sentiment="neutral", sentiment_score=None))
+    db.session.commit()
+    assert rescore_sentiment(chunk_size=3) == 3
+    assert rescore_sentiment(chunk_size=3) == 0
+    rebuild_movie_stats()
+    db.session.commit()
+    assert movie.sentiment_distribution == {"positive": 1, "neutral": 1, "negative": 2}
+    print("TEST PASSED: Text sentiment")
+
+
+def test_parallel_reprocess(tmp_path):
+    """Test: the process pool recomputes sentiment over id ranges and resumes from its checkpoint"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'reprocess.db'}")
+    db.metadata.create_all(engine)
+    feedbacks = Feedback.__table__
+    reviews = ["Brilliant and moving", "Boring, predictable mess", "Seen it twice"]
+    with engine.begin() as connection:
+        connection.execute(insert(Movie.__table__).values(
+            id=1, title="Movie", description="D", genre="Drama", director="D", cast="C",
+            release_date=date(2024, 1, 1), duration=90, status="released"))
+        connection.execute(insert(feedbacks), [
+            dict(movie_id=1, customer_name="T", customer_email="t@test.com", rating=3,
+                 review=reviews[n % 3], watch_date=date(2024, 1, 2), sentiment="neutral")
+            for n in range(90)
+        ])
+
+    assert reprocess(engine, "sentiment", workers=2, chunk_size=20) == (90, 60)
+    with engine.connect() as connection:
+        labels = dict(connection.execute(
+            select(feedbacks.c.review, feedbacks.c.sentiment).distinct()).all())
+    assert labels == {reviews[0]: "positive", reviews[1]: "negative", reviews[2]: "neutral"}
+
+    # An interrupted run resumes past its checkpoint and rewrites nothing twice
+    with engine.begin() as connection:
+        connection.execute(update(feedbacks).where(feedbacks.c.id > 60).values(sentiment="neutral"))
+        connection.execute(update(RollupCheckpoint.__table__)
+                           .where(RollupCheckpoint.name == checkpoint_name("sentiment"))
+                           .values(last_feedback_id=60))
+    assert reprocess(engine, "sentiment", workers=1, chunk_size=20) == (30, 20)
+    assert reprocess(engine, "sentiment", workers=1, chunk_size=20) == (90, 0)
+    print("TEST PASSED: Parallel reprocess")
+
+
+def test_movie_stats_api(client):
+    """Test: movie stats API reads the materialized aggregates"""
+    movie = create_movie()
+    create_feedback(movie, 5)
+
+    res = client.get(f"/api/movie/{movie.id}/stats")
+    assert res.status_code == 200
+    data = res.get_json()
+    assert data["total_feedbacks"] == 1
+    assert data["rating_distribution"]["5"] == 1
+    assert data["sentiment_distribution"]["positive"] == 1
+
+    res = client.get(f"/movie/{movie.id}")
+    assert res.status_code == 200
+    print("TEST PASSED: Movie stats API")
+
+
+def test_dashboard_report(client):
+    """Test: analytics report aggregates every movie in grouped queries"""
+    from reports import build_dashboard_report
+
+    first = create_movie("First")
+    second = create_movie("Second")
+    create_feedback(first, 5)
+    create_feedback(first, 4, age_group="26-35")
+    create_feedback(second, 1)
+
+    report = build_dashboard_report()
+    assert report.total_movies == 2
+    assert report.total_feedbacks == 3
+    assert report.avg_rating == 3.3
+    assert [item.movie.title for item in report.top_movies] == ["First", "Second"]
+    assert report.top_movies[0].avg_rating == 4.5
+    assert report.sentiment_stats == {"positive": 2, "neutral": 0, "negative": 1}
+    assert report.rating_dist == {1: 1, 2: 0, 3: 0, 4: 1, 5: 1}
+    assert report.age_distribution == {"18-25": 2, "26-35": 1}
+    assert len(report.recent_feedbacks) == 3
+
+    res = client.get("/analytics")
+    assert res.status_code == 200
+    assert b"First" in res.data
+    print("TEST PASSED: Dashboard report")
+
+
+def test_incremental_daily_rollup(client):
+    """Test: rollups fold only feedbacks past the high-water mark"""
+    from database import Analytics
+    from rollups import run_rollup, daily_series
+
+    movie = create_movie()
+    create_feedback(movie, 5)
+    create_feedback(movie, 2)
+    assert run_rollup(lag_seconds=0) == 2
+    assert run_rollup(lag_seconds=0) == 0
+
+    create_feedback(movie, 4)
+    series = daily_series()
+    assert series[-1].total_feedbacks == 3
+    assert series[-1].positive_count == 2
+    assert series[-1].average_rating == 3.7
+
+    assert run_rollup(lag_seconds=0) == 1
+    row = Analytics.query.one()
+    assert row.total_feedbacks == 3
+    assert round(row.average_rating, 2) == 3.67
+    assert row.negative_count == 1
+    print("TEST PASSED: Incremental daily rollup")
+
+
+def test_movies_keyset_pagination_and_genre_index(client):
+    """Test: /api/movies pages by (release_date, id) and filters through movie_genres"""
+    for day in range(1, 6):
+        create_movie(f"Movie {day}", release_date=date(2024, 1, day),
+                     genre="Drama" if day % 2 else "Action, Comedy")
+
+    res = client.get("/api/movies?limit=2")
+    assert [m["title"] for m in res.get_json()] == ["Movie 5", "Movie 4"]
+    cursor = res.headers["X-Next-Cursor"]
+
+    res = client.get(f"/api/movies?limit=2&after={cursor}")
+    assert [m["title"] for m in res.get_json()] == ["Movie 3", "Movie 2"]
+
+    res = client.get("/api/movies?genre=Comedy")
+    assert [m["title"] for m in res.get_json()] == ["Movie 4", "Movie 2"]
+    assert "X-Next-Cursor" not in res.headers
+
+    movie = Movie.query.filter_by(title="Movie 1").one()
+    movie.genre = "Comedy"
+    db.session.commit()
+    res = client.get("/api/movies?genre=Comedy")
+    assert [m["title"] for m in res.get_json()] == ["Movie 4", "Movie 2", "Movie 1"]
+
+    res = client.get("/movies?genre=Drama")
+    assert res.status_code == 200
+    assert b"Movie 5" in res.data and b"Movie 4" not in res.data
+    print("TEST PASSED: Keyset pagination and genre index")
+
+
+def test_review_lists_use_constant_queries(client):
+    """Test: review lists load in a fixed number of queries and the profile pages by keyset"""
+    from sqlalchemy import event
+
+    user = User(username="reader", email="reader@test.com", full_name="Reader")
+    user.set_password("password123")
+    db.session.add(user)
+    db.session.commit()
+    per_page = app.config["FEEDBACK_PER_PAGE"]
+    movies = [create_movie(f"Movie {i}") for i in range(per_page + 5)]
+    for i, movie in enumerate(movies):
+        create_feedback(movie, 1 + i % 5, user_id=user.id, created_at=datetime(2024, 1, 1, 0, i))
+    with client.session_transaction() as sess:
+        sess["user_id"] = user.id
+
+    def count_selects(path):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+
+        db.session.expire_all()
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            response = client.get(path)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+        assert response.status_code == 200, path
+        return response, statements
+
+    first, statements = count_selects("/profile")
+    assert len(statements) <= 4, statements
+    assert not any("customer_email" in s for s in statements if "FROM feedbacks" in s)
+    assert first.data.count(b'class="review-card"') == per_page
+    assert f"Movie {per_page + 4}".encode() in first.data and b"Movie 0\n" not in first.data
+    assert f">{per_page + 5}<".encode() in first.data
+
+    cursor = first.data.split(b"/profile?after=")[1].split(b'"')[0].decode()
+    second, _ = count_selects(f"/profile?after={cursor}")
+    assert second.data.count(b'class="review-card"') == 5
+    assert b"Movie 0\n" in second.data and b"Older Reviews" not in second.data
+
+    # Adding reviews does not add queries to the other review lists
+    before = [len(count_selects(path)[1]) for path in ("/analytics", f"/movie/{movies[0].id}")]
+    for rating in (2, 4, 5):
+        create_feedback(movies[0], rating, user_id=user.id)
+    cache.clear()
+    after = [len(count_selects(path)[1]) for path in ("/analytics", f"/movie/{movies[0].id}")]
+    assert after == before
+    print("TEST PASSED: Review lists use constant queries")
+
+
+def test_current_user_identity_cache(client):
+    """Test: signed-in requests reuse the cached identity until the user row changes"""
+    from sqlalchemy import event
+
+    user = User(username="member", email="member@test.com", full_name="Member", is_admin=True)
+    user.set_password("password123")
+    db.session.add(user)
+    db.session.commit()
+    client.post("/login", data={"username": "member", "password": "password123"})
+
+    user_queries = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            user_queries.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        for path in ("/profile", "/profile", "/admin", "/api/feedback/export"):
+            assert client.get(path).status_code == 200, path
+        # One identity load, then admin pages confirm is_admin against the table
+        assert len(user_queries) == 3
+
+        user.full_name = "Renamed Member"
+        user.is_admin = False
+        db.session.commit()
+        assert b"Renamed Member" in client.get("/profile").data
+        assert client.get("/admin").status_code == 302
+        with client.session_transaction() as sess:
+            assert sess["is_admin"] is False
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+    # A demotion this process never heard of (another worker's write) still locks admin pages
+    user.is_admin = True
+    db.session.commit()
+    assert client.get("/admin").status_code == 200
+    db.session.execute(update(User).where(User.id == user.id).values(is_admin=False))
+    db.session.commit()
+    assert client.get("/admin").status_code == 302
+
+    db.session.delete(user)
+    db.session.commit()
+    assert client.get("/profile").status_code == 302
+    with client.session_transaction() as sess:
+        assert "user_id" not in sess
+    print("TEST PASSED: Current user identity cache")
+
+
+def test_login_rehashes_outdated_passwords(client, monkeypatch):
+    """Test: logins verify through the bounded hasher and upgrade outdated hashes"""
+    from werkzeug.security import generate_password_hash
+    from passwords import PasswordHasher, HasherBusy
+
+    hasher = app.extensions["password_hasher"]
+
+    user = User(username="legacy", email="legacy@test.com",
+                password_hash=generate_password_hash("password123", method="pbkdf2:sha256:1"))
+    db.session.add(user)
+    db.session.commit()
+    assert hasher.needs_rehash(user.password_hash)
+
+    client.post("/login", data={"username": "legacy", "password": "wrong"})
+    assert user.password_hash.startswith("pbkdf2:sha256:1$")
+    client.post("/login", data={"username": "legacy", "password": "password123"})
+    db.session.refresh(user)
+    assert not hasher.needs_rehash(user.password_hash)
+    assert user.check_password("password123") and not user.check_password("wrong")
+
+    busy = PasswordHasher("pbkdf2:sha256:1", workers=1, max_pending=1, timeout=0.01)
+    busy._slots.acquire()
+    with pytest.raises(HasherBusy):
+        busy.verify(user.password_hash, "password123")
+    busy._slots.release()
+    assert busy.verify_and_update("pa$$word", "pa$$word", plaintext=True)[1].startswith("pbkdf2:sha256:1$")
+    assert busy.verify("plain", "plain") is False
+    assert busy.verify("pa$$word", "pa$$word") is False
+
+    # A full or timed-out pool turns signup into a 503 too
+    saturated = PasswordHasher(hasher.method, workers=1, max_pending=1, timeout=0.01)
+    saturated._slots.acquire()
+    monkeypatch.setattr(hasher, "_run", saturated._run)
+    client.get("/logout")
+    res = client.post("/signup", data={"username": "newbie", "email": "newbie@test.com", "full_name": "New",
+                                       "password": "secret1", "confirm_password": "secret1"})
+    assert res.status_code == 503
+    assert User.query.filter_by(username="newbie").count() == 0
+    print("TEST PASSED: Login rehashes outdated passwords")
+
+
+def test_response_cache_invalidation(client):
+    """Test: anonymous pages are cached until a write touches their movie"""
+    movie = create_movie()
+    other = create_movie("Other Movie")
+    create_feedback(movie, 4)
+
+    first = client.get(f"/api/movie/{movie.id}/stats")
+    etag = first.headers["ETag"]
+    assert first.get_json()["total_feedbacks"] == 1
+    assert first.headers["Cache-Control"] == "public, max-age=0, must-revalidate"
+
+    cached = client.get(f"/api/movie/{movie.id}/stats")
+    assert instrumentation.recent[-1].db_count == 0
+    assert cached.headers["ETag"] == etag
+
+    res = client.get(f"/api/movie/{movie.id}/stats", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+    # Feedback on another movie leaves this movie's entry alone
+    client.get(f"/api/movie/{other.id}/stats")
+    create_feedback(other, 2)
+    res = client.get(f"/api/movie/{movie.id}/stats", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+    create_feedback(movie, 2)
+    res = client.get(f"/api/movie/{movie.id}/stats", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.get_json()["total_feedbacks"] == 2
+    assert client.get(f"/api/movie/{other.id}/stats").get_json()["total_feedbacks"] == 1
+
+    # Catalog pages follow every feedback write
+    client.get("/api/movies")
+    create_feedback(movie, 5)
+    totals = {m["id"]: m["total_feedbacks"] for m in client.get("/api/movies").get_json()}
+    assert totals[movie.id] == 3
+
+    # Flash messages are never cached or served from cache
+    with client.session_transaction() as sess:
+        sess["_flashes"] = [("success", "Flashed once")]
+    assert b"Flashed once" in client.get("/").data
+    assert b"Flashed once" not in client.get("/").data
+
+    # Pages rendered for a signed-in user stay out of shared caches
+    user = User(username="member", email="member@test.com", password_hash="")
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["user_id"] = user.id
+    assert client.get("/").headers["Cache-Control"].startswith("private,")
+    print("TEST PASSED: Response cache invalidation")
+
+
+def test_memory_cache_bounds_tag_counters():
+    """Test: tag versions are bounded and an evicted tag never reuses an old version"""
+    from cache import MemoryCache
+
+    backend = MemoryCache(max_entries=2, max_counters=3)
+    seen = {backend.incr("tag:movie:1"), backend.get_counter("tag:movie:1")}
+    for i in range(2, 50):
+        backend.incr(f"tag:movie:{i}")
+    assert len(backend._counters) == 3
+    # movie:1 was evicted; its new version differs from every version it had
+    assert backend.get_counter("tag:movie:1") not in seen
+    assert backend.get_counter("tag:movie:1") == backend.get_counter("tag:movie:1")
+    print("TEST PASSED: Memory cache counter bound")
+
+
+def test_feedback_ingest_queue(client, tmp_path):
+    """Test: queued submissions are written in batches exactly once, with their stats"""
+    movie = create_movie()
+    user = User(username="viewer", email="viewer@test.com", full_name="Viewer")
+    user.set_password("secret")
+    db.session.add(user)
+    db.session.commit()
+
+    queue = FeedbackQueue(str(tmp_path / "queue.db"))
+    for rating in (5, 4, 1):
+        queue.enqueue(submission_payload(movie.id, user, rating, "Queued review",
+                                         date(2024, 1, 2), "18-25", rating > 2))
+    assert queue.depth() == 3
+    assert drain(queue, batch_size=2) == 3
+    assert queue.depth() == 0
+    stats = db.session.get(MovieStats, movie.id)
+    assert (stats.feedback_count, stats.rating_sum, stats.recommend_count) == (3, 10, 2)
+    assert Feedback.query.filter_by(sentiment="negative").count() == 1
+
+    # A writer that dies after committing but before acking must not write twice
+    queue.enqueue(submission_payload(movie.id, user, 3, "Again", date(2024, 1, 3), "26-35", True))
+    ack = queue.ack
+    queue.ack = lambda upto_id: None
+    assert drain_batch(queue) == 1
+    queue.ack = ack
+    assert queue.depth() == 1
+    assert drain(queue) == 0
+    assert queue.depth() == 0
+    assert Feedback.query.count() == 4
+    assert db.session.get(MovieStats, movie.id).feedback_count == 4
+    print("TEST PASSED: Feedback ingest queue")
+
+
+def test_feedback_ingest_queues_keep_their_own_checkpoint(client, tmp_path):
+    """Test: queue files on different hosts drain independently despite overlapping ids"""
+    movie = create_movie()
+    user = User(username="viewer", email="viewer@test.com", full_name="Viewer", password_hash="")
+    db.session.add(user)
+    db.session.commit()
+
+    first = FeedbackQueue(str(tmp_path / "host1.db"))
+    second = FeedbackQueue(str(tmp_path / "host2.db"))
+    assert first.queue_id != second.queue_id
+    assert FeedbackQueue(str(tmp_path / "host1.db")).queue_id == first.queue_id
+    for rating in (5, 4, 3):
+        first.enqueue(submission_payload(movie.id, user, rating, "First host", date(2024, 1, 2), "18-25", True))
+    for rating in (2, 1):
+        second.enqueue(submission_payload(movie.id, user, rating, "Second host", date(2024, 1, 2), "18-25", False))
+
+    assert drain(first) == 3
+    assert drain(second) == 2
+    assert (first.depth(), second.depth()) == (0, 0)
+    assert Feedback.query.count() == 5
+    assert db.session.get(MovieStats, movie.id).feedback_count == 5
+
+    # Draining an empty queue leaves the other queue's rows alone
+    second.enqueue(submission_payload(movie.id, user, 4, "Later", date(2024, 1, 3), "18-25", True))
+    assert drain(first) == 0
+    assert second.depth() == 1
+    assert drain(second) == 1
+    assert Feedback.query.count() == 6
+    print("TEST PASSED: Per-queue ingest checkpoints")
+
+
+def test_feedback_ingest_skips_deleted_references(client, tmp_path):
+    """Test: a queued feedback for a deleted movie is dropped without blocking later items"""
+    kept, gone = create_movie("Kept"), create_movie("Gone")
+    user = User(username="viewer", email="viewer@test.com", full_name="Viewer", password_hash="")
+    leaver = User(username="leaver", email="leaver@test.com", full_name="Leaver", password_hash="")
+    db.session.add_all([user, leaver])
+    db.session.commit()
+
+    queue = FeedbackQueue(str(tmp_path / "queue.db"))
+    queue.enqueue(submission_payload(gone.id, user, 5, "Orphaned", date(2024, 1, 2), "18-25", True))
+    queue.enqueue(submission_payload(kept.id, leaver, 4, "Account closed", date(2024, 1, 2), "18-25", True))
+    queue.enqueue(submission_payload(kept.id, user, 3, "Still here", date(2024, 1, 2), "18-25", True))
+    db.session.delete(gone)
+    db.session.delete(leaver)
+    db.session.commit()
+
+    assert drain(queue, batch_size=1) == 3
+    assert queue.depth() == 0
+    assert [(f.movie_id, f.user_id) for f in Feedback.query.order_by(Feedback.id)] == [
+        (kept.id, None), (kept.id, user.id)]
+    assert db.session.get(MovieStats, kept.id).feedback_count == 2
+    queue.enqueue(submission_payload(kept.id, user, 5, "Later", date(2024, 1, 3), "18-25", True))
+    assert drain(queue) == 1
+    assert Feedback.query.count() == 3
+    print("TEST PASSED: Ingest skips deleted references")
+
+
+def test_feedback_export(client):
+    """Test: admins stream filtered feedback as CSV or gzipped JSONL"""
+    import csv
+    import gzip
+    import io
+    import json
+
+    admin = User(username="admin", email="admin@test.com", is_admin=True)
+    admin.set_password("secret")
+    db.session.add(admin)
+    first, second = create_movie("First"), create_movie("Second")
+    for rating in (5, 4, 1):
+        create_feedback(first, rating)
+    old = create_feedback(second, 2)
+    old.created_at = datetime(2023, 6, 1, 12, 0)
+    db.session.commit()
+
+    assert client.get("/api/feedback/export").status_code == 302
+    with client.session_transaction() as sess:
+        sess["user_id"] = admin.id
+
+    res = client.get("/api/feedback/export")
+    assert res.mimetype == "text/csv" and res.is_streamed
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert [row["movie_title"] for row in rows] == ["Second", "First", "First", "First"]
+
+    res = client.get(f"/api/feedback/export?format=jsonl&gzip=1&movie_id={first.id}&sentiment=positive")
+    assert res.headers["Content-Disposition"] == 'attachment; filename="feedback.jsonl.gz"'
+    lines = gzip.decompress(res.get_data()).decode().splitlines()
+    assert sorted(json.loads(line)["rating"] for line in lines) == [4, 5]
+
+    res = client.get("/api/feedback/export?format=jsonl&start=2023-01-01&end=2023-12-31")
+    assert [json.loads(line)["id"] for line in res.get_data(as_text=True).splitlines()] == [old.id]
+
+    assert client.get("/api/feedback/export?sentiment=angry").status_code == 400
+    assert client.get("/api/feedback/export?format=xml").status_code == 400
+    print("TEST PASSED: Feedback export")
+
+
+def test_feedback_bulk_import(client):
+    """Test: bulk import validates per row, inserts in batches and keeps movie_stats exact"""
+    import json
+
+    admin = User(username="admin", email="admin@test.com", is_admin=True)
+    admin.set_password("secret")
+    db.session.add(admin)
+    movie = create_movie()
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["user_id"] = admin.id
+
+    lines = [json.dumps({"movie_id": movie.id, "rating": rating, "review": review, "age_group": "26-35"})
+             for rating, review in ((5, "Superb and moving"), (2, "Dull and predictable"), (4, "Solid"))]
+    lines[1:1] = ["{not json", json.dumps({"movie_id": 999, "rating": 3, "review": "Who?"}),
+                  json.dumps({"movie_id": movie.id, "rating": 9, "review": "Too high"})]
+    res = client.post("/api/feedback/import?batch_size=2", data="\n".join(lines),
+                      content_type="application/x-ndjson")
+    report = res.get_json()
+    assert report["imported"] == 3 and report["error_count"] == 3
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4]
+    assert "does not exist" in " ".join(error["error"] for error in report["errors"])
+
+    csv_body = "movie_id,rating,review,would_recommend\n" f"{movie.id},3,Watchable,no\n"
+    res = client.post("/api/feedback/import", data=csv_body, content_type="text/csv")
+    assert res.get_json() == {"imported": 1, "error_count": 0, "errors": []}
+
+    stats = db.session.get(MovieStats, movie.id)
+    assert (stats.feedback_count, stats.rating_sum, stats.recommend_count) == (4, 14, 2)
+    assert movie.sentiment_distribution == {"positive": 3, "neutral": 0, "negative": 1}
+    assert Feedback.query.filter_by(customer_name="Anonymous").count() == 4
+    print("TEST PASSED: Feedback bulk import")
+
+
+def test_feedback_bulk_import_rejects_mistyped_fields(client):
+    """Test: mistyped fields are per-row errors, not a 500 after earlier batches committed"""
+    import json
+
+    admin = User(username="admin", email="admin@test.com", is_admin=True, password_hash="")
+    db.session.add(admin)
+    movie = create_movie()
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["user_id"] = admin.id
+
+    good = {"movie_id": movie.id, "rating": 4, "review": "Good fun"}
+    records = [
+        {**good, "created_at": "2024-05-01T10:00:00Z"},
+        {**good, "created_at": 1714557600},
+        {**good, "review": 42},
+        {**good, "customer_name": ["Ann"]},
+        {**good, "rating": 4.9},
+        {**good, "rating": True},
+        {**good, "movie_id": "first"},
+        {**good, "would_recommend": "yes", "rating": "5"},
+    ]
+    res = client.post("/api/feedback/import?batch_size=1", data="\n".join(map(json.dumps, records)),
+                      content_type="application/x-ndjson")
+    assert res.status_code == 200
+    report = res.get_json()
+    assert report["imported"] == 2 and report["error_count"] == 6
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4, 5, 6, 7]
+    assert "rating must be a whole number" in report["errors"][3]["error"]
+
+    # The offset timestamp is stored as naive UTC
+    imported = Feedback.query.order_by(Feedback.id).first()
+    assert imported.created_at == datetime(2024, 5, 1, 10, 0)
+    assert db.session.get(MovieStats, movie.id).feedback_count == 2
+    print("TEST PASSED: Bulk import field types")
+
+
+def test_request_instrumentation(client):
+    """Test: requests record their SQL statements and /metrics exposes them"""
+    movie = create_movie()
+    for rating in range(1, 6):
+        create_feedback(movie, rating)
+
+    res = client.get(f"/movie/{movie.id}")
+    assert res.status_code == 200
+    record = instrumentation.recent[-1]
+    assert record.endpoint == "movie_detail"
+    assert record.status == 200
+    assert 0 < record.db_count <= 5
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    body = res.get_data(as_text=True)
+    assert 'cinemapulse_requests_total{endpoint="movie_detail",method="GET",status="200"}' in body
+    assert 'cinemapulse_db_statements_total{endpoint="movie_detail"}' in body
+    print("TEST PASSED: Request instrumentation")
+
+
+def test_production_queries_use_feedback_indexes(client):
+    """Test: no production query in app.py falls back to a full scan of feedbacks"""
+    import re
+    from sqlalchemy import event
+    from database import User
+
+    user = User(username="planner", email="planner@test.com", full_name="Planner")
+    user.set_password("password123")
+    db.session.add(user)
+    movie = create_movie()
+    for rating in range(1, 6):
+        create_feedback(movie, rating, user_id=user.id)
+    with client.session_transaction() as sess:
+        sess["user_id"] = user.id
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        for path in ("/", "/movies", f"/movie/{movie.id}", "/analytics", "/profile",
+                     "/api/movies", f"/api/movie/{movie.id}/stats", f"/feedback/{movie.id}"):
+            assert client.get(path).status_code == 200, path
+        client.post(f"/feedback/{movie.id}", data={
+            "rating": "4", "review": "Indexed", "watch_date": "2024-01-01", "age_group": "18-25",
+        })
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+    # A plain SCAN reads every row. SCAN ... USING INDEX walks the whole
+    # index in order, which is only bounded when the query has a LIMIT.
+    # Index-only scans (USING COVERING INDEX) never touch the table.
+    full_scan = re.compile(r"^SCAN (TABLE )?feedbacks( AS \w+)?$")
+    ordered_scan = re.compile(r"^SCAN (TABLE )?feedbacks( AS \w+)? USING INDEX")
+    offenders = []
+    for statement, parameters in statements:
+        plan = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        details = [row[-1] for row in plan]
+        for detail in details:
+            if full_scan.match(detail) or (ordered_scan.match(detail) and "LIMIT" not in statement):
+                offenders.append((statement, details))
+    assert not offenders, offenders
+    assert any("feedbacks" in statement for statement, _ in statements)
+    print("TEST PASSED: Production queries use feedback indexes")
+
+
+def test_upgrade_schema_adds_missing_indexes(client):
+    """Test: the migration step recreates indexes missing from an existing database"""
+    from migrations import upgrade_schema
+
+    db.session.execute(db.text("DROP INDEX ix_feedbacks_movie_id_created_at"))
+    db.session.commit()
+
+    assert "index ix_feedbacks_movie_id_created_at" in upgrade_schema()
+    assert upgrade_schema() == []
+    print("TEST PASSED: Schema upgrade")
+
+
+def test_create_app_leaves_schema_to_upgrade_db(tmp_path):
+    """Test: create_app() does not touch the schema; upgrade-db creates it"""
+    class FreshConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'fresh.db'}"
+        INSTRUMENTATION_ENABLED = False
+        ANALYTICS_ROLLUP_INTERVAL = 60
+        PREFORK = True
+        PASSWORD_HASH_METHOD = "pbkdf2:sha256:1"
+        CACHE_BACKEND = "null"
+
+    fresh = create_app(FreshConfig)
+    # Extensions belong to each app; building one does not reconfigure another
+    for name in ("response_cache", "identity_cache", "password_hasher"):
+        assert fresh.extensions[name] is not app.extensions[name]
+    assert fresh.extensions["password_hasher"].method == "pbkdf2:sha256:1"
+    assert app.extensions["password_hasher"].method == Config.PASSWORD_HASH_METHOD
+    assert not fresh.extensions["response_cache"].enabled and app.extensions["response_cache"].enabled
+    with fresh.app_context():
+        assert inspect(db.engine).get_table_names() == []
+    # Same endpoints as the module-level app, less the instrumentation's /metrics
+    assert ({rule.endpoint for rule in fresh.url_map.iter_rules()} ==
+            {rule.endpoint for rule in app.url_map.iter_rules()} - {"metrics"})
+    assert "background_workers" not in fresh.extensions
+
+    result = fresh.test_cli_runner().invoke(args=["upgrade-db"])
+    assert result.exit_code == 0, result.output
+    with fresh.app_context():
+        assert {"movies", "feedbacks", "users"} <= set(inspect(db.engine).get_table_names())
+
+    # What gunicorn's post_fork does in each worker; a second call is a no-op
+    start_background_workers(fresh)
+    pid, threads = fresh.extensions["background_workers"]
+    start_background_workers(fresh)
+    assert fresh.extensions["background_workers"][1] is threads
+    assert [type(t).__name__ for t in threads] == ["RollupScheduler"]
+    for thread in threads:
+        thread.stop()
+    with fresh.app_context():
+        db.engine.dispose()
+    print("TEST PASSED: App factory")
+
+
+def test_seed_bulk(client):
+    """Test: bulk seeding inserts the requested rows with matching aggregates"""
+    import init_db
+    from database import Analytics
+
+    init_db.seed_bulk(num_movies=12, num_users=5, num_feedbacks=200, batch_size=64, seed=7)
+    assert Movie.query.count() == 12
+    assert User.query.count() == 6
+    assert Feedback.query.count() == 200
+
+    rating_sum = db.session.scalar(select(db.func.sum(Feedback.rating)))
+    stats = db.session.execute(
+        select(db.func.sum(MovieStats.feedback_count), db.func.sum(MovieStats.rating_sum))).one()
+    assert tuple(stats) == (200, rating_sum)
+    assert db.session.scalar(select(db.func.sum(Analytics.total_feedbacks))) == 200
+
+    # The admin gets the configured hashing, sample users the cheap fixture hash
+    hasher = app.extensions["password_hasher"]
+    assert not hasher.needs_rehash(User.query.filter_by(username="admin").one().password_hash)
+    assert User.query.filter_by(username="john_doe").one().password_hash.startswith(
+        init_db.FIXTURE_PASSWORD_METHOD + "$")
+    print("TEST PASSED: Bulk seeding")
@@ -167,6 +167,420 @@ def test_signup_duplicate_username():
     print(" TEST PASSED: Duplicate username validation works")
 
 
+@mock_aws
+def test_aws_clients_are_reused():
+    """Test: AWS clients and table handles are created once per worker"""
+    setup_test_environment()
+    import app_aws
+    app_aws.reset_aws_clients()
+
+    assert app_aws.get_sns() is app_aws.get_sns()
+    assert app_aws.get_feedback_table() is app_aws.get_feedback_table()
+    assert app_aws.get_users_table() is not app_aws.get_movies_table()
+
+    config = app_aws.get_sns().meta.config
+    assert config.max_pool_connections == app_aws.AWS_MAX_POOL_CONNECTIONS
+    assert config.retries["mode"] == app_aws.AWS_RETRY_MODE
+    print(" TEST PASSED: AWS clients are reused")
+
+
+def create_feedback_table():
+    """Feedback table as app_aws expects it, with the movie_id/created_at index"""
+    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+    return dynamodb.create_table(
+        TableName="Cinemapulse_Feedback",
+        KeySchema=[
+            {"AttributeName": "feedback_id", "KeyType": "HASH"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "feedback_id", "AttributeType": "S"},
+            {"AttributeName": "movie_id", "AttributeType": "S"},
+            {"AttributeName": "created_at", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "movie_id-created_at-index",
+                "KeySchema": [
+                    {"AttributeName": "movie_id", "KeyType": "HASH"},
+                    {"AttributeName": "created_at", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+@mock_aws
+def test_movie_feedback_index_query():
+    """Test: movie feedback is read newest first from the movie_id index"""
+    setup_test_environment()
+    table = create_feedback_table()
+    import app_aws
+    app_aws.reset_aws_clients()
+
+    for i in range(25):
+        table.put_item(Item={
+            "feedback_id": f"fb-{i}",
+            "movie_id": "m1" if i % 5 else "m2",
+            "created_at": f"2024-01-01T00:00:{i:02d}",
+            "rating": 4,
+        })
+
+    newest = app_aws.newest_movie_feedback("m1", count=3)
+    assert [f["feedback_id"] for f in newest] == ["fb-24", "fb-23", "fb-22"]
+
+    everything = list(app_aws.iter_movie_feedback("m1", page_size=4))
+    assert len(everything) == 20
+    assert all(f["movie_id"] == "m1" for f in everything)
+    assert len(app_aws.newest_movie_feedback("m2", count=10)) == 5
+    print(" TEST PASSED: Movie feedback index query")
+
+
+def create_stats_tables():
+    """Movies and aggregate counter tables under the names app_aws uses"""
+    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+    movies = dynamodb.create_table(
+        TableName="Cinemapulse_Movies",
+        KeySchema=[{"AttributeName": "movie_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "movie_id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    dynamodb.create_table(
+        TableName="Cinemapulse_Stats",
+        KeySchema=[{"AttributeName": "stat_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "stat_id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return movies
+
+
+@mock_aws
+def test_feedback_updates_aggregate_counters():
+    """Test: feedback writes maintain counters that /analytics reads"""
+    setup_test_environment()
+    create_feedback_table()
+    movies = create_stats_tables()
+    import app_aws
+    app_aws.reset_aws_clients()
+
+    movies.put_item(Item={"movie_id": "m1", "title": "Counter Movie", "genre": "Drama"})
+    movies.put_item(Item={"movie_id": "m2", "title": "Quiet Movie", "genre": "Drama"})
+
+    app_aws.app.config["TESTING"] = True
+    client = app_aws.app.test_client()
+    with client.session_transaction() as sess:
+        sess["username"] = "critic"
+
+    for rating, age in ((5, "18-25"), (4, "26-35"), (1, "18-25")):
+        # A client-supplied sentiment is ignored; the scorer decides
+        res = client.post("/feedback/m1", data={
+            "rating": str(rating), "review": "ok", "age_group": age, "would_recommend": "yes",
+            "sentiment": "positive",
+        })
+        assert res.status_code == 302
+
+    totals = app_aws.get_stats(app_aws.GLOBAL_STATS_ID)
+    assert totals["total_feedbacks"] == 3
+    assert totals["average_rating"] == 3.3
+    assert totals["rating_distribution"] == {1: 1, 2: 0, 3: 0, 4: 1, 5: 1}
+    assert totals["sentiment_distribution"] == {"positive": 2, "neutral": 0, "negative": 1}
+    assert totals["age_distribution"]["18-25"] == 2
+
+    stats = app_aws.batch_get_stats([app_aws.movie_stats_id("m1"), app_aws.movie_stats_id("m2")])
+    assert list(stats) == [app_aws.movie_stats_id("m1")]
+    assert stats[app_aws.movie_stats_id("m1")]["recommend_count"] == 3
+
+    res = client.get("/analytics")
+    assert res.status_code == 200
+    assert b"Counter Movie" in res.data
+    assert b"Quiet Movie" not in res.data
+
+    res = client.get("/movie/m1")
+    assert res.status_code == 200
+    assert b"Counter Movie" in res.data
+
+    # The catalog is a single scan, so there are no page links
+    res = client.get("/movies")
+    assert res.status_code == 200
+    assert b"Quiet Movie" in res.data
+    assert b"First Page" not in res.data and b"Next Page" not in res.data
+    print(" TEST PASSED: Aggregate counters")
+
+
+@mock_aws
+def test_feedback_counters_are_validated_and_rebuilt():
+    """Test: bad feedback leaves counters alone and rebuild-stats backfills older feedback"""
+    setup_test_environment()
+    feedback = create_feedback_table()
+    movies = create_stats_tables()
+    import app_aws
+    app_aws.reset_aws_clients()
+    movies.put_item(Item={"movie_id": "m1", "title": "Counter Movie", "genre": "Drama"})
+
+    app_aws.app.config["TESTING"] = True
+    client = app_aws.app.test_client()
+    with client.session_transaction() as sess:
+        sess["username"] = "critic"
+
+    assert client.post("/feedback/m1", data={"rating": "great", "review": "ok"}).status_code == 302
+    assert client.post("/feedback/m1", data={"rating": "9", "review": "ok"}).status_code == 302
+    assert b"Counter Movie" in client.get("/feedback/m1").data
+    assert client.post("/feedback/missing", data={"rating": "4", "review": "ok"}).status_code == 404
+    # The transaction's condition check covers a movie deleted after the lookup
+    assert not app_aws.put_feedback({"feedback_id": "x", "movie_id": "missing", "rating": 4}, {"feedback_count": 1})
+    assert app_aws.get_stats(app_aws.GLOBAL_STATS_ID)["total_feedbacks"] == 0
+    assert feedback.scan()["Count"] == 0
+
+    # Feedback written before the counters existed, plus one through the app
+    for i, rating in enumerate((5, 2)):
+        feedback.put_item(Item={"feedback_id": f"old-{i}", "movie_id": "m1", "rating": rating,
+                                "sentiment": "positive" if rating > 3 else "negative",
+                                "created_at": f"2023-01-0{i + 1}T00:00:00", "would_recommend": rating > 3})
+    assert client.post("/feedback/m1", data={"rating": "4", "review": "good"}).status_code == 302
+    app_aws.add_stats(app_aws.movie_stats_id("gone"), {"feedback_count": 1})
+
+    result = app_aws.app.test_cli_runner().invoke(args=["rebuild-stats"])
+    assert result.exit_code == 0, result.output
+    totals = app_aws.get_stats(app_aws.GLOBAL_STATS_ID)
+    assert totals["total_feedbacks"] == 3 and totals["average_rating"] == 3.7
+    stats = app_aws.batch_get_stats([app_aws.movie_stats_id("m1"), app_aws.movie_stats_id("gone")])
+    assert list(stats) == [app_aws.movie_stats_id("m1")]
+    assert stats[app_aws.movie_stats_id("m1")]["movie_id"] == "m1"
+    assert app_aws.summarize_stats(stats[app_aws.movie_stats_id("m1")])["recommend_count"] == 1
+    print(" TEST PASSED: Counter validation and rebuild")
+
+
+@mock_aws
+def test_analytics_reads_ranked_movies_from_the_global_item():
+    """Test: feedback writes keep a bounded top-movie ranking that /analytics reads without scanning"""
+    setup_test_environment()
+    create_feedback_table()
+    movies = create_stats_tables()
+    import app_aws
+    app_aws.reset_aws_clients()
+    for n in range(4):
+        movies.put_item(Item={"movie_id": f"m{n}", "title": f"Ranked Movie {n}", "genre": "Drama"})
+
+    def post(movie_id, rating):
+        item = {"feedback_id": f"{movie_id}-{rating}-{post.count}", "movie_id": movie_id, "rating": rating}
+        post.count += 1
+        assert app_aws.put_feedback(item, app_aws.feedback_stats_delta(rating, "neutral"))
+    post.count = 0
+
+    kept = app_aws.TOP_MOVIES_KEPT
+    app_aws.TOP_MOVIES_KEPT = 2
+    try:
+        post("m0", 3)
+        post("m1", 5)
+        post("m2", 4)
+        top = app_aws.get_stats_table().get_item(Key={"stat_id": app_aws.GLOBAL_STATS_ID})["Item"]["top_movies"]
+        assert [entry["movie_id"] for entry in top] == ["m1", "m2"]
+        # A listed movie drops below the spare entry
+        post("m1", 1)
+        post("m1", 1)
+        top = app_aws.get_stats_table().get_item(Key={"stat_id": app_aws.GLOBAL_STATS_ID})["Item"]["top_movies"]
+        assert [(entry["movie_id"], entry["feedback_count"]) for entry in top] == [("m2", 1), ("m1", 3)]
+
+        # A concurrent write between the read and the transaction makes it retry
+        batch_get_items = app_aws.batch_get_items
+        def stale_once(*args, **kwargs):
+            app_aws.batch_get_items = batch_get_items
+            found = batch_get_items(*args, **kwargs)
+            app_aws.add_stats(app_aws.movie_stats_id("m3"), {"feedback_count": 1, "rating_sum": 5}, movie_id="m3")
+            return found
+        app_aws.batch_get_items = stale_once
+        post("m3", 5)
+        stats = app_aws.get_stats(app_aws.movie_stats_id("m3"))
+        assert stats["total_feedbacks"] == 2
+        top = app_aws.get_stats_table().get_item(Key={"stat_id": app_aws.GLOBAL_STATS_ID})["Item"]["top_movies"]
+        assert [(entry["movie_id"], entry["feedback_count"]) for entry in top] == [("m3", 2), ("m2", 1)]
+    finally:
+        app_aws.TOP_MOVIES_KEPT = kept
+        app_aws.batch_get_items = batch_get_items
+
+    result = app_aws.app.test_cli_runner().invoke(args=["rebuild-stats"])
+    assert result.exit_code == 0, result.output
+    item = app_aws.get_stats_table().get_item(Key={"stat_id": app_aws.GLOBAL_STATS_ID})["Item"]
+    assert item["total_movies"] == 4
+    # The rebuild ranks every movie from the feedback table, dropping the counter-only write
+    assert [(entry["movie_id"], entry["feedback_count"]) for entry in item["top_movies"]] == [
+        ("m3", 1), ("m2", 1), ("m0", 1), ("m1", 3)]
+
+    scans = []
+    scan = app_aws.get_movies_table().meta.client.scan
+    app_aws.get_movies_table().meta.client.scan = lambda **kwargs: scans.append(kwargs) or scan(**kwargs)
+    app_aws.app.config["TESTING"] = True
+    res = app_aws.app.test_client().get("/analytics")
+    app_aws.get_movies_table().meta.client.scan = scan
+    assert res.status_code == 200 and scans == []
+    assert b"Ranked Movie 3" in res.data and b"Ranked Movie 1" in res.data
+    print(" TEST PASSED: Ranked movies in the global item")
+
+
+@mock_aws
+def test_feedback_export_streams_index_pages():
+    """Test: the export queries each movie's index partition page by page with filters"""
+    import csv
+    import io
+    setup_test_environment()
+    feedback = create_feedback_table()
+    movies = create_stats_tables()
+    import app_aws
+    app_aws.reset_aws_clients()
+
+    for movie_id in ("m1", "m2"):
+        movies.put_item(Item={"movie_id": movie_id, "title": movie_id, "genre": "Drama"})
+    for i in range(30):
+        feedback.put_item(Item={
+            "feedback_id": f"fb-{i}", "movie_id": "m1" if i % 3 else "m2",
+            "username": "critic", "rating": 5 if i % 2 else 1,
+            "sentiment": "positive" if i % 2 else "negative",
+            "created_at": f"2024-01-{1 + i % 10:02d}T12:00:00",
+        })
+
+    app_aws.app.config["TESTING"] = True
+    client = app_aws.app.test_client()
+    assert client.get("/api/feedback/export").status_code == 302
+    with client.session_transaction() as sess:
+        sess["username"] = "admin"
+        sess["is_admin"] = True
+
+    res = client.get("/api/feedback/export")
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert len(rows) == 30 and rows[0]["rating"] in ("1", "5")
+
+    filters = app_aws.ExportFilter.from_args({"movie_id": "m1", "start": "2024-01-02",
+                                              "end": "2024-01-04", "sentiment": "positive"})
+    items = list(app_aws.iter_feedback_export(filters, page_size=2))
+    expected = [i for i in range(30) if i % 3 and i % 2 and 1 <= i % 10 <= 3]
+    assert sorted(item["feedback_id"] for item in items) == sorted(f"fb-{i}" for i in expected)
+
+    assert client.get("/api/feedback/export?start=yesterday").status_code == 400
+    print(" TEST PASSED: Feedback export")
+
+
+@mock_aws
+def test_feedback_bulk_import():
+    """Test: bulk import writes with batch_writer and adds each movie's counters once per batch"""
+    import json
+    setup_test_environment()
+    feedback = create_feedback_table()
+    movies = create_stats_tables()
+    import app_aws
+    app_aws.reset_aws_clients()
+    movies.put_item(Item={"movie_id": "m1", "title": "Imported", "genre": "Drama"})
+
+    app_aws.app.config["TESTING"] = True
+    client = app_aws.app.test_client()
+    with client.session_transaction() as sess:
+        sess["username"] = "admin"
+        sess["is_admin"] = True
+
+    body = "\n".join(json.dumps(record) for record in (
+        {"movie_id": "m1", "rating": 5, "review": "Brilliant", "age_group": "18-25"},
+        {"movie_id": "m1", "rating": 1, "review": "Awful"},
+        {"movie_id": "m404", "rating": 4, "review": "Lost"},
+        {"movie_id": "m1", "rating": "x", "review": "Bad rating"},
+    ))
+    updates = []
+    original = app_aws.add_stats
+    app_aws.add_stats = lambda *args, **kwargs: updates.append(args[0]) or original(*args, **kwargs)
+    try:
+        report = client.post("/api/feedback/import", data=body).get_json()
+    finally:
+        app_aws.add_stats = original
+
+    assert report["imported"] == 2 and report["error_count"] == 2
+    assert sorted(updates) == sorted([app_aws.GLOBAL_STATS_ID, app_aws.movie_stats_id("m1")])
+    assert feedback.scan()["Count"] == 2
+    stats = app_aws.get_stats(app_aws.movie_stats_id("m1"))
+    assert stats["total_feedbacks"] == 2
+    assert stats["sentiment_distribution"] == {"positive": 1, "neutral": 0, "negative": 1}
+    assert stats["age_distribution"]["18-25"] == 1
+    print(" TEST PASSED: Feedback bulk import")
+
+
+@mock_aws
+def test_login_upgrades_plaintext_passwords():
+    """Test: signup stores a hash and legacy plaintext passwords are hashed on login"""
+    setup_test_environment()
+    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+    users = dynamodb.create_table(
+        TableName="Cinemapulse_Users",
+        KeySchema=[{"AttributeName": "username", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "username", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    import app_aws
+    app_aws.reset_aws_clients()
+    app_aws.app.config["TESTING"] = True
+    client = app_aws.app.test_client()
+
+    client.post("/signup", data={"username": "new", "email": "n@test.com", "password": "password123"})
+    item = users.get_item(Key={"username": "new"})["Item"]
+    assert "password" not in item and item["password_hash"].startswith(app_aws.hasher.prefix + "$")
+
+    users.put_item(Item={"username": "old", "email": "o@test.com", "password": "secret1", "is_admin": False})
+    client.post("/login", data={"username": "old", "password": "wrong"})
+    assert users.get_item(Key={"username": "old"})["Item"]["password"] == "secret1"
+    client.post("/login", data={"username": "old", "password": "secret1"})
+    item = users.get_item(Key={"username": "old"})["Item"]
+    assert "password" not in item and app_aws.hasher.verify(item["password_hash"], "secret1")
+    with client.session_transaction() as sess:
+        assert sess["username"] == "old"
+
+    # A plaintext password that looks like a hash is still compared as plaintext
+    users.put_item(Item={"username": "dollar", "email": "d@test.com", "password": "pa$$word", "is_admin": False})
+    assert client.post("/login", data={"username": "dollar", "password": "pa$$word"}).status_code == 302
+    assert "password" not in users.get_item(Key={"username": "dollar"})["Item"]
+    print(" TEST PASSED: Login upgrades plaintext passwords")
+
+
+def test_notification_dispatcher_batches_and_drops():
+    """Test: notifications are coalesced into batches of 10 and dropped when the queue is full"""
+    import threading
+    from notifications import NotificationDispatcher
+
+    batches = []
+    dispatcher = NotificationDispatcher(lambda batch: batches.append(batch) or 0, linger=0.2)
+    for i in range(25):
+        assert dispatcher.submit("New Feedback", f"Feedback {i}")
+    assert dispatcher.shutdown()
+    assert sum(len(b) for b in batches) == 25
+    assert max(len(b) for b in batches) == 10
+    assert dispatcher.metrics()["published"] == 25
+
+    release = threading.Event()
+    stuck = NotificationDispatcher(lambda batch: release.wait() and 0, max_queue_size=2, linger=0)
+    accepted = [stuck.submit("New Feedback", str(i)) for i in range(10)]
+    assert not all(accepted)
+    assert stuck.metrics()["dropped"] >= 1
+    release.set()
+    assert stuck.shutdown()
+
+    import app_aws
+    client = app_aws.app.test_client()
+    assert client.get("/api/notifications/metrics").status_code == 302
+    with client.session_transaction() as sess:
+        sess["username"], sess["is_admin"] = "admin", True
+    assert "published" in client.get("/api/notifications/metrics").get_json()
+    print(" TEST PASSED: Notification dispatcher")
+
+
+
+def test_import_defers_heavy_modules():
+    """Test: importing the app leaves boto3 and numpy to first use"""
+    import subprocess
+
+    check = ("import sys, app_aws; "
+             "loaded = [m for m in ('boto3', 'boto3.dynamodb.conditions', 'botocore.config', 'numpy') "
+             "if m in sys.modules]; print(','.join(loaded))")
+    result = subprocess.run([sys.executable, "-c", check], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+    print(" TEST PASSED: Lazy imports")
+
 # RUN ALL TESTS
 
 if __name__ == "__main__":